@@ -6,9 +6,17 @@ from flask_login import LoginManager
 from flask_mail import Mail
 from flask_jwt_extended import JWTManager
 
+from app.assets import init_assets
 from app.config import config
+from app.database import RoutingSession, apply_engine_options, configure_engine, create_reader_engine
+from app.hashing import init_hashing
+from app.metrics import init_metrics
+from app.profiling import init_profiling
+from app.query_budget import init_query_budget
+from app.slow_queries import init_slow_query_log
+from app.timing import init_server_timing
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 login_manager = LoginManager()
 mail = Mail()
@@ -19,11 +27,18 @@ login_manager.login_message = 'Please log in to access this page.'
 
 
 def create_app(config_name=None):
+    """
+    Create the Flask application.
+
+    No database I/O happens here - the schema is created and upgraded by
+    ``python migrate.py`` (or ``flask init-db``), not on every worker boot.
+    """
     if config_name is None:
         config_name = os.environ.get('FLASK_CONFIG', 'default')
 
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    apply_engine_options(app)
 
     # Initialize extensions
     db.init_app(app)
@@ -32,18 +47,31 @@ def create_app(config_name=None):
     mail.init_app(app)
     jwt.init_app(app)
 
+    with app.app_context():
+        configure_engine(app, db.engine)
+        create_reader_engine(app, db.engine)
+        init_metrics(app, [db.engine, app.extensions['db_reader']])
+        init_server_timing(app, [db.engine, app.extensions['db_reader']])
+        init_query_budget(app, [db.engine, app.extensions['db_reader']])
+        init_slow_query_log(app, [db.engine, app.extensions['db_reader']])
+    init_profiling(app)
+    init_hashing(app)
+    init_assets(app)
+
     # Register blueprints
     from app.routes.auth import auth_bp
     from app.routes.dashboard import dashboard_bp
     from app.routes.admin import admin_bp
     from app.routes.api import api_bp
     from app.routes.settings import settings_bp
+    from app.routes.health import health_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(api_bp, url_prefix='/api/v1')
     app.register_blueprint(settings_bp, url_prefix='/settings')
+    app.register_blueprint(health_bp)
 
     # User loader for Flask-Login
     from app.models.user import User
@@ -52,8 +80,4 @@ def create_app(config_name=None):
     def load_user(user_id):
         return User.query.get(int(user_id))
 
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-
     return app
@@ -0,0 +1,110 @@
+"""
+Content-hashed static assets.
+
+``python build_assets.py`` writes the compiled CSS and vendored JS into
+static/dist under content-hashed names, plus a manifest mapping each logical
+name to its file. Templates link them with ``asset_url('app.css')``; since a
+changed file gets a new name, responses for static/dist are marked immutable
+and cached for a year.
+
+Until the assets are built (e.g. a fresh checkout), ``asset_url`` falls back
+to the public CDNs so the app still works in development.
+
+The service worker is generated from the same manifest: it precaches the
+hashed files and names its cache after a hash of everything it precaches,
+so each deployment that changes an asset installs a fresh cache.
+"""
+import hashlib
+import json
+import os
+
+from flask import request, url_for
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+
+# Used when the assets haven't been built; app.css has no CDN equivalent,
+# so templates load the Tailwind Play CDN script instead
+CDN_FALLBACKS = {
+    'htmx.js': 'https://unpkg.com/htmx.org@1.9.10',
+    'alpine.js': 'https://unpkg.com/alpinejs@3.x.x/dist/cdn.min.js',
+    'chart.js': 'https://cdn.jsdelivr.net/npm/chart.js',
+}
+
+# Our own scripts, served unhashed from static until the assets are built
+LOCAL_FALLBACKS = {
+    'offline.js': 'js/offline.js',
+    'prefetch.js': 'js/prefetch.js',
+}
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Static files the service worker precaches alongside the built assets
+PRECACHE_STATIC = [
+    'manifest.json',
+    'icons/icon-192.png',
+    'icons/icon-512.png',
+    'js/offline.js',
+    'js/prefetch.js',
+]
+
+
+def load_manifest(static_folder):
+    """Read the build manifest, or an empty one if the assets haven't been built."""
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def init_assets(app):
+    """Load the asset manifest, add asset_url to templates and cache hashed files forever."""
+    app.extensions['assets'] = load_manifest(app.static_folder)
+
+    def asset_url(name):
+        """Get the URL of a built asset, or its CDN fallback."""
+        manifest = app.extensions['assets']
+        if name in manifest:
+            return url_for('static', filename=f'{DIST_DIR}/{manifest[name]}')
+        if name in LOCAL_FALLBACKS:
+            return url_for('static', filename=LOCAL_FALLBACKS[name])
+        if name in CDN_FALLBACKS:
+            return CDN_FALLBACKS[name]
+        raise KeyError(f'Unknown asset {name!r} - add it to build_assets.py')
+
+    app.jinja_env.globals['asset_url'] = asset_url
+    app.jinja_env.globals['assets_built'] = lambda: bool(app.extensions['assets'])
+
+    @app.after_request
+    def cache_hashed_assets(response):
+        filename = (request.view_args or {}).get('filename', '')
+        if (request.endpoint == 'static' and response.status_code == 200
+                and filename.startswith(f'{DIST_DIR}/') and filename != f'{DIST_DIR}/{MANIFEST}'):
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
+
+
+def service_worker_context(app):
+    """Get the precache list and versioned cache name for the service worker template."""
+    if 'service_worker' not in app.extensions:
+        manifest = app.extensions['assets']
+        static_url = app.static_url_path
+        entries = {}
+        for filename in PRECACHE_STATIC:
+            with open(os.path.join(app.static_folder, filename), 'rb') as f:
+                entries[f'{static_url}/{filename}'] = hashlib.sha256(f.read()).hexdigest()
+        for name in sorted(manifest):
+            # The hashed name already identifies the content
+            entries[f'{static_url}/{DIST_DIR}/{manifest[name]}'] = manifest[name]
+
+        version = hashlib.sha256(json.dumps(entries, sort_keys=True).encode()).hexdigest()[:10]
+        app.extensions['service_worker'] = {
+            'cache_name': f'chorechamp-{version}',
+            'precache': list(entries),
+            'immutable_prefixes': [f'{static_url}/{DIST_DIR}/'],
+        }
+    return app.extensions['service_worker']
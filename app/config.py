@@ -10,6 +10,40 @@ class Config:
         'sqlite:///' + os.path.join(os.path.dirname(basedir), 'instance', 'chorechamp.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # SQLite PRAGMAs applied to every new connection (ignored for other databases)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -20000,  # Negative = KiB, so ~20MB per connection
+        'mmap_size': 67108864,
+        'temp_store': 'MEMORY',
+    }
+
+    # Route reads made during GET/HEAD requests to a separate read-only engine
+    DATABASE_READ_ROUTING = True
+    SQLALCHEMY_READER_ENGINE_OPTIONS = {
+        'pool_size': 5,
+        'max_overflow': 5,
+    }
+    SQLITE_READER_PRAGMAS = {
+        'query_only': 1,
+        'busy_timeout': 5000,
+        'cache_size': -20000,
+        'mmap_size': 67108864,
+        'temp_store': 'MEMORY',
+    }
+
+    # PostgreSQL connection pool (used when DATABASE_URL is a postgresql:// URI)
+    POSTGRES_ENGINE_OPTIONS = {
+        'pool_size': 5,
+        'max_overflow': 5,
+        'pool_timeout': 10,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+    }
+    POSTGRES_STATEMENT_TIMEOUT_MS = int(os.environ.get('POSTGRES_STATEMENT_TIMEOUT_MS', 10000))
+
     # Session settings
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
     CHILD_SESSION_LIFETIME = timedelta(hours=24)
@@ -23,6 +57,32 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
 
+    # bcrypt cost for children's PINs and parents' passwords. Existing hashes
+    # are upgraded (or downgraded) on the user's next login.
+    BCRYPT_PIN_ROUNDS = int(os.environ.get('BCRYPT_PIN_ROUNDS', 12))
+    BCRYPT_PASSWORD_ROUNDS = int(os.environ.get('BCRYPT_PASSWORD_ROUNDS', 12))
+
+    # Threads per process that run bcrypt, and how many more checks may wait
+    # for one before logins are refused with a 503 (0 workers = hash inline)
+    HASHING_WORKERS = int(os.environ.get('HASHING_WORKERS', 2))
+    HASHING_QUEUE_LIMIT = int(os.environ.get('HASHING_QUEUE_LIMIT', 4))
+
+    # Login attempts allowed per (attempts, seconds), refilled continuously, for
+    # the account being logged into, the client IP and the whole site. After
+    # LOGIN_LOCKOUT_THRESHOLD failures in a row an account is locked, for
+    # LOGIN_LOCKOUT_SECONDS doubling with each further failure.
+    LOGIN_RATE_LIMIT_ENABLED = os.environ.get('LOGIN_RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    LOGIN_RATE_LIMITS = {
+        'account': (5, 60),
+        'ip': (30, 60),
+        'global': (120, 60),
+    }
+    LOGIN_LOCKOUT_THRESHOLD = 5
+    LOGIN_LOCKOUT_SECONDS = 30
+    LOGIN_LOCKOUT_MAX_SECONDS = 3600
+    # Idle rate-limit state is forgotten after this long
+    LOGIN_THROTTLE_RETENTION_SECONDS = 86400
+
     # JWT settings
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
@@ -30,6 +90,58 @@ class Config:
     # Scheduler settings
     SCHEDULER_API_ENABLED = True
 
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED = True
+    # Scrapers must send "Authorization: Bearer <METRICS_TOKEN>". Without a token
+    # /metrics is open, so only expose it on an internal network.
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Server-Timing header with a db/render/auth breakdown, optionally logged as JSON
+    SERVER_TIMING_ENABLED = True
+    SERVER_TIMING_LOG = os.environ.get('SERVER_TIMING_LOG', 'false').lower() == 'true'
+
+    # SQL statements allowed per request, by endpoint. Requests over budget, or
+    # that repeat one statement N_PLUS_ONE_THRESHOLD times, are logged.
+    # Pages batch their queries, so counts don't grow with the number of
+    # children, weeks or payments shown. Budgets are the counts measured on
+    # an uncached render (flask seed-scale) plus a little headroom.
+    QUERY_BUDGET_ENABLED = True
+    QUERY_BUDGET_DEFAULT = 50
+    QUERY_BUDGETS = {
+        'dashboard.index': 25,                # measured 16
+        'dashboard.week_view': 25,            # measured 17
+        'dashboard.history_chart': 15,        # measured 10
+        'dashboard.toggle_chore': 25,         # measured 16
+        'admin.index': 15,                    # measured 9
+        'admin.view_child_dashboard': 25,     # measured 18
+        'admin.payments': 10,                 # measured 2
+        'api.current_week': 15,               # measured 9
+    }
+    N_PLUS_ONE_THRESHOLD = 10
+    # Raise QueryBudgetExceeded from query_budget() blocks instead of logging
+    QUERY_BUDGET_STRICT = False
+
+    # Statements slower than this are logged with their query plan (None disables)
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+    SLOW_QUERY_LOG_FILE = os.environ.get('SLOW_QUERY_LOG_FILE') or \
+        os.path.join(os.path.dirname(basedir), 'instance', 'slow_queries.log')
+    # Each process logs to SLOW_QUERY_LOG_FILE.<pid>, rotated at SLOW_QUERY_LOG_MAX_BYTES
+    SLOW_QUERY_LOG_MAX_BYTES = 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS = 3
+    SLOW_QUERY_LOG_MAX_FILES = 20
+
+    # On-demand cProfile profiles, written to instance/profiles unless PROFILING_DIR is set
+    PROFILING_ENABLED = True
+    PROFILING_DIR = os.environ.get('PROFILING_DIR')
+    PROFILING_KEEP = 50
+
+    # Avatars are drawn locally and cached in instance/avatars unless AVATAR_CACHE_DIR is set.
+    # Their URLs include the style, seed and renderer version, so browsers can keep them.
+    AVATAR_CACHE_DIR = os.environ.get('AVATAR_CACHE_DIR')
+    AVATAR_CACHE_MAX_FILES = 5000
+    AVATAR_CACHE_MAX_BYTES = 50 * 1024 * 1024
+    AVATAR_MAX_AGE = 365 * 24 * 60 * 60
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -39,11 +151,44 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    QUERY_BUDGET_STRICT = True
+    SLOW_QUERY_THRESHOLD_MS = None
+    BCRYPT_PIN_ROUNDS = 4
+    BCRYPT_PASSWORD_ROUNDS = 4
+
+    # In-memory databases have no journal file to put in WAL mode
+    SQLITE_PRAGMAS = {
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    }
+    DATABASE_READ_ROUTING = False
 
 
 class ProductionConfig(Config):
     DEBUG = False
 
+    SQLITE_PRAGMAS = {
+        **Config.SQLITE_PRAGMAS,
+        'busy_timeout': 15000,
+        'cache_size': -64000,
+        'mmap_size': 268435456,
+    }
+    SQLALCHEMY_READER_ENGINE_OPTIONS = {
+        'pool_size': 10,
+        'max_overflow': 10,
+    }
+    SQLITE_READER_PRAGMAS = {
+        **Config.SQLITE_READER_PRAGMAS,
+        'busy_timeout': 15000,
+        'cache_size': -64000,
+        'mmap_size': 268435456,
+    }
+    POSTGRES_ENGINE_OPTIONS = {
+        **Config.POSTGRES_ENGINE_OPTIONS,
+        'pool_size': int(os.environ.get('POSTGRES_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('POSTGRES_MAX_OVERFLOW', 10)),
+    }
+
 
 config = {
     'development': DevelopmentConfig,
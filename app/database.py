@@ -0,0 +1,237 @@
+"""Engine configuration for the application database."""
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+
+# Requests with these methods may read from the read-only engine
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# PRAGMA values that SQLite reports back as integers
+_SYNCHRONOUS_LEVELS = {'OFF': 0, 'NORMAL': 1, 'FULL': 2, 'EXTRA': 3}
+_TEMP_STORE_LEVELS = {'DEFAULT': 0, 'FILE': 1, 'MEMORY': 2}
+
+
+# Dialect-specific INSERT constructs that support ON CONFLICT
+_DIALECT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+
+def is_sqlite(engine):
+    """Check if an engine is backed by SQLite."""
+    return engine.dialect.name == 'sqlite'
+
+
+def normalize_database_uri(uri):
+    """Point bare ``postgres://``/``postgresql://`` URIs at the psycopg 3 driver."""
+    for scheme in ('postgres://', 'postgresql://'):
+        if uri and uri.startswith(scheme):
+            return 'postgresql+psycopg://' + uri[len(scheme):]
+    return uri
+
+
+def apply_engine_options(app):
+    """
+    Merge the per-dialect engine options into SQLALCHEMY_ENGINE_OPTIONS.
+
+    Must run before db.init_app() so the engine is created with them.
+    Options already present in SQLALCHEMY_ENGINE_OPTIONS take precedence.
+    """
+    uri = normalize_database_uri(app.config.get('SQLALCHEMY_DATABASE_URI'))
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    if make_url(uri).get_backend_name() != 'postgresql':
+        return
+
+    options = postgres_engine_options(app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def postgres_engine_options(config):
+    """Build create_engine() options for the PostgreSQL pool from config."""
+    options = dict(config.get('POSTGRES_ENGINE_OPTIONS') or {})
+    timeout = config.get('POSTGRES_STATEMENT_TIMEOUT_MS')
+    if timeout:
+        connect_args = dict(options.get('connect_args') or {})
+        connect_args['options'] = f"{connect_args.get('options', '')} -c statement_timeout={int(timeout)}".strip()
+        options['connect_args'] = connect_args
+    return options
+
+
+def insert_or_ignore(session, model, index_elements):
+    """
+    Build an INSERT for a model that silently skips rows that would violate
+    the unique index on ``index_elements`` (INSERT ... ON CONFLICT DO NOTHING).
+    """
+    dialect = session.get_bind(mapper=model).dialect.name
+    if dialect not in _DIALECT_INSERTS:
+        raise NotImplementedError(f"ON CONFLICT inserts are not supported for {dialect}")
+    return _DIALECT_INSERTS[dialect](model).on_conflict_do_nothing(index_elements=index_elements)
+
+
+def configure_engine(app, engine, pragmas_key='SQLITE_PRAGMAS'):
+    """
+    Apply the configured connection settings to an engine.
+
+    This does no database I/O: PRAGMAs are applied as each connection is
+    opened, and checked and logged on the engine's first connection.
+    """
+    if is_sqlite(engine):
+        pragmas = app.config.get(pragmas_key) or {}
+        if pragmas:
+            event.listen(engine, 'connect', _pragma_listener(app, pragmas))
+
+
+def create_reader_engine(app, writer_engine):
+    """
+    Create a read-only engine for the same database as the writer.
+
+    Only file-backed SQLite databases get a separate reader; the returned
+    engine opens the file with ``mode=ro`` and applies SQLITE_READER_PRAGMAS.
+
+    Returns:
+        Engine or None: The reader engine, stored in app.extensions['db_reader']
+    """
+    app.extensions['db_reader'] = None
+    if not app.config.get('DATABASE_READ_ROUTING') or not is_sqlite(writer_engine):
+        return None
+
+    database = writer_engine.url.database
+    if not database or database == ':memory:' or writer_engine.url.query.get('uri'):
+        return None
+
+    url = make_url(f'sqlite:///file:{database}?mode=ro&uri=true')
+    engine = create_engine(url, **app.config.get('SQLALCHEMY_READER_ENGINE_OPTIONS', {}))
+    configure_engine(app, engine, pragmas_key='SQLITE_READER_PRAGMAS')
+    app.extensions['db_reader'] = engine
+    return engine
+
+
+def dispose_engines(app):
+    """
+    Drop pooled connections inherited from a parent process.
+
+    Call in each worker after forking. ``close=False`` leaves the parent's
+    connections open for the parent, while the worker starts a fresh pool.
+    """
+    from app import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    reader = app.extensions.get('db_reader')
+    if reader is not None:
+        reader.dispose(close=False)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads made during safe (GET/HEAD) requests to the
+    read-only engine and everything else to the writer.
+
+    Once the session flushes or runs a DML statement it sticks to the writer
+    until the transaction ends, so a request always reads its own writes.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self._uses_writer = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self._uses_writer = True
+            elif not self._uses_writer:
+                reader = _current_reader()
+                if reader is not None:
+                    return reader
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _release_writer(session, transaction):
+    """Allow reads to go back to the reader once the outer transaction ends."""
+    if transaction.parent is None:
+        session._uses_writer = False
+
+
+def _current_reader():
+    """Get the reader engine if the current request is read-only."""
+    if not has_request_context() or request.method not in READ_ONLY_METHODS:
+        return None
+    return current_app.extensions.get('db_reader')
+
+
+def _pragma_listener(app, pragmas):
+    """Build a connect listener that applies PRAGMAs to each new connection."""
+    verified = []
+
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+            if not verified:
+                actual = {}
+                for name in pragmas:
+                    row = cursor.execute(f'PRAGMA {name}').fetchone()
+                    actual[name] = row[0] if row else None
+                _log_pragmas(app, pragmas, actual)
+                verified.append(True)
+        finally:
+            cursor.close()
+    return set_sqlite_pragmas
+
+
+def _normalize_pragma(name, value):
+    """Convert a configured PRAGMA value to the form SQLite reports it in."""
+    if isinstance(value, str):
+        upper = value.upper()
+        if name == 'synchronous' and upper in _SYNCHRONOUS_LEVELS:
+            return _SYNCHRONOUS_LEVELS[upper]
+        if name == 'temp_store' and upper in _TEMP_STORE_LEVELS:
+            return _TEMP_STORE_LEVELS[upper]
+        if value.lstrip('-').isdigit():
+            return int(value)
+        return value.lower()
+    return value
+
+
+def read_sqlite_pragmas(engine, names):
+    """Read the current value of each PRAGMA from a fresh connection."""
+    values = {}
+    with engine.connect() as connection:
+        for name in names:
+            row = connection.execute(text(f'PRAGMA {name}')).first()
+            values[name] = row[0] if row else None
+    return values
+
+
+def verify_sqlite_pragmas(app, engine):
+    """
+    Check that the configured PRAGMAs took effect and log them.
+
+    Returns:
+        dict: {pragma_name: actual_value} for every configured PRAGMA
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if not is_sqlite(engine) or not pragmas:
+        return {}
+
+    actual = read_sqlite_pragmas(engine, pragmas)
+    _log_pragmas(app, pragmas, actual)
+    return actual
+
+
+def _log_pragmas(app, pragmas, actual):
+    """Log the effective PRAGMAs, warning about any that didn't take effect."""
+    for name, expected in pragmas.items():
+        value = actual[name]
+        if isinstance(value, str):
+            value = value.lower()
+        if value != _normalize_pragma(name, expected):
+            app.logger.warning(f"SQLite PRAGMA {name} is {actual[name]!r}, expected {expected!r}")
+
+    app.logger.info("SQLite PRAGMAs: " + ', '.join(f"{k}={v}" for k, v in actual.items()))
@@ -0,0 +1,83 @@
+"""
+Cached week fragments.
+
+The week views render their body as a fragment, which is what HTMX swaps in
+when moving between weeks. Rendered fragments are kept per process in a
+small LRU, keyed on a version of the data behind them (see
+``AllowanceService.get_week_version``), so a week nobody has changed is
+never rebuilt and nothing needs invalidating - old versions just age out.
+
+The same key doubles as the fragment's ETag. Prefetched fragments sit in
+the browser's cache and are revalidated on click, so an unchanged week
+costs one query and a 304.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import current_app, request
+
+# Fragments kept per worker
+FRAGMENT_CACHE_SIZE = 256
+
+_lock = threading.Lock()
+
+
+def fragment_key(*parts):
+    """Build a cache key (and ETag) from everything a fragment depends on."""
+    return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()[:24]
+
+
+def get_fragment(key):
+    """Get a cached fragment's HTML, or None."""
+    cache = current_app.extensions.setdefault('fragment_cache', OrderedDict())
+    with _lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    return None
+
+
+def put_fragment(key, html):
+    """Cache a rendered fragment, dropping the least recently used beyond FRAGMENT_CACHE_SIZE."""
+    cache = current_app.extensions.setdefault('fragment_cache', OrderedDict())
+    with _lock:
+        cache[key] = html
+        while len(cache) > FRAGMENT_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def wants_fragment():
+    """Whether this is an HTMX request for just the fragment, rather than a page load or history restore."""
+    return request.headers.get('HX-Request') == 'true' and 'HX-History-Restore-Request' not in request.headers
+
+
+def fragment_response(key, render):
+    """
+    Respond with a fragment, as a 304 if the browser's copy is current.
+
+    Args:
+        key: the fragment's key from fragment_key()
+        render: called with no arguments to get the HTML on a cache miss;
+            returns (html, cacheable)
+    """
+    if request.if_none_match.contains(key):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.make_response(cached_fragment(key, render))
+    # The browser keeps prefetched weeks, but checks the version each time
+    response.set_etag(key)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('HX-Request')
+    return response
+
+
+def cached_fragment(key, render):
+    """Get a fragment's HTML from the cache, rendering it on a miss."""
+    html = get_fragment(key)
+    if html is None:
+        html, cacheable = render()
+        if cacheable:
+            put_fragment(key, html)
+    return html
@@ -0,0 +1,127 @@
+"""
+Bounded bcrypt hashing.
+
+PIN and password hashing runs on a small per-process thread pool (bcrypt
+releases the GIL) with a cap on work in flight. When the pool is full,
+further checks fail fast with ``HashingBusy`` - answered with a 503 - rather
+than queueing behind each other and tying up every request thread.
+
+PINs and passwords have their own bcrypt cost (BCRYPT_PIN_ROUNDS and
+BCRYPT_PASSWORD_ROUNDS). Hashes made at a different cost are replaced the
+next time the user logs in.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from flask import current_app, has_app_context, jsonify, request
+
+from app.metrics import BCRYPT_SECONDS, HASHING_REJECTED
+from app.timing import timed
+
+# bcrypt's own default, used outside an app context (e.g. scripts)
+DEFAULT_ROUNDS = 12
+
+ROUNDS_SETTINGS = {
+    'pin': 'BCRYPT_PIN_ROUNDS',
+    'password': 'BCRYPT_PASSWORD_ROUNDS',
+}
+
+BUSY_MESSAGE = 'Lots of people are logging in right now - please try again in a moment.'
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool has no room for another PIN/password check."""
+
+
+class HashingPool:
+    """A thread pool for bcrypt that refuses work beyond ``workers + queue_limit`` in flight."""
+
+    def __init__(self, workers, queue_limit):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def run(self, fn, *args):
+        """Run fn on the pool and wait for its result, or raise HashingBusy if the pool is full."""
+        executor, slots = self._for_this_process()
+        if not slots.acquire(blocking=False):
+            HASHING_REJECTED.inc()
+            raise HashingBusy()
+
+        def release_when_done():
+            try:
+                return fn(*args)
+            finally:
+                slots.release()
+
+        try:
+            future = executor.submit(release_when_done)
+        except BaseException:
+            slots.release()
+            raise
+        return future.result()
+
+    def _for_this_process(self):
+        # Threads don't survive a fork, so each gunicorn worker starts its own pool
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+                self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+                self._pid = os.getpid()
+            return self._executor, self._slots
+
+
+def init_hashing(app):
+    """Create the app's hashing pool and answer HashingBusy with a 503."""
+    workers = app.config.get('HASHING_WORKERS', 2)
+    app.extensions['hashing'] = HashingPool(workers, app.config.get('HASHING_QUEUE_LIMIT', 4)) if workers else None
+
+    @app.errorhandler(HashingBusy)
+    def hashing_busy(e):
+        if request.blueprint == 'api':
+            response = jsonify({'error': BUSY_MESSAGE})
+        else:
+            response = current_app.make_response(BUSY_MESSAGE)
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+
+
+def hash_secret(secret, kind):
+    """Hash a PIN or password at the configured cost for its kind."""
+    salt = bcrypt.gensalt(rounds_for(kind))
+    return _run('hash', bcrypt.hashpw, secret.encode('utf-8'), salt).decode('utf-8')
+
+
+def check_secret(secret, hashed):
+    """Check a PIN or password against its hash."""
+    return _run('verify', bcrypt.checkpw, secret.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def needs_rehash(hashed, kind):
+    """Check whether a hash was made at a different cost than is now configured."""
+    try:
+        return int(hashed.split('$')[2]) != rounds_for(kind)
+    except (IndexError, ValueError):
+        return False
+
+
+def rounds_for(kind):
+    """Get the bcrypt cost for 'pin' or 'password'."""
+    if not has_app_context():
+        return DEFAULT_ROUNDS
+    return current_app.config.get(ROUNDS_SETTINGS[kind], DEFAULT_ROUNDS)
+
+
+def _run(operation, fn, *args):
+    def measured():
+        with BCRYPT_SECONDS.labels(operation).time():
+            return fn(*args)
+
+    pool = current_app.extensions.get('hashing') if has_app_context() else None
+    # Time spent waiting for the pool counts as auth time too
+    with timed('auth'):
+        return pool.run(measured) if pool else measured()
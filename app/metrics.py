@@ -0,0 +1,96 @@
+"""
+Prometheus metrics.
+
+When PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py sets it), every
+worker writes its samples to files in that directory and /metrics merges
+them, so the numbers cover all workers rather than whichever one answered.
+The variable must be set before prometheus_client is first imported.
+"""
+import os
+import time
+
+from flask import Response, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+
+REQUEST_LATENCY = Histogram(
+    'chorechamp_request_duration_seconds', 'Request latency by endpoint',
+    ['endpoint', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+REQUEST_SQL_STATEMENTS = Histogram(
+    'chorechamp_request_sql_statements', 'SQL statements executed per request',
+    ['endpoint'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250)
+)
+BCRYPT_SECONDS = Histogram(
+    'chorechamp_bcrypt_seconds', 'Time spent hashing or verifying PINs and passwords',
+    ['operation'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2)
+)
+HASHING_REJECTED = Counter(
+    'chorechamp_hashing_rejected_total', 'PIN/password checks refused because the hashing pool was full'
+)
+LOGIN_THROTTLED = Counter(
+    'chorechamp_login_throttled_total', 'Login attempts refused by a rate limit or lockout',
+    ['scope']
+)
+EMAILS = Counter(
+    'chorechamp_emails_total', 'Emails handed to the SMTP server',
+    ['kind', 'status']
+)
+EMAIL_SEND_SECONDS = Histogram(
+    'chorechamp_email_send_seconds', 'Time spent talking to the SMTP server',
+    ['kind']
+)
+JOB_SECONDS = Histogram(
+    'chorechamp_job_duration_seconds', 'Scheduled job duration',
+    ['job', 'status'],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300)
+)
+
+# Label used for requests that didn't match a route, to bound label cardinality
+UNMATCHED_ENDPOINT = 'unmatched'
+
+
+def init_metrics(app, engines):
+    """Record request latency and per-request SQL counts for an app."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    for engine in engines:
+        if engine is not None:
+            event.listen(engine, 'before_cursor_execute', _count_statement)
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        g.sql_statements = 0
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            endpoint = request.endpoint or UNMATCHED_ENDPOINT
+            REQUEST_LATENCY.labels(endpoint, request.method, response.status_code).observe(
+                time.perf_counter() - start
+            )
+            REQUEST_SQL_STATEMENTS.labels(endpoint).observe(g.get('sql_statements', 0))
+        return response
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_statements += 1
+
+
+def metrics_response():
+    """Render all metrics in the Prometheus text format."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
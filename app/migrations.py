@@ -0,0 +1,361 @@
+"""
+Versioned database migrations.
+
+Each migration has a number and is recorded in the ``schema_version`` table
+once applied, so it runs exactly once per database. Databases that predate
+the ledger are detected by checking whether a migration's change is already
+present, in which case it is recorded without being run.
+"""
+import time
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+# Rows updated per transaction by backfills
+DEFAULT_CHUNK_SIZE = 5000
+
+# DDL fragments that differ between SQLite and PostgreSQL
+DIALECT_TYPES = {
+    'sqlite': {'pk': 'INTEGER PRIMARY KEY AUTOINCREMENT', 'datetime': 'DATETIME'},
+    'postgresql': {'pk': 'SERIAL PRIMARY KEY', 'datetime': 'TIMESTAMP'},
+}
+
+
+class Migration:
+    """Base class for a numbered migration."""
+
+    # Table whose rows the migration touches (used for estimates)
+    table = None
+
+    def __init__(self, version, description):
+        self.version = version
+        self.description = description
+
+    def is_applied(self, inspector):
+        """Check if the change is already present (databases from before the ledger)."""
+        return False
+
+    def estimate_rows(self, connection):
+        """Estimate how many rows the migration will touch."""
+        return 0
+
+    def estimate_seconds(self, connection, rows, chunk_size):
+        """Estimate how long the migration will take from a read-only sample."""
+        return 0.0
+
+    def run(self, engine, chunk_size):
+        """Apply the migration. Returns the number of rows touched."""
+        raise NotImplementedError
+
+
+class CreateSchema(Migration):
+    """
+    Create the full schema from the models on an empty database.
+
+    Later migrations then find their changes already present and are
+    recorded without running.
+    """
+
+    def is_applied(self, inspector):
+        return inspector.has_table('users')
+
+    def run(self, engine, chunk_size):
+        # Importing the models registers every table with the metadata
+        from app import db, models  # noqa: F401
+        from app.models.login_throttle import LoginThrottle  # noqa: F401
+        from app.models.settings import AppSettings  # noqa: F401
+        db.metadata.create_all(engine)
+        return 0
+
+
+class AddColumn(Migration):
+    """Add a column to an existing table."""
+
+    def __init__(self, version, description, table, column, ddl):
+        super().__init__(version, description)
+        self.table = table
+        self.column = column
+        self.ddl = ddl
+
+    def is_applied(self, inspector):
+        # The table may only be created by an earlier migration in the same run
+        if not inspector.has_table(self.table):
+            return False
+        return self.column in [col['name'] for col in inspector.get_columns(self.table)]
+
+    def run(self, engine, chunk_size):
+        with engine.begin() as connection:
+            connection.execute(text(f'ALTER TABLE {self.table} ADD COLUMN {self.column} {self.ddl}'))
+        return 0
+
+
+class CreateTable(Migration):
+    """Create a table. ``{pk}`` and ``{datetime}`` in the DDL are filled in per dialect."""
+
+    def __init__(self, version, description, table, ddl):
+        super().__init__(version, description)
+        self.table = table
+        self.ddl = ddl
+
+    def is_applied(self, inspector):
+        return inspector.has_table(self.table)
+
+    def run(self, engine, chunk_size):
+        types = DIALECT_TYPES[engine.dialect.name]
+        with engine.begin() as connection:
+            connection.execute(text(f'CREATE TABLE {self.table} ({self.ddl.format(**types)})'))
+        return 0
+
+
+class CreateIndex(Migration):
+    """Create an index, optionally running a cleanup statement first (e.g. de-duplication)."""
+
+    def __init__(self, version, description, name, table, columns, unique=False, before=None):
+        super().__init__(version, description)
+        self.name = name
+        self.table = table
+        self.columns = columns
+        self.unique = unique
+        self.before = before
+
+    def is_applied(self, inspector):
+        # The table may only be created by an earlier migration in the same run
+        if not inspector.has_table(self.table):
+            return False
+        return self.name in [idx['name'] for idx in inspector.get_indexes(self.table)]
+
+    def estimate_rows(self, connection):
+        if not inspect(connection).has_table(self.table):
+            return 0
+        return connection.execute(text(f'SELECT COUNT(*) FROM {self.table}')).scalar()
+
+    def estimate_seconds(self, connection, rows, chunk_size):
+        # Time reading a sorted sample of the indexed columns and scale it up
+        sample = min(rows, chunk_size)
+        if not sample:
+            return 0.0
+        columns = ', '.join(self.columns)
+        start = time.perf_counter()
+        connection.execute(
+            text(f'SELECT {columns} FROM {self.table} ORDER BY {columns} LIMIT :limit'),
+            {'limit': sample}
+        ).fetchall()
+        return (time.perf_counter() - start) * rows / sample
+
+    def run(self, engine, chunk_size):
+        unique = 'UNIQUE ' if self.unique else ''
+        with engine.begin() as connection:
+            if self.before:
+                connection.execute(text(self.before))
+            connection.execute(text(
+                f"CREATE {unique}INDEX IF NOT EXISTS {self.name} ON {self.table} ({', '.join(self.columns)})"
+            ))
+            return self.estimate_rows(connection)
+
+
+class Backfill(Migration):
+    """
+    Fill in data with an UPDATE run in id-range chunks, committing after each
+    chunk so a large table is never locked for the whole backfill.
+    """
+
+    def __init__(self, version, description, table, column, value, where):
+        super().__init__(version, description)
+        self.table = table
+        self.column = column
+        self.value = value
+        self.where = where
+
+    def estimate_rows(self, connection):
+        if not inspect(connection).has_table(self.table):
+            return 0
+        return connection.execute(text(f'SELECT COUNT(*) FROM {self.table} WHERE {self.where}')).scalar()
+
+    def estimate_seconds(self, connection, rows, chunk_size):
+        # Time computing the new values for one chunk and scale it up
+        sample = min(rows, chunk_size)
+        if not sample:
+            return 0.0
+        start = time.perf_counter()
+        connection.execute(
+            text(f'SELECT id, ({self.value}) FROM {self.table} WHERE {self.where} LIMIT :limit'),
+            {'limit': sample}
+        ).fetchall()
+        return (time.perf_counter() - start) * rows / sample
+
+    def run(self, engine, chunk_size):
+        with engine.connect() as connection:
+            low, high = connection.execute(
+                text(f'SELECT MIN(id), MAX(id) FROM {self.table} WHERE {self.where}')
+            ).first()
+
+        if low is None:
+            return 0
+
+        touched = 0
+        for chunk_start in range(low, high + 1, chunk_size):
+            with engine.begin() as connection:
+                result = connection.execute(
+                    text(f'UPDATE {self.table} SET {self.column} = ({self.value}) '
+                         f'WHERE {self.where} AND id >= :low AND id < :high'),
+                    {'low': chunk_start, 'high': chunk_start + chunk_size}
+                )
+                touched += result.rowcount
+        return touched
+
+
+MIGRATIONS = [
+    CreateSchema(0, 'Create initial schema'),
+    AddColumn(1, 'Add avatar_style to users', 'users', 'avatar_style', "VARCHAR(50) DEFAULT 'bottts'"),
+    AddColumn(2, 'Add avatar_seed to users', 'users', 'avatar_seed', 'VARCHAR(100)'),
+    AddColumn(3, 'Add is_active to users', 'users', 'is_active', 'BOOLEAN DEFAULT TRUE NOT NULL'),
+    CreateTable(4, 'Create app_settings table', 'app_settings', '''
+        id {pk},
+        key VARCHAR(100) UNIQUE NOT NULL,
+        value TEXT,
+        is_encrypted BOOLEAN DEFAULT FALSE,
+        created_at {datetime} DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        updated_at {datetime} DEFAULT CURRENT_TIMESTAMP NOT NULL
+    '''),
+    CreateIndex(
+        5, 'One chore log per chore, day and slot', 'uq_chore_logs_slot', 'chore_logs',
+        ['user_id', 'chore_id', 'completed_date', 'completion_slot'], unique=True,
+        before='''
+            DELETE FROM chore_logs WHERE id NOT IN (
+                SELECT MIN(id) FROM chore_logs
+                GROUP BY user_id, chore_id, completed_date, completion_slot
+            )
+        '''
+    ),
+    CreateIndex(6, 'Index chore logs by user and week', 'ix_chore_logs_user_week', 'chore_logs',
+                ['user_id', 'week_id', 'chore_id']),
+    CreateIndex(7, 'Index assignments by week and user', 'ix_weekly_chore_assignments_week_user',
+                'weekly_chore_assignments', ['week_id', 'user_id']),
+    CreateIndex(8, 'Index payments by week and user', 'ix_weekly_payments_week_user',
+                'weekly_payments', ['week_id', 'user_id']),
+    Backfill(
+        9, 'Link chore logs to their weekly assignment', 'chore_logs', 'assignment_id',
+        value='''
+            SELECT MIN(a.id) FROM weekly_chore_assignments a
+            WHERE a.week_id = chore_logs.week_id
+              AND a.chore_id = chore_logs.chore_id
+              AND a.user_id = chore_logs.user_id
+        ''',
+        where='''assignment_id IS NULL AND EXISTS (
+            SELECT 1 FROM weekly_chore_assignments a
+            WHERE a.week_id = chore_logs.week_id
+              AND a.chore_id = chore_logs.chore_id
+              AND a.user_id = chore_logs.user_id
+        )'''
+    ),
+    CreateTable(10, 'Create login_throttles table', 'login_throttles', '''
+        id {pk},
+        key VARCHAR(200) UNIQUE NOT NULL,
+        tokens FLOAT NOT NULL,
+        refilled_at FLOAT NOT NULL,
+        failures INTEGER DEFAULT 0 NOT NULL,
+        locked_until FLOAT
+    '''),
+    CreateIndex(11, 'Index login throttles by last use', 'ix_login_throttles_refilled_at', 'login_throttles',
+                ['refilled_at']),
+]
+
+
+def ensure_ledger(engine):
+    """Create the schema_version table if it doesn't exist."""
+    types = DIALECT_TYPES[engine.dialect.name]
+    with engine.begin() as connection:
+        connection.execute(text(f'''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description VARCHAR(200) NOT NULL,
+                applied_at {types['datetime']} NOT NULL,
+                duration_ms INTEGER NOT NULL
+            )
+        '''))
+
+
+def applied_versions(engine):
+    """Get the set of migration versions recorded in the ledger."""
+    if not inspect(engine).has_table('schema_version'):
+        return set()
+    with engine.connect() as connection:
+        return {row[0] for row in connection.execute(text('SELECT version FROM schema_version'))}
+
+
+def _record(engine, migration, duration_ms):
+    with engine.begin() as connection:
+        connection.execute(
+            text('INSERT INTO schema_version (version, description, applied_at, duration_ms) '
+                 'VALUES (:version, :description, :applied_at, :duration_ms)'),
+            {
+                'version': migration.version,
+                'description': migration.description,
+                'applied_at': datetime.utcnow(),
+                'duration_ms': int(duration_ms),
+            }
+        )
+
+
+def run_migrations(engine, dry_run=False, chunk_size=DEFAULT_CHUNK_SIZE, migrations=None, log=print):
+    """
+    Apply all pending migrations in version order.
+
+    Args:
+        engine: SQLAlchemy engine for the database
+        dry_run: Only report what would run, with estimated rows and timing
+        chunk_size: Rows per transaction for backfills
+        migrations: Migrations to consider (defaults to MIGRATIONS)
+        log: Callable used for progress output
+
+    Returns:
+        list: One dict per pending migration with version, description,
+            status ('applied', 'recorded', 'pending', or 'covered' for a dry
+            run's migrations that a pending CreateSchema makes unnecessary),
+            rows and seconds
+    """
+    migrations = sorted(migrations or MIGRATIONS, key=lambda m: m.version)
+    applied = applied_versions(engine)
+    if not dry_run:
+        ensure_ledger(engine)
+
+    inspector = inspect(engine)
+    results = []
+    # A dry run can't create the schema, so nothing after it can be inspected
+    pending_schema = None
+    for migration in migrations:
+        if migration.version in applied:
+            continue
+
+        label = f"{migration.version:03d} {migration.description}"
+        result = {'version': migration.version, 'description': migration.description}
+
+        if pending_schema is not None:
+            result.update(status='covered', rows=0, seconds=0.0)
+            log(f"  - {label}: covered by {pending_schema.version:03d} {pending_schema.description}")
+        elif migration.is_applied(inspector):
+            result.update(status='recorded', rows=0, seconds=0.0)
+            log(f"  - {label}: already present")
+            if not dry_run:
+                _record(engine, migration, 0)
+        elif dry_run:
+            with engine.connect() as connection:
+                rows = migration.estimate_rows(connection)
+                seconds = migration.estimate_seconds(connection, rows, chunk_size)
+            result.update(status='pending', rows=rows, seconds=seconds)
+            log(f"  - {label}: would touch ~{rows} rows, ~{seconds:.2f}s")
+            if isinstance(migration, CreateSchema):
+                pending_schema = migration
+        else:
+            log(f"  - {label}...")
+            start = time.perf_counter()
+            rows = migration.run(engine, chunk_size)
+            seconds = time.perf_counter() - start
+            _record(engine, migration, seconds * 1000)
+            inspector.clear_cache()
+            result.update(status='applied', rows=rows, seconds=seconds)
+            log(f"    done: {rows} rows in {seconds:.2f}s")
+
+        results.append(result)
+
+    return results
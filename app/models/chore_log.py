@@ -1,10 +1,16 @@
 from datetime import datetime
 
 from app import db
+from app.database import insert_or_ignore
 
 
 class ChoreLog(db.Model):
     __tablename__ = 'chore_logs'
+    __table_args__ = (
+        # One log per chore, day and slot - also the conflict target for toggles
+        db.Index('uq_chore_logs_slot', 'user_id', 'chore_id', 'completed_date', 'completion_slot', unique=True),
+        db.Index('ix_chore_logs_user_week', 'user_id', 'week_id', 'chore_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -35,6 +41,22 @@ class ChoreLog(db.Model):
             completion_slot=slot
         ).first() is not None
 
+    @classmethod
+    def completed_slots(cls, user_id, start_date, end_date):
+        """Get the (chore_id, date, slot) of every completion between two dates, in one query.
+
+        Lets a week view check each cell against a set instead of calling
+        is_completed per cell.
+        """
+        rows = db.session.execute(
+            db.select(cls.chore_id, cls.completed_date, cls.completion_slot).where(
+                cls.user_id == user_id,
+                cls.completed_date >= start_date,
+                cls.completed_date <= end_date
+            )
+        )
+        return {tuple(row) for row in rows}
+
     @classmethod
     def get_completion_count(cls, user_id, chore_id, week_id):
         """Get the number of completions for a chore in a week."""
@@ -45,31 +67,59 @@ class ChoreLog(db.Model):
         ).count()
 
     @classmethod
-    def toggle_completion(cls, user_id, chore_id, week_id, date, slot=1, amount=0.0):
-        """Toggle chore completion status. Returns (is_now_completed, log_entry)."""
-        existing = cls.query.filter_by(
+    def toggle_completion(cls, user_id, chore_id, week_id, date, slot=1, amount=0.0, assignment_id=None):
+        """Toggle chore completion status. Returns (is_now_completed, log_entry).
+
+        Runs as a DELETE followed by INSERT ... ON CONFLICT DO NOTHING, so two
+        concurrent toggles can never leave duplicate logs behind.
+        """
+        key = dict(
             user_id=user_id,
             chore_id=chore_id,
             completed_date=date,
             completion_slot=slot
-        ).first()
+        )
 
-        if existing:
-            db.session.delete(existing)
+        deleted = db.session.execute(db.delete(cls).filter_by(**key))
+        if deleted.rowcount:
             db.session.commit()
             return False, None
-        else:
-            log = cls(
-                user_id=user_id,
-                chore_id=chore_id,
+
+        db.session.execute(
+            insert_or_ignore(db.session, cls, list(key)).values(
                 week_id=week_id,
-                completed_date=date,
-                completion_slot=slot,
-                amount_earned=amount
+                assignment_id=assignment_id,
+                amount_earned=amount,
+                **key
             )
-            db.session.add(log)
-            db.session.commit()
-            return True, log
+        )
+        db.session.commit()
+        return True, cls.query.filter_by(**key).first()
+
+    @classmethod
+    def set_completion(cls, user_id, chore_id, week_id, date, slot=1, done=True, amount=0.0, assignment_id=None):
+        """Mark a chore done or not done, whatever its current state. Does not commit.
+
+        Unlike toggle_completion this is idempotent, so a change replayed twice
+        (e.g. after a dropped response) has no further effect.
+        """
+        key = dict(
+            user_id=user_id,
+            chore_id=chore_id,
+            completed_date=date,
+            completion_slot=slot
+        )
+        if not done:
+            db.session.execute(db.delete(cls).filter_by(**key))
+            return
+        db.session.execute(
+            insert_or_ignore(db.session, cls, list(key)).values(
+                week_id=week_id,
+                assignment_id=assignment_id,
+                amount_earned=amount,
+                **key
+            )
+        )
 
     def __repr__(self):
         return f'<ChoreLog {self.chore_id} on {self.completed_date}>'
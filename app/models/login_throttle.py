@@ -0,0 +1,27 @@
+from app import db
+
+
+class LoginThrottle(db.Model):
+    """
+    Token bucket and failure count for one login rate-limit key.
+
+    Keys look like ``account:user:5``, ``account:email:parent@example.com``,
+    ``ip:192.168.1.20`` or ``global``. Times are Unix timestamps so the
+    bucket can be refilled and spent in a single UPDATE on any database.
+    """
+    __tablename__ = 'login_throttles'
+    __table_args__ = (
+        db.Index('ix_login_throttles_refilled_at', 'refilled_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(200), unique=True, nullable=False)
+    tokens = db.Column(db.Float, nullable=False)
+    refilled_at = db.Column(db.Float, nullable=False)
+
+    # Consecutive failed logins, and when the resulting lockout ends
+    failures = db.Column(db.Integer, default=0, nullable=False)
+    locked_until = db.Column(db.Float, nullable=True)
+
+    def __repr__(self):
+        return f'<LoginThrottle {self.key}>'
@@ -1,8 +1,9 @@
 from datetime import datetime
 from flask_login import UserMixin
-import bcrypt
 
 from app import db
+from app.hashing import HashingBusy, check_secret, hash_secret, needs_rehash
+from app.services.avatar_service import AvatarService
 
 
 class User(UserMixin, db.Model):
@@ -23,7 +24,7 @@ class User(UserMixin, db.Model):
     # Allowance settings (for children)
     base_allowance = db.Column(db.Float, default=0.0, nullable=False)
 
-    # Avatar settings (DiceBear)
+    # Avatar settings (drawn by AvatarService)
     avatar_style = db.Column(db.String(50), default='bottts')
     avatar_seed = db.Column(db.String(100))
 
@@ -39,25 +40,41 @@ class User(UserMixin, db.Model):
         """Set PIN for child authentication (4 digits)."""
         if not pin or len(pin) != 4 or not pin.isdigit():
             raise ValueError("PIN must be exactly 4 digits")
-        self.pin_hash = bcrypt.hashpw(pin.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.pin_hash = hash_secret(pin, 'pin')
 
     def check_pin(self, pin):
-        """Verify PIN for child authentication."""
+        """Verify PIN for child authentication, upgrading the hash if the cost has changed."""
         if not self.pin_hash or not pin:
             return False
-        return bcrypt.checkpw(pin.encode('utf-8'), self.pin_hash.encode('utf-8'))
+        if not check_secret(pin, self.pin_hash):
+            return False
+        if needs_rehash(self.pin_hash, 'pin'):
+            self._rehash('pin_hash', pin, 'pin')
+        return True
 
     def set_password(self, password):
         """Set password for adult authentication."""
         if not password or len(password) < 6:
             raise ValueError("Password must be at least 6 characters")
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = hash_secret(password, 'password')
 
     def check_password(self, password):
-        """Verify password for adult authentication."""
+        """Verify password for adult authentication, upgrading the hash if the cost has changed."""
         if not self.password_hash or not password:
             return False
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        if not check_secret(password, self.password_hash):
+            return False
+        if needs_rehash(self.password_hash, 'password'):
+            self._rehash('password_hash', password, 'password')
+        return True
+
+    def _rehash(self, column, secret, kind):
+        """Store a new hash at the configured cost. Skipped (until next login) if hashing is busy."""
+        try:
+            setattr(self, column, hash_secret(secret, kind))
+        except HashingBusy:
+            return
+        db.session.commit()
 
     @property
     def is_child(self):
@@ -66,10 +83,8 @@ class User(UserMixin, db.Model):
 
     @property
     def avatar_url(self):
-        """Get DiceBear avatar URL."""
-        style = self.avatar_style or 'bottts'
-        seed = self.avatar_seed or self.name
-        return f"https://api.dicebear.com/7.x/{style}/svg?seed={seed}"
+        """Get the URL of the user's locally drawn avatar."""
+        return AvatarService.url(self.avatar_style or 'bottts', self.avatar_seed or self.name)
 
     def __repr__(self):
         role = "Admin" if self.is_admin else "Child"
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 
 from app import db
+from app.database import insert_or_ignore
 
 
 class WeekPeriod(db.Model):
@@ -21,17 +22,7 @@ class WeekPeriod(db.Model):
     @classmethod
     def get_or_create_current_week(cls):
         """Get or create the current week period."""
-        today = datetime.now().date()
-        # Find Monday of current week
-        monday = today - timedelta(days=today.weekday())
-        sunday = monday + timedelta(days=6)
-
-        week = cls.query.filter_by(start_date=monday).first()
-        if not week:
-            week = cls(start_date=monday, end_date=sunday)
-            db.session.add(week)
-            db.session.commit()
-        return week
+        return cls.get_or_create_week_for_date(datetime.now().date())
 
     @classmethod
     def get_or_create_week_for_date(cls, date):
@@ -42,9 +33,12 @@ class WeekPeriod(db.Model):
 
         week = cls.query.filter_by(start_date=monday).first()
         if not week:
-            week = cls(start_date=monday, end_date=sunday)
-            db.session.add(week)
+            # Another request may create the same week concurrently
+            db.session.execute(
+                insert_or_ignore(db.session, cls, ['start_date']).values(start_date=monday, end_date=sunday)
+            )
             db.session.commit()
+            week = cls.query.filter_by(start_date=monday).first()
         return week
 
     def get_days(self):
@@ -57,6 +51,9 @@ class WeekPeriod(db.Model):
 
 class WeeklyChoreAssignment(db.Model):
     __tablename__ = 'weekly_chore_assignments'
+    __table_args__ = (
+        db.Index('ix_weekly_chore_assignments_week_user', 'week_id', 'user_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     week_id = db.Column(db.Integer, db.ForeignKey('week_periods.id'), nullable=False)
@@ -91,6 +88,9 @@ class WeeklyChoreAssignment(db.Model):
 
 class WeeklyPayment(db.Model):
     __tablename__ = 'weekly_payments'
+    __table_args__ = (
+        db.Index('ix_weekly_payments_week_user', 'week_id', 'user_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     week_id = db.Column(db.Integer, db.ForeignKey('week_periods.id'), nullable=False)
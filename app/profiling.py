@@ -0,0 +1,146 @@
+"""
+On-demand request profiling.
+
+Admins can profile one request in N (set on the Admin > Profiling page and
+shared by every worker through AppSettings), or a single request by sending
+it with an ``X-Profile: 1`` header while logged in as an admin. Each profile
+is a cProfile ``.prof`` file in PROFILING_DIR, which can be downloaded and
+opened with snakeviz, speedscope or ``python -m pstats``.
+"""
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import time
+from datetime import datetime
+
+from flask import current_app, g, request
+from flask_login import current_user
+
+# Header that asks for the current request to be profiled (admins only)
+PROFILE_HEADER = 'X-Profile'
+
+# AppSettings key holding N for "profile one request in N" (0 = off)
+SAMPLE_RATE_SETTING = 'PROFILE_SAMPLE_RATE'
+
+_safe_name = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def init_profiling(app):
+    """Profile sampled or explicitly requested requests."""
+    # Per-process cache of the sample rate so it isn't read on every request
+    app.extensions['profiling'] = {'sample_rate': 0, 'read_at': None}
+    if not app.config.get('PROFILING_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_profiler():
+        if not _should_profile():
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already running in this process
+            return
+        g.profiler = profiler
+        g.profile_start = time.perf_counter()
+
+    @app.after_request
+    def save_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        elapsed_ms = (time.perf_counter() - g.pop('profile_start')) * 1000
+        name = save_profile_file(profiler, request.endpoint or 'unmatched', elapsed_ms)
+        response.headers['X-Profile-Id'] = name
+        return response
+
+
+def profiles_dir(app=None):
+    """Get the directory profiles are written to."""
+    app = app or current_app
+    return app.config.get('PROFILING_DIR') or os.path.join(app.instance_path, 'profiles')
+
+
+def save_profile_file(profiler, endpoint, elapsed_ms):
+    """Write a profile to disk and prune old ones. Returns the file name."""
+    directory = profiles_dir()
+    os.makedirs(directory, exist_ok=True)
+    name = _safe_name.sub('_', f"{datetime.now():%Y%m%d-%H%M%S-%f}-{endpoint}-{elapsed_ms:.0f}ms") + '.prof'
+    profiler.dump_stats(os.path.join(directory, name))
+
+    keep = current_app.config.get('PROFILING_KEEP', 50)
+    for old in list_profiles()[keep:]:
+        os.remove(os.path.join(directory, old['name']))
+    return name
+
+
+def list_profiles():
+    """List saved profiles, newest first."""
+    directory = profiles_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if name.endswith('.prof'):
+            path = os.path.join(directory, name)
+            profiles.append({
+                'name': name,
+                'size': os.path.getsize(path),
+                'created_at': datetime.fromtimestamp(os.path.getmtime(path)),
+            })
+    return sorted(profiles, key=lambda p: p['name'], reverse=True)
+
+
+def profile_path(name):
+    """Get the path of a saved profile, or None if the name isn't one."""
+    if name != os.path.basename(name) or not name.endswith('.prof'):
+        return None
+    path = os.path.join(profiles_dir(), name)
+    return path if os.path.isfile(path) else None
+
+
+def summarize_profile(path, limit=40):
+    """Render the top functions of a profile by cumulative time as text."""
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(limit)
+    return output.getvalue()
+
+
+def get_sample_rate():
+    """Get N for "profile one request in N", cached briefly per process."""
+    cache = current_app.extensions['profiling']
+    ttl = current_app.config.get('PROFILING_SETTING_TTL', 10)
+    now = time.monotonic()
+    if cache['read_at'] is None or now - cache['read_at'] >= ttl:
+        from app import db
+        from app.models.settings import AppSettings
+        try:
+            cache['sample_rate'] = int(AppSettings.get(SAMPLE_RATE_SETTING) or 0)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f"Could not read profiling sample rate: {e}")
+            cache['sample_rate'] = 0
+        cache['read_at'] = now
+    return cache['sample_rate']
+
+
+def set_sample_rate(rate):
+    """Save the sample rate for every worker (0 turns sampling off)."""
+    from app.models.settings import AppSettings
+    AppSettings.set(SAMPLE_RATE_SETTING, str(max(int(rate), 0)))
+    current_app.extensions['profiling']['read_at'] = None
+
+
+def _should_profile():
+    if request.headers.get(PROFILE_HEADER) == '1':
+        return current_user.is_authenticated and current_user.is_admin
+    if request.endpoint in ('static', 'health.healthz', 'health.readyz', 'health.metrics'):
+        return False
+    rate = get_sample_rate()
+    return rate > 0 and random.random() < 1 / rate
@@ -0,0 +1,152 @@
+"""
+Query budgets and N+1 detection.
+
+``query_budget`` counts the SQL statements run inside a block (or a
+decorated function) and complains if there are more than allowed, or if
+the same statement runs many times with different parameters - the usual
+sign of a lazy load inside a loop. In tests it raises; in production it
+logs a warning.
+
+Every request is also checked against the per-endpoint budgets in the
+QUERY_BUDGETS config setting.
+"""
+from collections import Counter
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+
+from app.config import Config
+
+# Counters currently collecting statements in this thread/context
+_active_counters = ContextVar('query_counters', default=())
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block runs more SQL than its budget allows."""
+
+
+class QueryCounter:
+    """Record every SQL statement run while active (usable with ``with``)."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        _active_counters.set(_active_counters.get() + (self,))
+        return self
+
+    def __exit__(self, *exc):
+        _active_counters.set(tuple(c for c in _active_counters.get() if c is not self))
+        return False
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeated(self, threshold):
+        """Get statements that ran at least ``threshold`` times, most repeated first."""
+        return [(sql, n) for sql, n in Counter(self.statements).most_common() if n >= threshold]
+
+
+class query_budget(ContextDecorator):
+    """
+    Limit the SQL statements run inside a block or function.
+
+    Args:
+        limit: Maximum statements allowed (None for no limit)
+        repeat_limit: Maximum times one statement may repeat before it's
+            reported as a likely N+1 (defaults to N_PLUS_ONE_THRESHOLD)
+        strict: Raise QueryBudgetExceeded instead of logging. Defaults to
+            the QUERY_BUDGET_STRICT setting (on when testing).
+        name: Label used in the error or log message
+
+    Example:
+        with query_budget(10):
+            client.get('/')
+
+        @query_budget(5, name='weekly summary')
+        def calculate_weekly_summary(...):
+            ...
+    """
+
+    def __init__(self, limit=None, repeat_limit=None, strict=None, name=None):
+        self.limit = limit
+        self.repeat_limit = repeat_limit
+        self.strict = strict
+        self.name = name
+        self._counters = []
+
+    def __enter__(self):
+        counter = QueryCounter()
+        self._counters.append(counter)
+        return counter.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        counter = self._counters.pop()
+        counter.__exit__(exc_type, exc, tb)
+        if exc_type is None:
+            check_budget(counter, self.limit, self.repeat_limit, self.strict, self.name)
+        return False
+
+
+def check_budget(counter, limit, repeat_limit=None, strict=None, name=None):
+    """
+    Report a counter that went over budget or repeated a statement.
+
+    Returns:
+        list: Problems found (empty if within budget)
+    """
+    config = current_app.config if has_app_context() else {}
+    if repeat_limit is None:
+        repeat_limit = config.get('N_PLUS_ONE_THRESHOLD', Config.N_PLUS_ONE_THRESHOLD)
+    if strict is None:
+        strict = config.get('QUERY_BUDGET_STRICT', False)
+
+    label = name or 'block'
+    problems = []
+    if limit is not None and counter.count > limit:
+        problems.append(f"{label} ran {counter.count} SQL statements (budget {limit})")
+    for sql, times in counter.repeated(repeat_limit):
+        problems.append(f"{label} ran the same statement {times} times (likely N+1): {' '.join(sql.split())[:200]}")
+
+    if problems:
+        if strict:
+            raise QueryBudgetExceeded('\n'.join(problems))
+        if has_app_context():
+            for problem in problems:
+                current_app.logger.warning(problem)
+    return problems
+
+
+def init_query_budget(app, engines):
+    """Count statements on the given engines and check each request's budget."""
+    for engine in engines:
+        if engine is not None:
+            event.listen(engine, 'before_cursor_execute', _record_statement)
+
+    if not app.config.get('QUERY_BUDGET_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_query_budget():
+        g.query_counter = QueryCounter().__enter__()
+
+    @app.teardown_request
+    def check_query_budget(exc):
+        counter = g.pop('query_counter', None)
+        if counter is None:
+            return
+        counter.__exit__(None, None, None)
+        if exc is None:
+            budgets = app.config.get('QUERY_BUDGETS') or {}
+            endpoint = request.endpoint
+            limit = budgets.get(endpoint, app.config.get('QUERY_BUDGET_DEFAULT'))
+            # Never raise from teardown - a request that's already been answered can only be logged
+            check_budget(counter, limit, strict=False, name=endpoint)
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in _active_counters.get():
+        counter.statements.append(statement)
@@ -0,0 +1,172 @@
+"""
+Login rate limiting and lockout.
+
+Every login attempt spends a token from three buckets - the account being
+logged into, the client's IP address and a global one - before any PIN or
+password is hashed. Buckets refill continuously, so a short burst is
+allowed but sustained guessing is not. Repeated failures on an account
+also lock it for an escalating period (doubling with each further failure).
+
+State lives in the ``login_throttles`` table so every gunicorn worker shares
+it. Spending a token is a single conditional UPDATE, so concurrent
+attempts can't spend the same token twice.
+"""
+import math
+import time
+
+from flask import current_app, request
+from sqlalchemy import case, delete, update
+
+from app import db
+from app.database import insert_or_ignore
+from app.metrics import LOGIN_THROTTLED
+from app.models.login_throttle import LoginThrottle
+
+GLOBAL_KEY = 'global'
+
+
+class LoginThrottled(Exception):
+    """Raised when a login attempt is over a rate limit or the account is locked."""
+
+    def __init__(self, scope, retry_after):
+        super().__init__(f'Login rate limit reached ({scope})')
+        self.scope = scope
+        self.retry_after = max(1, math.ceil(retry_after))
+
+    @property
+    def message(self):
+        if self.scope == 'locked':
+            return f'Too many wrong attempts. Please wait {_describe(self.retry_after)} and try again.'
+        return f'Too many login attempts. Please wait {_describe(self.retry_after)} and try again.'
+
+
+def parse_user_id(value):
+    """
+    Parse the user id a PIN login is for, or None if it isn't a valid id.
+
+    Ids must be normalised before they key an account's bucket - '1', '01'
+    and '0001' all find user 1, and would otherwise each get a fresh
+    allowance of attempts.
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        user_id = int(value)
+    except (TypeError, ValueError):
+        return None
+    # users.id is a 32-bit integer column
+    if not 0 < user_id < 2 ** 31:
+        return None
+    return user_id
+
+
+def account_key(user_id=None, email=None):
+    """Get the rate-limit key for the account a login is for."""
+    if user_id is not None:
+        return f'account:user:{user_id}'
+    return f"account:email:{(email or '').strip().lower()}"
+
+
+def check_login_allowed(account):
+    """
+    Spend a token for a login attempt on an account, or raise LoginThrottled.
+
+    Must be called before the PIN or password is checked.
+    """
+    if not current_app.config.get('LOGIN_RATE_LIMIT_ENABLED', True):
+        return
+    limits = current_app.config['LOGIN_RATE_LIMITS']
+    now = time.time()
+    try:
+        for scope, key in [('global', GLOBAL_KEY), ('ip', f'ip:{request.remote_addr}'), ('account', account)]:
+            capacity, per_seconds = limits[scope]
+            if not _spend(key, capacity, capacity / per_seconds, now):
+                raise _throttled(scope, key, capacity, capacity / per_seconds, now)
+    finally:
+        db.session.commit()
+
+
+def record_login_failure(account):
+    """Count a failed login, locking the account once failures pass the threshold."""
+    if not current_app.config.get('LOGIN_RATE_LIMIT_ENABLED', True):
+        return
+    failures = db.session.execute(
+        update(LoginThrottle).where(LoginThrottle.key == account)
+        .values(failures=LoginThrottle.failures + 1).returning(LoginThrottle.failures)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    threshold = current_app.config['LOGIN_LOCKOUT_THRESHOLD']
+    if failures is not None and failures >= threshold:
+        seconds = min(current_app.config['LOGIN_LOCKOUT_SECONDS'] * 2 ** (failures - threshold),
+                      current_app.config['LOGIN_LOCKOUT_MAX_SECONDS'])
+        db.session.execute(
+            update(LoginThrottle).where(LoginThrottle.key == account).values(locked_until=time.time() + seconds)
+            .execution_options(synchronize_session=False)
+        )
+        current_app.logger.warning(f"Locked {account} for {seconds}s after {failures} failed logins "
+                                   f"(last from {request.remote_addr})")
+    db.session.commit()
+
+
+def record_login_success(account):
+    """Clear an account's failures and lockout after a successful login."""
+    if not current_app.config.get('LOGIN_RATE_LIMIT_ENABLED', True):
+        return
+    db.session.execute(
+        update(LoginThrottle).where(LoginThrottle.key == account, LoginThrottle.failures > 0)
+        .values(failures=0, locked_until=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def _spend(key, capacity, rate, now):
+    """Refill a bucket and take one token from it. Returns False if it is empty or locked."""
+    refilled = case(
+        (LoginThrottle.tokens + (now - LoginThrottle.refilled_at) * rate > capacity, capacity),
+        else_=LoginThrottle.tokens + (now - LoginThrottle.refilled_at) * rate,
+    )
+    statement = (
+        update(LoginThrottle)
+        .where(LoginThrottle.key == key, refilled >= 1)
+        .where((LoginThrottle.locked_until.is_(None)) | (LoginThrottle.locked_until <= now))
+        .values(tokens=refilled - 1, refilled_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.execute(statement).rowcount:
+        return True
+
+    # First attempt for this key: start with a full bucket, less this attempt
+    created = db.session.execute(
+        insert_or_ignore(db.session, LoginThrottle, ['key']).values(
+            key=key, tokens=capacity - 1, refilled_at=now, failures=0
+        ).returning(LoginThrottle.id)
+    ).first()
+    if created is None:
+        return bool(db.session.execute(statement).rowcount)
+
+    # New keys are what grow the table, so drop idle ones here rather than on a schedule
+    db.session.execute(
+        delete(LoginThrottle)
+        .where(LoginThrottle.refilled_at < now - current_app.config['LOGIN_THROTTLE_RETENTION_SECONDS'])
+        .where((LoginThrottle.locked_until.is_(None)) | (LoginThrottle.locked_until < now))
+        .execution_options(synchronize_session=False)
+    )
+    return True
+
+
+def _throttled(scope, key, capacity, rate, now):
+    """Build the exception for a refused attempt, with how long until the next one is allowed."""
+    throttle = db.session.execute(db.select(LoginThrottle).filter_by(key=key)).scalar_one()
+    LOGIN_THROTTLED.labels(scope).inc()
+    if throttle.locked_until and throttle.locked_until > now:
+        return LoginThrottled('locked', throttle.locked_until - now)
+    tokens = min(capacity, throttle.tokens + (now - throttle.refilled_at) * rate)
+    return LoginThrottled(scope, (1 - tokens) / rate)
+
+
+def _describe(seconds):
+    if seconds < 60:
+        return f"{seconds} second{'s' if seconds != 1 else ''}"
+    minutes = math.ceil(seconds / 60)
+    return f"{minutes} minute{'s' if minutes != 1 else ''}"
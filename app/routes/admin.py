@@ -1,9 +1,12 @@
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, abort, current_app, render_template, request, redirect, send_file, url_for, flash, session
 from flask_login import login_required, current_user
+from markupsafe import Markup
 from functools import wraps
+from sqlalchemy.orm import joinedload
 
 from app import db
+from app.fragments import cached_fragment, fragment_key, fragment_response, wants_fragment
 from app.models.user import User
 from app.models.chore import ChoreDefinition
 from app.models.week import WeekPeriod, WeeklyChoreAssignment, WeeklyPayment
@@ -11,6 +14,10 @@ from app.models.chore_log import ChoreLog
 from app.services.allowance_service import AllowanceService
 from app.services.email_service import EmailService
 from app.services.settings_service import SettingsService
+from app.profiling import (
+    PROFILE_HEADER, get_sample_rate, list_profiles, profile_path, set_sample_rate, summarize_profile
+)
+from app.slow_queries import read_slow_queries, worst_offenders
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -35,9 +42,8 @@ def index():
 
     # Get weekly summaries for all children
     allowance_service = AllowanceService()
-    summaries = {}
-    for child in children:
-        summaries[child.id] = allowance_service.calculate_weekly_summary(child.id, week.id)
+    batch = allowance_service.calculate_weekly_summaries([child.id for child in children], [week.id])
+    summaries = {child.id: batch.get((child.id, week.id)) for child in children}
 
     return render_template(
         'admin/index.html',
@@ -60,25 +66,54 @@ def view_child_dashboard(child_id, week_id=None):
         return redirect(url_for('admin.index'))
 
     # Get specified week or current week
+    current_week = WeekPeriod.get_or_create_current_week()
     if week_id:
         week = WeekPeriod.query.get_or_404(week_id)
     else:
-        week = WeekPeriod.get_or_create_current_week()
+        week = current_week
+    is_current_week = week.id == current_week.id
 
-    days = week.get_days()
     today = datetime.now().date()
+    allowance_service = AllowanceService()
+    previous_week_id, next_week_id = allowance_service.get_adjacent_weeks(week)
+
+    key = fragment_key(
+        'admin', child.id, week.id, today, is_current_week, previous_week_id, next_week_id,
+        allowance_service.get_week_version(child.id, week.id)
+    )
+
+    def render():
+        return _render_child_week(
+            allowance_service, child, week, today, is_current_week, previous_week_id, next_week_id
+        ), True
+
+    if wants_fragment():
+        return fragment_response(key, render)
+    response = current_app.make_response(render_template(
+        'admin/child_dashboard.html', child=child, week_html=Markup(cached_fragment(key, render))
+    ))
+    response.vary.add('HX-Request')
+    return response
+
+
+def _render_child_week(allowance_service, child, week, today, is_current_week, previous_week_id, next_week_id):
+    """Render the body of a child's week as seen by a parent."""
+    days = week.get_days()
 
     # Check if this week is paid (locked)
     payment = WeeklyPayment.query.filter_by(week_id=week.id, user_id=child.id, is_paid=True).first()
     is_locked = payment is not None
 
     # Get assigned chores for child
-    assignments = WeeklyChoreAssignment.query.filter_by(
+    assignments = WeeklyChoreAssignment.query.options(
+        joinedload(WeeklyChoreAssignment.chore_definition)
+    ).filter_by(
         week_id=week.id,
         user_id=child.id
     ).all()
 
     # Build completion status matrix
+    completed = ChoreLog.completed_slots(child.id, days[0], days[-1])
     completion_status = {}
     for assignment in assignments:
         chore = assignment.chore_definition
@@ -87,21 +122,20 @@ def view_child_dashboard(child_id, week_id=None):
         for day in days:
             if chore.frequency == 'twice_daily':
                 completion_status[assignment.id][day] = {
-                    'morning': ChoreLog.is_completed(child.id, chore.id, day, slot=1),
-                    'evening': ChoreLog.is_completed(child.id, chore.id, day, slot=2)
+                    'morning': (chore.id, day, 1) in completed,
+                    'evening': (chore.id, day, 2) in completed
                 }
             else:
                 completion_status[assignment.id][day] = {
-                    'done': ChoreLog.is_completed(child.id, chore.id, day, slot=1)
+                    'done': (chore.id, day, 1) in completed
                 }
 
     # Calculate weekly totals
-    allowance_service = AllowanceService()
     weekly_summary = allowance_service.calculate_weekly_summary(child.id, week.id)
     last_week_summary = allowance_service.get_last_week_summary(child.id)
 
     return render_template(
-        'admin/child_dashboard.html',
+        'admin/partials/child_week.html',
         child=child,
         week=week,
         days=days,
@@ -111,7 +145,10 @@ def view_child_dashboard(child_id, week_id=None):
         last_week_summary=last_week_summary,
         today=today,
         is_locked=is_locked,
-        payment=payment
+        payment=payment,
+        is_current_week=is_current_week,
+        previous_week_id=previous_week_id,
+        next_week_id=next_week_id
     )
 
 
@@ -389,10 +426,72 @@ def mark_paid(week_id, child_id):
 @login_required
 @admin_required
 def payments():
-    payments = WeeklyPayment.query.order_by(WeeklyPayment.created_at.desc()).all()
+    payments = WeeklyPayment.query.options(
+        joinedload(WeeklyPayment.user), joinedload(WeeklyPayment.week_period)
+    ).order_by(WeeklyPayment.created_at.desc()).all()
     return render_template('admin/payments.html', payments=payments)
 
 
+@admin_bp.route('/slow-queries')
+@login_required
+@admin_required
+def slow_queries():
+    """List the slowest SQL statements from the slow-query log."""
+    offenders = worst_offenders(read_slow_queries(current_app.config.get('SLOW_QUERY_LOG_FILE')))
+    return render_template(
+        'admin/slow_queries.html',
+        offenders=offenders,
+        threshold=current_app.config.get('SLOW_QUERY_THRESHOLD_MS')
+    )
+
+
+@admin_bp.route('/profiling', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def profiling():
+    """Turn request sampling on or off and list saved profiles."""
+    if request.method == 'POST':
+        rate = request.form.get('sample_rate', type=int)
+        if rate is None or rate < 0:
+            flash('Sample rate must be 0 or a positive whole number.', 'error')
+        else:
+            set_sample_rate(rate)
+            if rate:
+                flash(f'Profiling one request in {rate}.', 'success')
+            else:
+                flash('Request sampling turned off.', 'success')
+        return redirect(url_for('admin.profiling'))
+
+    return render_template(
+        'admin/profiling.html',
+        sample_rate=get_sample_rate(),
+        profiles=list_profiles(),
+        header=PROFILE_HEADER
+    )
+
+
+@admin_bp.route('/profiling/<name>')
+@login_required
+@admin_required
+def profile_summary(name):
+    """Show the top functions of a saved profile."""
+    path = profile_path(name)
+    if path is None:
+        abort(404)
+    return render_template('admin/profile_summary.html', name=name, summary=summarize_profile(path))
+
+
+@admin_bp.route('/profiling/<name>/download')
+@login_required
+@admin_required
+def download_profile(name):
+    """Download a saved profile as a .prof file."""
+    path = profile_path(name)
+    if path is None:
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=name, mimetype='application/octet-stream')
+
+
 @admin_bp.route('/test-email', methods=['POST'])
 @login_required
 @admin_required
@@ -443,16 +542,29 @@ def toggle_child_chore(child_id):
     chore = assignment.chore_definition
 
     # Toggle completion
-    ChoreLog.toggle_completion(
+    is_completed, log = ChoreLog.toggle_completion(
         user_id=child_id,
         chore_id=chore.id,
         week_id=assignment.week_id,
         date=date,
         slot=slot,
-        amount=assignment.display_amount
+        amount=assignment.display_amount,
+        assignment_id=assignment.id
     )
 
-    return '', 200
+    # Calculate updated weekly total
+    allowance_service = AllowanceService()
+    weekly_summary = allowance_service.calculate_weekly_summary(child_id, assignment.week_id)
+
+    return render_template(
+        'admin/partials/chore_toggled.html',
+        assignment=assignment,
+        date=date,
+        slot=slot,
+        is_done=is_completed,
+        is_locked=False,
+        weekly_summary=weekly_summary
+    )
 
 
 @admin_bp.route('/email-settings', methods=['GET', 'POST'])
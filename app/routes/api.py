@@ -1,9 +1,13 @@
 from datetime import datetime
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload
 
 from app import db
 from app.models.user import User
+from app.rate_limit import (
+    LoginThrottled, account_key, check_login_allowed, parse_user_id, record_login_failure, record_login_success
+)
 from app.models.chore import ChoreDefinition
 from app.models.week import WeekPeriod, WeeklyChoreAssignment
 from app.models.chore_log import ChoreLog
@@ -12,6 +16,12 @@ from app.services.allowance_service import AllowanceService
 api_bp = Blueprint('api', __name__)
 
 
+@api_bp.errorhandler(LoginThrottled)
+def login_throttled(e):
+    """Refuse a rate-limited or locked-out login."""
+    return jsonify({'error': e.message, 'retry_after': e.retry_after}), 429, {'Retry-After': str(e.retry_after)}
+
+
 @api_bp.route('/auth/login', methods=['POST'])
 def login():
     """JWT authentication endpoint."""
@@ -23,14 +33,17 @@ def login():
     auth_type = data.get('type', 'pin')
 
     if auth_type == 'pin':
-        user_id = data.get('user_id')
+        user_id = parse_user_id(data.get('user_id'))
         pin = data.get('pin')
 
         if not user_id or not pin:
             return jsonify({'error': 'Missing user_id or pin'}), 400
 
+        key = account_key(user_id=user_id)
+        check_login_allowed(key)
         user = User.query.get(user_id)
         if not user or not user.check_pin(pin):
+            record_login_failure(key)
             return jsonify({'error': 'Invalid credentials'}), 401
 
     else:
@@ -40,10 +53,14 @@ def login():
         if not email or not password:
             return jsonify({'error': 'Missing email or password'}), 400
 
+        key = account_key(email=email)
+        check_login_allowed(key)
         user = User.query.filter_by(email=email).first()
         if not user or not user.check_password(password):
+            record_login_failure(key)
             return jsonify({'error': 'Invalid credentials'}), 401
 
+    record_login_success(key)
     access_token = create_access_token(identity=str(user.id))
     return jsonify({
         'access_token': access_token,
@@ -68,20 +85,23 @@ def current_week():
     week = WeekPeriod.get_or_create_current_week()
 
     # Get assignments
-    assignments = WeeklyChoreAssignment.query.filter_by(
+    assignments = WeeklyChoreAssignment.query.options(
+        joinedload(WeeklyChoreAssignment.chore_definition)
+    ).filter_by(
         week_id=week.id,
         user_id=user_id
     ).all()
 
+    # Get the week's completions in one query, by chore
+    completions_by_chore = {}
+    for log in ChoreLog.query.filter_by(user_id=user_id, week_id=week.id).order_by(ChoreLog.id):
+        completions_by_chore.setdefault(log.chore_id, []).append(log)
+
     # Build response
     chores_data = []
     for assignment in assignments:
         chore = assignment.chore_definition
-        completions = ChoreLog.query.filter_by(
-            user_id=user_id,
-            chore_id=chore.id,
-            week_id=week.id
-        ).all()
+        completions = completions_by_chore.get(chore.id, [])
 
         chores_data.append({
             'assignment_id': assignment.id,
@@ -156,7 +176,8 @@ def complete_chore(chore_id):
         week_id=week.id,
         date=date,
         slot=slot,
-        amount=assignment.display_amount
+        amount=assignment.display_amount,
+        assignment_id=assignment.id
     )
 
     # Get updated summary
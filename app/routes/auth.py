@@ -1,13 +1,53 @@
 from datetime import timedelta
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, current_app
 from flask_login import login_user, logout_user, login_required, current_user
+from markupsafe import Markup
+from sqlalchemy import func
 
 from app import db
+from app.assets import service_worker_context
+from app.hashing import BUSY_MESSAGE, HashingBusy
 from app.models.user import User
+from app.rate_limit import (
+    LoginThrottled, account_key, check_login_allowed, parse_user_id, record_login_failure, record_login_success
+)
 
 auth_bp = Blueprint('auth', __name__)
 
 
+@auth_bp.errorhandler(HashingBusy)
+def hashing_busy(e):
+    """Turn a login away quickly when the hashing pool is full, rather than queueing it."""
+    flash(BUSY_MESSAGE, 'error')
+    return render_template('auth/login.html', roster=_roster()), 503, {'Retry-After': '1'}
+
+
+@auth_bp.errorhandler(LoginThrottled)
+def login_throttled(e):
+    """Refuse a rate-limited or locked-out login before any hashing is done."""
+    flash(e.message, 'error')
+    return render_template('auth/login.html', roster=_roster()), 429, {'Retry-After': str(e.retry_after)}
+
+
+def _roster():
+    """
+    Get the rendered child picker for the login page.
+
+    The fragment is cached per process and re-rendered only when the number
+    of children or their latest ``updated_at`` changes, so a page view costs
+    one aggregate query instead of loading every child.
+    """
+    version = tuple(db.session.execute(
+        db.select(func.count(User.id), func.max(User.updated_at)).where(User.is_admin.is_(False))
+    ).one())
+    cached = current_app.extensions.get('login_roster')
+    if cached is None or cached[0] != version:
+        children = User.query.filter_by(is_admin=False, is_active=True).order_by(User.id).all()
+        cached = (version, Markup(render_template('auth/partials/roster.html', children=children)))
+        current_app.extensions['login_roster'] = cached
+    return cached[1]
+
+
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     # Check if user is authenticated, but also check session is valid
@@ -19,20 +59,24 @@ def login():
 
         if login_type == 'child':
             # PIN-based authentication
-            user_id = request.form.get('user_id')
+            user_id = parse_user_id(request.form.get('user_id'))
             pin = request.form.get('pin')
 
             if not user_id or not pin:
                 flash('Please select a user and enter your PIN.', 'error')
                 return redirect(url_for('auth.login'))
 
+            key = account_key(user_id=user_id)
+            check_login_allowed(key)
             user = User.query.get(user_id)
             if user and user.is_child and user.is_active and user.check_pin(pin):
+                record_login_success(key)
                 login_user(user, remember=True)
                 session.permanent = True
                 session['session_type'] = 'child'
                 return redirect(url_for('dashboard.index'))
             else:
+                record_login_failure(key)
                 flash('Invalid PIN. Please try again.', 'error')
                 return redirect(url_for('auth.login'))
         else:
@@ -44,19 +88,21 @@ def login():
                 flash('Please enter your email and password.', 'error')
                 return redirect(url_for('auth.login'))
 
+            key = account_key(email=email)
+            check_login_allowed(key)
             user = User.query.filter_by(email=email).first()
             if user and user.is_admin and user.is_active and user.check_password(password):
+                record_login_success(key)
                 login_user(user, remember=True)
                 session.permanent = True
                 session['session_type'] = 'adult'
                 return redirect(url_for('admin.index'))
             else:
+                record_login_failure(key)
                 flash('Invalid email or password.', 'error')
                 return redirect(url_for('auth.login'))
 
-    # Get active children for PIN login
-    children = User.query.filter_by(is_admin=False, is_active=True).all()
-    return render_template('auth/login.html', children=children)
+    return render_template('auth/login.html', roster=_roster())
 
 
 @auth_bp.route('/logout', methods=['GET', 'POST'])
@@ -101,3 +147,22 @@ def pin_pad():
 def offline():
     """Offline page for PWA."""
     return render_template('offline.html')
+
+
+@auth_bp.route('/sw.js')
+def service_worker():
+    """Service worker for PWA, generated from the static asset manifest so each build gets its own cache."""
+    context = service_worker_context(current_app)
+    offline_url = url_for('auth.offline')
+    response = current_app.make_response(render_template(
+        'sw.js',
+        cache_name=context['cache_name'],
+        offline_url=offline_url,
+        precache=[offline_url, *context['precache']],
+        immutable_prefixes=context['immutable_prefixes'],
+    ))
+    response.mimetype = 'text/javascript'
+    # Served from the root so it controls every page; browsers must always revalidate it
+    response.cache_control.no_cache = True
+    response.add_etag()
+    return response.make_conditional(request)
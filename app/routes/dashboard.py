@@ -1,16 +1,26 @@
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from flask import Blueprint, render_template, request, jsonify, session
+from flask import Blueprint, render_template, request, jsonify, session, current_app
 from flask_login import login_required, current_user
+from markupsafe import Markup
+from sqlalchemy.orm import joinedload
 
 from app import db
+from app.fragments import cached_fragment, fragment_key, fragment_response, wants_fragment
 from app.models.user import User
 from app.models.chore import ChoreDefinition
 from app.models.week import WeekPeriod, WeeklyChoreAssignment, WeeklyPayment
 from app.models.chore_log import ChoreLog
 from app.services.allowance_service import AllowanceService
+from app.services.toggle_sync_service import ToggleSyncService
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# Histories kept per worker, keyed by (user id, history version)
+HISTORY_CACHE_SIZE = 256
+_history_lock = threading.Lock()
+
 
 @dashboard_bp.route('/')
 @dashboard_bp.route('/dashboard')
@@ -32,9 +42,35 @@ def week_view(week_id):
 
 
 def _render_week_dashboard(week, is_current_week=False):
-    """Helper function to render dashboard for a specific week."""
-    days = week.get_days()
+    """Helper function to render dashboard for a specific week, or just its fragment for HTMX."""
     today = datetime.now().date()
+    allowance_service = AllowanceService()
+
+    # Get adjacent weeks for navigation
+    previous_week_id, next_week_id = allowance_service.get_adjacent_weeks(week)
+
+    key = fragment_key(
+        'dashboard', current_user.id, week.id, today, is_current_week, previous_week_id, next_week_id,
+        allowance_service.get_week_version(current_user.id, week.id)
+    )
+
+    def render():
+        return _render_week_fragment(
+            allowance_service, week, today, is_current_week, previous_week_id, next_week_id
+        )
+
+    if wants_fragment():
+        return fragment_response(key, render)
+    response = current_app.make_response(render_template(
+        'dashboard/index.html', week_html=Markup(cached_fragment(key, render))
+    ))
+    response.vary.add('HX-Request')
+    return response
+
+
+def _render_week_fragment(allowance_service, week, today, is_current_week, previous_week_id, next_week_id):
+    """Render the week's body. Returns (html, cacheable)."""
+    days = week.get_days()
 
     # Check if this week is paid (locked)
     payment = WeeklyPayment.query.filter_by(
@@ -45,12 +81,11 @@ def _render_week_dashboard(week, is_current_week=False):
     is_locked = payment is not None
 
     # Get assigned chores for current user
-    assignments = WeeklyChoreAssignment.query.filter_by(
-        week_id=week.id,
-        user_id=current_user.id
-    ).all()
+    assignments = _week_assignments(week)
 
-    # If no assignments and is current week, create default ones from preset chores
+    # If no assignments and is current week, create default ones from preset chores.
+    # The cache key was made before these existed, so don't cache this render.
+    cacheable = True
     if not assignments and is_current_week:
         preset_chores = ChoreDefinition.query.filter_by(is_preset=True, is_active=True).all()
         for chore in preset_chores:
@@ -62,13 +97,48 @@ def _render_week_dashboard(week, is_current_week=False):
                     user_id=current_user.id
                 )
                 db.session.add(assignment)
+                cacheable = False
         db.session.commit()
-        assignments = WeeklyChoreAssignment.query.filter_by(
-            week_id=week.id,
-            user_id=current_user.id
-        ).all()
+        assignments = _week_assignments(week)
 
     # Build completion status matrix
+    completion_status = _completion_status(assignments, days)
+
+    # Calculate weekly totals
+    weekly_summary = allowance_service.calculate_weekly_summary(current_user.id, week.id)
+    last_week_summary = allowance_service.get_last_week_summary(current_user.id)
+
+    html = render_template(
+        'dashboard/partials/week.html',
+        week=week,
+        days=days,
+        assignments=assignments,
+        completion_status=completion_status,
+        weekly_summary=weekly_summary,
+        last_week_summary=last_week_summary,
+        today=today,
+        is_locked=is_locked,
+        payment=payment,
+        is_current_week=is_current_week,
+        previous_week_id=previous_week_id,
+        next_week_id=next_week_id
+    )
+    return html, cacheable
+
+
+def _week_assignments(week):
+    """Get the current user's assignments for a week, with their chores."""
+    return WeeklyChoreAssignment.query.options(
+        joinedload(WeeklyChoreAssignment.chore_definition)
+    ).filter_by(
+        week_id=week.id,
+        user_id=current_user.id
+    ).all()
+
+
+def _completion_status(assignments, days):
+    """Build the {assignment id: {day: {slot: done}}} matrix the chore rows are drawn from."""
+    completed = ChoreLog.completed_slots(current_user.id, days[0], days[-1])
     completion_status = {}
     for assignment in assignments:
         chore = assignment.chore_definition
@@ -78,45 +148,71 @@ def _render_week_dashboard(week, is_current_week=False):
             if chore.frequency == 'twice_daily':
                 # Track morning and evening separately
                 completion_status[assignment.id][day] = {
-                    'morning': ChoreLog.is_completed(current_user.id, chore.id, day, slot=1),
-                    'evening': ChoreLog.is_completed(current_user.id, chore.id, day, slot=2)
+                    'morning': (chore.id, day, 1) in completed,
+                    'evening': (chore.id, day, 2) in completed
                 }
             else:
                 completion_status[assignment.id][day] = {
-                    'done': ChoreLog.is_completed(current_user.id, chore.id, day, slot=1)
+                    'done': (chore.id, day, 1) in completed
                 }
+    return completion_status
 
-    # Calculate weekly totals
-    allowance_service = AllowanceService()
-    weekly_summary = allowance_service.calculate_weekly_summary(current_user.id, week.id)
-    last_week_summary = allowance_service.get_last_week_summary(current_user.id)
-
-    # Get adjacent weeks for navigation
-    previous_week, next_week = allowance_service.get_adjacent_weeks(week.id)
-
-    # Get 12-week history for chart (only on current week to save queries)
-    history_data = []
-    if is_current_week:
-        history_data = allowance_service.get_12_week_history(current_user.id)
 
+@dashboard_bp.route('/week/<int:week_id>/rows')
+@login_required
+def week_rows(week_id):
+    """HTMX endpoint for a week's chore rows and totals, to show toggles replayed from the offline queue."""
+    week = WeekPeriod.query.get_or_404(week_id)
+    days = week.get_days()
+    assignments = _week_assignments(week)
+    weekly_summary = AllowanceService().calculate_weekly_summary(current_user.id, week.id)
     return render_template(
-        'dashboard/index.html',
+        'dashboard/partials/week_rows.html',
         week=week,
         days=days,
         assignments=assignments,
-        completion_status=completion_status,
+        completion_status=_completion_status(assignments, days),
         weekly_summary=weekly_summary,
-        last_week_summary=last_week_summary,
-        today=today,
-        is_locked=is_locked,
-        payment=payment,
-        is_current_week=is_current_week,
-        previous_week=previous_week,
-        next_week=next_week,
-        history_data=history_data
+        today=datetime.now().date(),
+        is_locked=weekly_summary['is_paid']
     )
 
 
+@dashboard_bp.route('/history-chart')
+@login_required
+def history_chart():
+    """HTMX endpoint for the 12-week history chart, loaded after the dashboard's first paint."""
+    allowance_service = AllowanceService()
+    etag = f'{current_user.id}-{allowance_service.get_history_version(current_user.id)}'
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        history_data = _cached_history(allowance_service, current_user.id, etag)
+        response = current_app.make_response(
+            render_template('dashboard/partials/history_chart.html', history_data=history_data)
+        )
+    # The browser keeps it, but checks the version each time
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def _cached_history(allowance_service, user_id, key):
+    """Get a child's 12-week history, only recomputing it when its version changes."""
+    cache = current_app.extensions.setdefault('history_cache', OrderedDict())
+    with _history_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    history = allowance_service.get_12_week_history(user_id)
+    with _history_lock:
+        cache[key] = history
+        while len(cache) > HISTORY_CACHE_SIZE:
+            cache.popitem(last=False)
+    return history
+
+
 @dashboard_bp.route('/chores/toggle', methods=['POST'])
 @login_required
 def toggle_chore():
@@ -157,7 +253,8 @@ def toggle_chore():
         week_id=assignment.week_id,
         date=date,
         slot=slot,
-        amount=assignment.display_amount
+        amount=assignment.display_amount,
+        assignment_id=assignment.id
     )
 
     # Get updated counts for twice_daily chores
@@ -182,6 +279,21 @@ def toggle_chore():
     )
 
 
+@dashboard_bp.route('/chores/sync', methods=['POST'])
+@login_required
+def sync_chores():
+    """Replay chore toggles the PWA queued while offline (see static/js/offline.js)."""
+    data = request.get_json(silent=True) or {}
+    changes = data.get('changes')
+    if not isinstance(changes, list):
+        return jsonify({'error': 'Expected a list of changes'}), 400
+    if len(changes) > ToggleSyncService.MAX_CHANGES:
+        return jsonify({'error': f'At most {ToggleSyncService.MAX_CHANGES} changes per request'}), 413
+
+    results = ToggleSyncService(current_user.id).apply(changes)
+    return jsonify({'results': results})
+
+
 @dashboard_bp.route('/weekly-summary')
 @login_required
 def weekly_summary():
@@ -227,13 +339,21 @@ def add_adhoc_chore():
     db.session.add(assignment)
     db.session.commit()
 
-    # Return success message that will trigger a page reload
-    return '''
-    <div class="text-green-600 text-sm" id="adhoc-success">
-        Added! Refreshing...
-        <script>setTimeout(() => window.location.reload(), 500);</script>
-    </div>
-    '''
+    # Add the row in place if the page is showing this week; otherwise it's only confirmed
+    allowance_service = AllowanceService()
+    weekly_summary = allowance_service.calculate_weekly_summary(current_user.id, week.id)
+    days = week.get_days()
+    return render_template(
+        'dashboard/partials/adhoc_added.html',
+        is_shown=request.form.get('week_id', type=int) == week.id,
+        week=week,
+        days=days,
+        assignment=assignment,
+        completion_status={assignment.id: {day: {'done': False} for day in days}},
+        weekly_summary=weekly_summary,
+        today=datetime.now().date(),
+        is_locked=weekly_summary['is_paid']
+    )
 
 
 @dashboard_bp.route('/chores/delete/<int:assignment_id>', methods=['DELETE'])
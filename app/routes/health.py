@@ -0,0 +1,51 @@
+import hmac
+
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import text
+
+from app import db
+from app.metrics import metrics_response
+
+health_bp = Blueprint('health', __name__)
+
+
+@health_bp.route('/healthz')
+def healthz():
+    """Liveness probe - the process is up and serving requests. No I/O."""
+    return jsonify({'status': 'ok'})
+
+
+@health_bp.route('/readyz')
+def readyz():
+    """
+    Readiness probe - the database answers a trivial query.
+
+    Uses the engine directly so no ORM session, user lookup or template is
+    involved. Returns 503 if the database is unreachable.
+    """
+    from app.services.scheduler_service import scheduler
+
+    checks = {'scheduler': 'running' if scheduler.running else 'stopped'}
+    try:
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+        checks['database'] = 'ok'
+    except Exception as e:
+        current_app.logger.warning(f"Readiness check failed: {e}")
+        checks['database'] = 'unavailable'
+        return jsonify({'status': 'unavailable', 'checks': checks}), 503
+
+    return jsonify({'status': 'ok', 'checks': checks})
+
+
+@health_bp.route('/metrics')
+def metrics():
+    """Prometheus metrics, merged across gunicorn workers. Needs METRICS_TOKEN as a bearer token, if set."""
+    if not current_app.config.get('METRICS_ENABLED', True):
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8')):
+            return jsonify({'error': 'Unauthorized'}), 401, {'WWW-Authenticate': 'Bearer'}
+    return metrics_response()
@@ -1,11 +1,14 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, current_app, send_file
 from flask_login import login_required, current_user
+from sqlalchemy import func
 
 from app import db
+from app.models.user import User
+from app.services.avatar_service import AvatarService
 
 settings_bp = Blueprint('settings', __name__)
 
-# Available DiceBear avatar styles
+# Available avatar styles (named after the DiceBear styles they replace)
 AVATAR_STYLES = [
     {'id': 'bottts', 'name': 'Robots', 'description': 'Friendly robot avatars'},
     {'id': 'avataaars', 'name': 'Avataaars', 'description': 'Cartoon-style human avatars'},
@@ -46,5 +49,44 @@ def avatar():
         'settings/avatar.html',
         avatar_styles=AVATAR_STYLES,
         current_style=current_user.avatar_style or 'bottts',
-        current_seed=current_user.avatar_seed or current_user.name
+        current_seed=current_user.avatar_seed or current_user.name,
+        avatar_url=AvatarService.url
     )
+
+
+@settings_bp.route('/avatars/<style>.<any(svg, png):fmt>')
+def avatar_image(style, fmt):
+    """
+    Locally drawn avatar.
+
+    Public, as the login page shows every child's avatar, but only signed-in
+    users can draw any seed (for the avatar picker). Anyone else gets a
+    placeholder unless the avatar belongs to an active user, so they can't
+    fill the cache with arbitrary seeds.
+    """
+    seed = request.args.get('seed', '')[:100]
+    size = AvatarService.snap_size(request.args.get('size', type=int))
+    if style not in AvatarService.styles():
+        abort(404)
+    if not current_user.is_authenticated and not _is_user_avatar(style, seed):
+        style, seed = 'bottts', ''
+    path = AvatarService().get_path(style, seed, size, fmt)
+    return send_file(
+        path,
+        mimetype='image/svg+xml' if fmt == 'svg' else 'image/png',
+        etag=AvatarService.etag(style, seed, size, fmt),
+        max_age=current_app.config.get('AVATAR_MAX_AGE', 365 * 24 * 60 * 60),
+        conditional=True,
+    )
+
+
+def _is_user_avatar(style, seed):
+    """Whether an active user's avatar is drawn with this style and seed."""
+    style_matches = User.avatar_style == style
+    if style == 'bottts':
+        style_matches = style_matches | User.avatar_style.is_(None)
+    # Matches User.avatar_url, which falls back to the name for a missing or blank seed
+    seed_matches = func.coalesce(func.nullif(User.avatar_seed, ''), User.name) == seed
+    return db.session.query(
+        User.query.filter(User.is_active.is_(True), style_matches, seed_matches).exists()
+    ).scalar()
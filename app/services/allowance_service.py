@@ -1,14 +1,28 @@
-from datetime import timedelta
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
 
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+
+from app import db
 from app.models.user import User
 from app.models.chore import ChoreDefinition
 from app.models.week import WeekPeriod, WeeklyChoreAssignment, WeeklyPayment
 from app.models.chore_log import ChoreLog
 
+# Guards each worker's week calendar while it's reloaded
+_calendar_lock = threading.Lock()
+
 
 class AllowanceService:
     """Service for calculating allowances and weekly summaries."""
 
+    # Least number of seconds between week calendar reloads
+    CALENDAR_REFRESH = 60
+
     def calculate_weekly_summary(self, user_id, week_id):
         """
         Calculate the weekly summary for a user.
@@ -24,20 +38,65 @@ class AllowanceService:
                 'chore_details': list
             }
         """
-        user = User.query.get(user_id)
-        if not user:
-            return None
+        return self.calculate_weekly_summaries([user_id], [week_id]).get((user_id, week_id))
 
-        week = WeekPeriod.query.get(week_id)
-        if not week:
-            return None
+    def calculate_weekly_summaries(self, user_ids, week_ids):
+        """
+        Calculate the weekly summaries for several users and weeks at once.
 
-        # Get all assignments for this user in this week
-        assignments = WeeklyChoreAssignment.query.filter_by(
-            week_id=week_id,
-            user_id=user_id
-        ).all()
+        Takes the same five queries however many users and weeks there are,
+        so pages showing every child or every week don't query per summary.
 
+        Returns:
+            dict: {(user_id, week_id): summary} as from calculate_weekly_summary,
+                leaving out users and weeks that don't exist
+        """
+        user_ids, week_ids = list(set(user_ids)), list(set(week_ids))
+        users = User.query.filter(User.id.in_(user_ids)).all()
+        weeks = WeekPeriod.query.filter(WeekPeriod.id.in_(week_ids)).all()
+
+        assignments = {}
+        for assignment in WeeklyChoreAssignment.query.options(
+            joinedload(WeeklyChoreAssignment.chore_definition)
+        ).filter(
+            WeeklyChoreAssignment.user_id.in_(user_ids),
+            WeeklyChoreAssignment.week_id.in_(week_ids)
+        ).order_by(WeeklyChoreAssignment.id):
+            assignments.setdefault((assignment.user_id, assignment.week_id), []).append(assignment)
+
+        # Completion count and amount earned for each chore, by user and week
+        completions = {}
+        for row in db.session.execute(
+            select(
+                ChoreLog.user_id, ChoreLog.week_id, ChoreLog.chore_id,
+                func.count(ChoreLog.id), func.sum(ChoreLog.amount_earned)
+            ).where(
+                ChoreLog.user_id.in_(user_ids),
+                ChoreLog.week_id.in_(week_ids)
+            ).group_by(ChoreLog.user_id, ChoreLog.week_id, ChoreLog.chore_id)
+        ):
+            user_id, week_id, chore_id, count, earned = row
+            completions.setdefault((user_id, week_id), {})[chore_id] = (count, earned)
+
+        payments = {}
+        for payment in WeeklyPayment.query.filter(
+            WeeklyPayment.user_id.in_(user_ids),
+            WeeklyPayment.week_id.in_(week_ids)
+        ).order_by(WeeklyPayment.id):
+            payments.setdefault((payment.user_id, payment.week_id), payment)
+
+        summaries = {}
+        for user in users:
+            for week in weeks:
+                key = (user.id, week.id)
+                summaries[key] = self._summarize(
+                    user, assignments.get(key, []), completions.get(key, {}), payments.get(key)
+                )
+        return summaries
+
+    @staticmethod
+    def _summarize(user, assignments, completions, payment):
+        """Build one weekly summary from its assignments, {chore_id: (count, earned)} and payment."""
         chores_earned = 0.0
         chores_completed = 0
         chores_target = 0
@@ -47,15 +106,8 @@ class AllowanceService:
             chore = assignment.chore_definition
 
             # Get completion count for this chore
-            completions = ChoreLog.query.filter_by(
-                user_id=user_id,
-                chore_id=chore.id,
-                week_id=week_id
-            ).all()
-
-            completion_count = len(completions)
+            completion_count, amount_earned = completions.get(chore.id, (0, 0.0))
             target = chore.weekly_target
-            amount_earned = sum(c.amount_earned for c in completions)
 
             chores_earned += amount_earned
             chores_completed += completion_count
@@ -73,12 +125,6 @@ class AllowanceService:
                 'percentage': round((completion_count / target * 100) if target > 0 else 0, 1)
             })
 
-        # Check payment status
-        payment = WeeklyPayment.query.filter_by(
-            week_id=week_id,
-            user_id=user_id
-        ).first()
-
         base_allowance = user.base_allowance
         total = base_allowance + chores_earned
 
@@ -179,47 +225,70 @@ class AllowanceService:
         Returns:
             dict or None: Last week's summary with chores_completed and total
         """
-        current_week = WeekPeriod.get_or_create_current_week()
-        last_week_start = current_week.start_date - timedelta(days=7)
-
-        last_week = WeekPeriod.query.filter_by(start_date=last_week_start).first()
-        if not last_week:
+        last_week_start = self._current_week_start() - timedelta(days=7)
+        last_week_id = self.get_week_id(last_week_start)
+        if not last_week_id:
             return None
 
-        summary = self.calculate_weekly_summary(user_id, last_week.id)
+        summary = self.calculate_weekly_summary(user_id, last_week_id)
         if not summary:
             return None
 
         return {
             'chores_completed': summary['chores_completed'],
             'total': summary['total'],
-            'week_start': last_week.start_date,
-            'week_end': last_week.end_date
+            'week_start': last_week_start,
+            'week_end': last_week_start + timedelta(days=6)
         }
 
-    def get_adjacent_weeks(self, week_id):
+    def get_adjacent_weeks(self, week):
         """
-        Get the previous and next week periods for navigation.
+        Get the previous and next weeks for navigation, from the week calendar.
 
         Args:
-            week_id: Current week ID
+            week: The WeekPeriod being shown
 
         Returns:
-            tuple: (previous_week, next_week) - either can be None
+            tuple: (previous_week_id, next_week_id) - either can be None
         """
-        current_week = WeekPeriod.query.get(week_id)
-        if not current_week:
-            return (None, None)
+        self.remember_week(week)
+        return (
+            self.get_week_id(week.start_date - timedelta(days=7)),
+            self.get_week_id(week.start_date + timedelta(days=7))
+        )
 
-        # Get previous week
-        prev_week_start = current_week.start_date - timedelta(days=7)
-        previous_week = WeekPeriod.query.filter_by(start_date=prev_week_start).first()
+    def get_week_id(self, start_date):
+        """
+        Look up the week starting on a date in this worker's week calendar.
 
-        # Get next week
-        next_week_start = current_week.start_date + timedelta(days=7)
-        next_week = WeekPeriod.query.filter_by(start_date=next_week_start).first()
+        Weeks are only ever added, so each worker keeps a map of start dates
+        to week ids rather than querying for them. A date that isn't in the
+        map reloads it - at most once every CALENDAR_REFRESH seconds, so a
+        week that doesn't exist yet doesn't cost a query on every page.
 
-        return (previous_week, next_week)
+        Returns:
+            int or None: the week's id, if it exists
+        """
+        calendar = current_app.extensions.setdefault('week_calendar', {'weeks': {}, 'loaded_at': None})
+        week_id = calendar['weeks'].get(start_date)
+        if week_id is None:
+            now = time.monotonic()
+            with _calendar_lock:
+                if calendar['loaded_at'] is None or now - calendar['loaded_at'] >= self.CALENDAR_REFRESH:
+                    calendar['weeks'] = dict(db.session.execute(select(WeekPeriod.start_date, WeekPeriod.id)).all())
+                    calendar['loaded_at'] = now
+                week_id = calendar['weeks'].get(start_date)
+        return week_id
+
+    def remember_week(self, week):
+        """Add a week this request already loaded to the week calendar."""
+        calendar = current_app.extensions.setdefault('week_calendar', {'weeks': {}, 'loaded_at': None})
+        calendar['weeks'][week.start_date] = week.id
+
+    @staticmethod
+    def _current_week_start():
+        today = datetime.now().date()
+        return today - timedelta(days=today.weekday())
 
     def get_12_week_history(self, user_id):
         """
@@ -233,12 +302,14 @@ class AllowanceService:
         """
         weeks = []
         current_week = WeekPeriod.get_or_create_current_week()
+        week_starts = [current_week.start_date - timedelta(weeks=i) for i in range(12)]
+        found = {week.start_date: week for week in WeekPeriod.query.filter(WeekPeriod.start_date.in_(week_starts))}
+        summaries = self.calculate_weekly_summaries([user_id], [week.id for week in found.values()])
 
-        for i in range(12):
-            week_start = current_week.start_date - timedelta(weeks=i)
-            week = WeekPeriod.query.filter_by(start_date=week_start).first()
+        for week_start in week_starts:
+            week = found.get(week_start)
             if week:
-                summary = self.calculate_weekly_summary(user_id, week.id)
+                summary = summaries.get((user_id, week.id))
                 if summary:
                     weeks.append({
                         'week_label': week.start_date.strftime('%d %b'),
@@ -253,3 +324,69 @@ class AllowanceService:
                     })
 
         return list(reversed(weeks))  # Oldest first
+
+    def get_history_version(self, user_id, weeks=12):
+        """
+        Get a fingerprint of everything get_12_week_history depends on, in one query.
+
+        It changes whenever a chore in those weeks is ticked or unticked, an
+        assignment is added or removed, the amount earned for a completion
+        changes, the child's allowance changes or a new week starts - so it
+        can key caches of the history instead of recomputing it. Editing an
+        assignment's or chore's amount doesn't change it, and doesn't need
+        to: the history only adds up what each completion earned when it
+        was logged.
+
+        Returns:
+            str: short hex digest
+        """
+        current_week = WeekPeriod.get_or_create_current_week()
+        week_ids = select(WeekPeriod.id).where(
+            WeekPeriod.start_date > current_week.start_date - timedelta(weeks=weeks),
+            WeekPeriod.start_date <= current_week.start_date
+        )
+        logs = (ChoreLog.user_id == user_id, ChoreLog.week_id.in_(week_ids))
+        assignments = (WeeklyChoreAssignment.user_id == user_id, WeeklyChoreAssignment.week_id.in_(week_ids))
+        row = db.session.execute(select(
+            select(func.count(ChoreLog.id)).where(*logs).scalar_subquery(),
+            select(func.max(ChoreLog.completed_at)).where(*logs).scalar_subquery(),
+            select(func.sum(ChoreLog.amount_earned)).where(*logs).scalar_subquery(),
+            select(func.count(WeeklyChoreAssignment.id)).where(*assignments).scalar_subquery(),
+            select(func.max(WeeklyChoreAssignment.id)).where(*assignments).scalar_subquery(),
+            select(User.base_allowance).where(User.id == user_id).scalar_subquery(),
+        )).one()
+        key = repr((current_week.id, weeks, *row))
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+    def get_week_version(self, user_id, week_id):
+        """
+        Get a fingerprint of everything a week's dashboard shows, in one query.
+
+        It changes whenever a chore in that week or last week (for the "Last
+        week" line) is ticked or unticked, an assignment is added or removed,
+        a payment is made or edited, a chore definition is edited, or the
+        child's name or allowance changes - so it can key caches of the
+        rendered week instead of rebuilding it.
+
+        Returns:
+            str: short hex digest
+        """
+        week_ids = [week_id, self.get_week_id(self._current_week_start() - timedelta(days=7))]
+        logs = (ChoreLog.user_id == user_id, ChoreLog.week_id.in_(week_ids))
+        assignments = (WeeklyChoreAssignment.user_id == user_id, WeeklyChoreAssignment.week_id.in_(week_ids))
+        payments = (WeeklyPayment.user_id == user_id, WeeklyPayment.week_id.in_(week_ids))
+        row = db.session.execute(select(
+            select(func.count(ChoreLog.id)).where(*logs).scalar_subquery(),
+            select(func.max(ChoreLog.completed_at)).where(*logs).scalar_subquery(),
+            select(func.sum(ChoreLog.amount_earned)).where(*logs).scalar_subquery(),
+            select(func.count(WeeklyChoreAssignment.id)).where(*assignments).scalar_subquery(),
+            select(func.max(WeeklyChoreAssignment.id)).where(*assignments).scalar_subquery(),
+            select(func.count(WeeklyPayment.id)).where(*payments).scalar_subquery(),
+            select(func.max(WeeklyPayment.updated_at)).where(*payments).scalar_subquery(),
+            select(func.count(ChoreDefinition.id)).scalar_subquery(),
+            select(func.max(ChoreDefinition.updated_at)).scalar_subquery(),
+            select(User.name).where(User.id == user_id).scalar_subquery(),
+            select(User.base_allowance).where(User.id == user_id).scalar_subquery(),
+        )).one()
+        key = repr((week_ids, *row))
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
@@ -0,0 +1,274 @@
+import hashlib
+import math
+import os
+import random
+import tempfile
+from xml.sax.saxutils import quoteattr
+
+from flask import current_app, url_for
+
+
+class UnknownAvatarStyle(Exception):
+    """Raised for an avatar style there is no renderer for."""
+
+
+class AvatarService:
+    """
+    Service for drawing avatars locally instead of fetching them from DiceBear.
+
+    Each avatar is built from simple shapes on a 100x100 canvas, chosen by a
+    random generator seeded from the style and seed, so the same user always
+    gets the same picture. The shapes are written out as SVG, or drawn with
+    Pillow for PNG. Rendered files are cached on disk by (style, seed, size).
+    """
+
+    # Bump when drawings change, so cached files and browser caches are replaced
+    RENDERER_VERSION = 1
+
+    SIZES = (32, 48, 64, 96, 128, 192, 256, 512)
+    DEFAULT_SIZE = 128
+
+    BACKGROUNDS = ['#E0E7FF', '#D1FAE5', '#FEF3C7', '#FCE7F3', '#E0F2FE', '#EDE9FE', '#FFE4E6', '#ECFCCB']
+    BRIGHTS = ['#6366F1', '#10B981', '#F59E0B', '#EF4444', '#3B82F6', '#8B5CF6', '#EC4899', '#14B8A6']
+    SKINS = ['#FDDBB4', '#F1C27D', '#E0AC69', '#C68642', '#8D5524', '#FFE0BD']
+    HAIRS = ['#2C1B18', '#4A312C', '#A55728', '#B58143', '#D6B370', '#724133', '#E8E1E1', '#C93305']
+    EYE = '#1F2937'
+    WHITE = '#FFFFFF'
+
+    # Face styles share a drawing with their own hair shapes and background palette
+    FACE_STYLES = {
+        'avataaars': {'hair': ('short', 'long', 'bun', 'curly'), 'backgrounds': BACKGROUNDS},
+        'micah': {'hair': ('short', 'swoop', 'bun'), 'backgrounds': ['#FDE68A', '#BFDBFE', '#FBCFE8', '#BBF7D0']},
+        'lorelei': {'hair': ('long', 'curly', 'swoop'), 'backgrounds': ['#F5F5F4', '#E7E5E4', '#FAE8FF', '#E0F2FE']},
+        'adventurer': {'hair': ('short', 'swoop', 'long', 'spiky'), 'backgrounds': ['#D9F99D', '#FED7AA', '#A5F3FC', '#DDD6FE']},
+    }
+
+    def __init__(self, cache_dir=None, max_files=None, max_bytes=None):
+        self.cache_dir = cache_dir or current_app.config.get('AVATAR_CACHE_DIR') or \
+            os.path.join(current_app.instance_path, 'avatars')
+        self.max_files = max_files or current_app.config.get('AVATAR_CACHE_MAX_FILES', 5000)
+        self.max_bytes = max_bytes or current_app.config.get('AVATAR_CACHE_MAX_BYTES', 50 * 1024 * 1024)
+
+    @classmethod
+    def styles(cls):
+        """Get every style there is a renderer for."""
+        return ['bottts', 'pixel-art', 'fun-emoji', 'thumbs', *cls.FACE_STYLES]
+
+    @classmethod
+    def url(cls, style, seed, size=None, fmt='svg'):
+        """Get the URL of an avatar image."""
+        return url_for('settings.avatar_image', style=style, fmt=fmt, seed=seed,
+                       size=size or cls.DEFAULT_SIZE, v=cls.RENDERER_VERSION)
+
+    @classmethod
+    def snap_size(cls, size):
+        """Round a requested size to the nearest one we render, so odd sizes can't fill the cache."""
+        if not size:
+            return cls.DEFAULT_SIZE
+        return min(cls.SIZES, key=lambda allowed: abs(allowed - size))
+
+    @classmethod
+    def etag(cls, style, seed, size, fmt):
+        """Get the cache key for an avatar, also used as its ETag."""
+        key = f'{cls.RENDERER_VERSION}:{style}:{size}:{fmt}:{seed}'
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+    def get_path(self, style, seed, size=DEFAULT_SIZE, fmt='svg'):
+        """
+        Get the path of a rendered avatar, drawing and caching it first if needed.
+
+        Raises:
+            UnknownAvatarStyle: if there is no renderer for the style
+        """
+        if style not in self.styles():
+            raise UnknownAvatarStyle(style)
+        path = os.path.join(self.cache_dir, f'{style}-{self.etag(style, seed, size, fmt)}.{fmt}')
+        if not os.path.exists(path):
+            shapes = self.draw(style, seed)
+            content = self.to_svg(shapes, size) if fmt == 'svg' else self.to_png(shapes, size)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename, so a concurrent request never serves half a file
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp, path)
+            self._prune(keep=path)
+        return path
+
+    def _prune(self, keep=None):
+        """Delete the oldest files, other than keep, once the cache holds more than max_files or max_bytes."""
+        # Leave other workers' half-written files alone
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.tmp'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue  # Another worker pruned it first
+            files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        if len(files) <= self.max_files and total <= self.max_bytes:
+            return
+        # Prune to 90% of both limits, so the next few writes don't prune again
+        files.sort()
+        count = len(files)
+        for _, size, name in files:
+            if count <= self.max_files * 0.9 and total <= self.max_bytes * 0.9:
+                break
+            if os.path.join(self.cache_dir, name) == keep:
+                continue  # Just written for this request
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass  # Another worker pruned it first
+            count -= 1
+            total -= size
+
+    def draw(self, style, seed):
+        """Get the shapes for an avatar, as (kind, fill, *geometry) tuples on a 100x100 canvas."""
+        digest = hashlib.sha256(f'{style}:{seed}'.encode('utf-8')).digest()
+        rng = random.Random(int.from_bytes(digest, 'big'))
+        if style in self.FACE_STYLES:
+            return self._face(rng, **self.FACE_STYLES[style])
+        return getattr(self, '_' + style.replace('-', '_'))(rng)
+
+    def to_svg(self, shapes, size):
+        """Write shapes out as an SVG document."""
+        elements = []
+        for kind, fill, *geometry in shapes:
+            if kind == 'rect':
+                x, y, w, h, r = geometry
+                elements.append(f'<rect x="{x:g}" y="{y:g}" width="{w:g}" height="{h:g}" rx="{r:g}" fill="{fill}"/>')
+            elif kind == 'ellipse':
+                cx, cy, rx, ry = geometry
+                elements.append(f'<ellipse cx="{cx:g}" cy="{cy:g}" rx="{rx:g}" ry="{ry:g}" fill="{fill}"/>')
+            elif kind == 'polygon':
+                points = ' '.join(f'{x:g},{y:g}' for x, y in geometry[0])
+                elements.append(f'<polygon points={quoteattr(points)} fill="{fill}"/>')
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100" width="{size}" height="{size}">'
+            + ''.join(elements) + '</svg>'
+        ).encode('utf-8')
+
+    def to_png(self, shapes, size):
+        """Draw shapes into a PNG with Pillow, supersampled for smooth edges."""
+        from io import BytesIO
+
+        from PIL import Image, ImageDraw
+
+        scale = size * 4 / 100
+        image = Image.new('RGB', (size * 4, size * 4), self.WHITE)
+        draw = ImageDraw.Draw(image)
+        for kind, fill, *geometry in shapes:
+            if kind == 'rect':
+                x, y, w, h, r = geometry
+                draw.rounded_rectangle([x * scale, y * scale, (x + w) * scale, (y + h) * scale],
+                                       radius=r * scale, fill=fill)
+            elif kind == 'ellipse':
+                cx, cy, rx, ry = geometry
+                draw.ellipse([(cx - rx) * scale, (cy - ry) * scale, (cx + rx) * scale, (cy + ry) * scale], fill=fill)
+            elif kind == 'polygon':
+                draw.polygon([(x * scale, y * scale) for x, y in geometry[0]], fill=fill)
+        output = BytesIO()
+        image.resize((size, size), Image.LANCZOS).save(output, 'PNG', optimize=True)
+        return output.getvalue()
+
+    # Renderers - each returns shapes, drawn in order
+
+    def _bottts(self, rng):
+        body = rng.choice(self.BRIGHTS)
+        shapes = [('rect', rng.choice(self.BACKGROUNDS), 0, 0, 100, 100, 0)]
+        if rng.random() < 0.7:
+            shapes += [('rect', '#9CA3AF', 48, 10, 4, 16, 2), ('ellipse', rng.choice(self.BRIGHTS), 50, 10, 5, 5)]
+        shapes += [
+            ('rect', '#9CA3AF', 14, 44, 8, 16, 3), ('rect', '#9CA3AF', 78, 44, 8, 16, 3),
+            ('rect', body, 20, 24, 60, 56, rng.choice([6, 12, 20])),
+        ]
+        eye_size, square = rng.choice([7, 9, 11]), rng.random() < 0.5
+        for x in (37, 63):
+            shapes.append(('rect', self.WHITE, x - eye_size, 46 - eye_size, eye_size * 2, eye_size * 2,
+                           2 if square else eye_size))
+            shapes.append(('ellipse', self.EYE, x, 46, eye_size / 2.5, eye_size / 2.5))
+        mouth = rng.choice([20, 28, 36])
+        shapes.append(('rect', self.WHITE, 50 - mouth / 2, 64, mouth, 7, 2))
+        for i in range(1, mouth // 6):
+            shapes.append(('rect', body, 50 - mouth / 2 + i * 6 - 0.5, 64, 1, 7, 0))
+        return shapes
+
+    def _pixel_art(self, rng):
+        # A mirrored 8x8 grid, like an identicon
+        background, ink = rng.choice(self.BACKGROUNDS), rng.choice(self.BRIGHTS)
+        accent = rng.choice([c for c in self.BRIGHTS if c != ink])
+        shapes = [('rect', background, 0, 0, 100, 100, 0)]
+        cell = 100 / 10
+        for row in range(8):
+            for col in range(4):
+                roll = rng.random()
+                if roll < 0.45:
+                    fill = ink if roll < 0.35 else accent
+                    for c in (col, 7 - col):
+                        shapes.append(('rect', fill, cell * (c + 1), cell * (row + 1), cell, cell, 0))
+        return shapes
+
+    def _fun_emoji(self, rng):
+        face = rng.choice(['#FCD34D', '#FDBA74', '#86EFAC', '#93C5FD', '#F9A8D4'])
+        shapes = [('rect', rng.choice(self.BACKGROUNDS), 0, 0, 100, 100, 0), ('ellipse', face, 50, 52, 38, 38)]
+        eyes = rng.choice(['dots', 'tall', 'wink'])
+        for x in (36, 64):
+            if eyes == 'wink' and x == 64:
+                shapes.append(('rect', self.EYE, x - 6, 42, 12, 3, 1.5))
+            else:
+                shapes.append(('ellipse', self.EYE, x, 43, 4, 7 if eyes == 'tall' else 4))
+        if rng.random() < 0.5:
+            shapes += [('ellipse', '#F87171', 28, 58, 6, 4), ('ellipse', '#F87171', 72, 58, 6, 4)]
+        shapes.append(self._smile(50, 62, rng.choice([12, 16, 20]), rng.choice([6, 10, 14]), self.EYE))
+        return shapes
+
+    def _thumbs(self, rng):
+        body = rng.choice(self.BRIGHTS)
+        shapes = [
+            ('rect', rng.choice(self.BACKGROUNDS), 0, 0, 100, 100, 0),
+            ('rect', body, 24, 36, 52, 56, 16),
+            ('rect', body, rng.choice([30, 38, 46]), 12, 22, 40, 11),
+        ]
+        for x in (41, 59):
+            shapes += [('ellipse', self.WHITE, x, 58, 6, 7), ('ellipse', self.EYE, x, 59, 3, 3.5)]
+        shapes.append(self._smile(50, 72, 10, rng.choice([3, 5, 7]), self.EYE))
+        return shapes
+
+    def _face(self, rng, hair, backgrounds):
+        skin, hair_color = rng.choice(self.SKINS), rng.choice(self.HAIRS)
+        style = rng.choice(hair)
+        shapes = [('rect', rng.choice(backgrounds), 0, 0, 100, 100, 0)]
+        if style == 'long':
+            shapes.append(('rect', hair_color, 22, 26, 56, 64, 24))
+        if style == 'bun':
+            shapes.append(('ellipse', hair_color, 50, 14, 12, 11))
+        shapes += [
+            ('rect', skin, 42, 70, 16, 18, 4),
+            ('rect', rng.choice(self.BRIGHTS), 18, 84, 64, 30, 18),
+            ('ellipse', skin, 50, 52, 25, 28),
+        ]
+        if style in ('short', 'long', 'bun'):
+            shapes.append(('rect', hair_color, 24, 20, 52, 20, 14))
+        elif style == 'curly':
+            shapes += [('ellipse', hair_color, x, y, 9, 9) for x, y in
+                       [(30, 32), (38, 24), (50, 21), (62, 24), (70, 32), (26, 42), (74, 42)]]
+        elif style == 'swoop':
+            shapes.append(('polygon', hair_color, [(24, 42), (30, 22), (50, 18), (74, 26), (77, 40), (52, 30)]))
+        elif style == 'spiky':
+            shapes.append(('polygon', hair_color, [(24, 40), (28, 18), (36, 28), (42, 12), (50, 26), (58, 12),
+                                                  (64, 28), (72, 18), (76, 40), (50, 32)]))
+        for x in (40, 60):
+            shapes.append(('ellipse', self.EYE, x, 52, 3, 3.5 if rng.random() < 0.5 else 2.5))
+        shapes.append(self._smile(50, 63, rng.choice([6, 8, 10]), rng.choice([3, 4, 6]), '#B91C1C'))
+        return shapes
+
+    @staticmethod
+    def _smile(cx, cy, half_width, depth, fill, steps=8):
+        """A smile: the area between a deep and a shallow lower arc."""
+        lower = [(cx - half_width + 2 * half_width * i / steps,
+                  cy + depth * math.sin(math.pi * i / steps)) for i in range(steps + 1)]
+        upper = [(x, cy + (y - cy) * 0.35) for x, y in reversed(lower)]
+        return ('polygon', fill, [(round(x, 2), round(y, 2)) for x, y in lower + upper])
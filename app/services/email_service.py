@@ -1,8 +1,10 @@
+import time
 from datetime import datetime
 from flask import current_app, render_template
 from flask_mail import Message
 
 from app import mail, db
+from app.metrics import EMAILS, EMAIL_SEND_SECONDS
 from app.models.user import User
 from app.models.week import WeekPeriod
 from app.services.allowance_service import AllowanceService
@@ -94,7 +96,19 @@ class EmailService:
             html=html_body
         )
 
-        mail.send(msg)
+        self._send(msg, 'weekly_summary')
+
+    def _send(self, msg, kind):
+        """Send a message, recording its outcome and SMTP time."""
+        start = time.perf_counter()
+        try:
+            mail.send(msg)
+        except Exception:
+            EMAILS.labels(kind, 'failed').inc()
+            raise
+        finally:
+            EMAIL_SEND_SECONDS.labels(kind).observe(time.perf_counter() - start)
+        EMAILS.labels(kind, 'sent').inc()
 
     def _generate_text_summary(self, admin, week, summaries):
         """Generate plain text version of the summary."""
@@ -172,7 +186,7 @@ Date: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}
 ChoreChamp
                     """.strip()
                 )
-                mail.send(msg)
+                self._send(msg, 'payment_confirmation')
             except Exception as e:
                 current_app.logger.error(f"Failed to send payment email to {admin.email}: {e}")
 
@@ -1,5 +1,8 @@
+import time
+
 from flask_apscheduler import APScheduler
 
+from app.metrics import JOB_SECONDS
 from app.services.email_service import EmailService
 
 scheduler = APScheduler()
@@ -28,8 +31,12 @@ def send_weekly_summary_job():
 
     with current_app.app_context():
         email_service = EmailService()
+        start = time.perf_counter()
+        status = 'ok'
         try:
             email_service.send_weekly_summary()
             current_app.logger.info("Weekly summary emails sent successfully")
         except Exception as e:
+            status = 'failed'
             current_app.logger.error(f"Failed to send weekly summary emails: {e}")
+        JOB_SECONDS.labels('weekly_summary_email', status).observe(time.perf_counter() - start)
@@ -0,0 +1,245 @@
+import random
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import insert, select
+
+from app import db
+from app.database import insert_or_ignore
+from app.models.user import User
+from app.models.chore import ChoreDefinition, chore_user_assignments
+from app.models.week import WeekPeriod, WeeklyChoreAssignment, WeeklyPayment
+from app.models.chore_log import ChoreLog
+
+
+# Chores handed out to each household, in order, repeating if more are asked for
+CHORE_TEMPLATES = [
+    {'name': 'Brush Teeth', 'amount': 0.25, 'frequency': 'twice_daily', 'times_per_day': 2},
+    {'name': 'Make Bed', 'amount': 0.50, 'frequency': 'daily'},
+    {'name': 'Tidy Room', 'amount': 1.00, 'frequency': 'daily'},
+    {'name': 'Take Out Rubbish', 'amount': 1.00, 'frequency': 'weekly'},
+    {'name': 'Water Plants', 'amount': 0.50, 'frequency': 'specific_days', 'preferred_days': '0,3,5'},
+    {'name': 'Help with Dishes', 'amount': 0.75, 'frequency': 'daily'},
+    {'name': 'Read a Book', 'amount': 0.50, 'frequency': 'flexible', 'times_per_week': 3},
+    {'name': 'Feed the Cat', 'amount': 0.25, 'frequency': 'daily'},
+]
+
+AD_HOC_NAMES = ['Wash the Car', 'Clean Windows', 'Sort Recycling', 'Weed the Garden', 'Hoover Stairs']
+
+# Chance a child adds an ad-hoc chore in any given week
+AD_HOC_RATE = 0.2
+
+# Weeks at the end of the history left unpaid
+UNPAID_WEEKS = 2
+
+# Rows per INSERT batch
+BATCH_SIZE = 10000
+
+
+class SeedService:
+    """Service for generating large synthetic datasets for benchmarking."""
+
+    # Hashes are computed once and shared - bcrypt per user would dominate the run time
+    PIN = '1234'
+    PASSWORD = 'password123'
+
+    def __init__(self, seed=42):
+        self.random = random.Random(seed)
+
+    def seed_scale(self, households=1, children=3, chores=8, years=1, today=None, log=print):
+        """
+        Generate households with multi-year chore histories using bulk inserts.
+
+        Each household gets one parent, ``children`` children and ``chores``
+        chores assigned only to its own children. Every week has assignments,
+        completions (including twice-daily slots and specific-day chores), the
+        occasional ad-hoc chore and, apart from the most recent weeks, a paid
+        weekly payment.
+
+        Returns:
+            dict: Rows inserted per table
+        """
+        today = today or datetime.now().date()
+        counts = dict.fromkeys(['users', 'chores', 'weeks', 'assignments', 'chore_logs', 'payments'], 0)
+
+        hasher = User()
+        hasher.set_pin(self.PIN)
+        hasher.set_password(self.PASSWORD)
+
+        weeks = self._create_weeks(today, years)
+        counts['weeks'] = len(weeks)
+        log(f"  {len(weeks)} weeks from {weeks[0][1]} to {weeks[-1][1]}")
+
+        for household in range(1, households + 1):
+            child_ids, chore_defs = self._create_household(household, children, chores, hasher)
+            counts['users'] += len(child_ids) + 1
+            counts['chores'] += len(chore_defs)
+
+            household_counts = self._create_history(child_ids, chore_defs, weeks, today)
+            for table, count in household_counts.items():
+                counts[table] += count
+            db.session.commit()
+            log(f"  Household {household}: {household_counts['chore_logs']} chore logs")
+
+        return counts
+
+    def _create_weeks(self, today, years):
+        """Create every week period covering the last ``years`` years. Returns [(id, monday)]."""
+        this_monday = today - timedelta(days=today.weekday())
+        first_monday = this_monday - timedelta(weeks=int(52 * years) - 1)
+        mondays = [first_monday + timedelta(weeks=i) for i in range((this_monday - first_monday).days // 7 + 1)]
+
+        db.session.execute(
+            insert_or_ignore(db.session, WeekPeriod, ['start_date']),
+            [{'start_date': m, 'end_date': m + timedelta(days=6), 'created_at': datetime.utcnow()} for m in mondays]
+        )
+        rows = db.session.execute(
+            select(WeekPeriod.id, WeekPeriod.start_date).where(WeekPeriod.start_date >= first_monday)
+            .order_by(WeekPeriod.start_date)
+        ).all()
+        return [(row.id, row.start_date) for row in rows]
+
+    def _create_household(self, household, children, chores, hasher):
+        """Create a parent, children and the household's chores. Returns (child_ids, chore_defs)."""
+        now = datetime.utcnow()
+        user_rows = [{
+            'name': f'Parent {household}', 'email': f'parent{household}@scale.chorechamp.local',
+            'is_admin': True, 'pin_hash': None, 'password_hash': hasher.password_hash, 'base_allowance': 0.0,
+            'is_active': True, 'created_at': now, 'updated_at': now,
+        }]
+        for child in range(1, children + 1):
+            user_rows.append({
+                'name': f'Child {household}-{child}', 'email': None, 'is_admin': False,
+                'pin_hash': hasher.pin_hash, 'password_hash': None,
+                'base_allowance': self.random.choice([2.0, 3.0, 5.0]), 'is_active': True,
+                'created_at': now, 'updated_at': now,
+            })
+        users = self._insert_returning(User, user_rows, User.id, User.base_allowance)
+        child_ids = [(row.id, row.base_allowance) for row in users[1:]]
+
+        chore_rows = []
+        for index in range(chores):
+            template = CHORE_TEMPLATES[index % len(CHORE_TEMPLATES)]
+            chore_rows.append({
+                'times_per_day': 1, 'times_per_week': None, 'preferred_days': None, **template,
+                'name': f"{template['name']} (H{household})",
+                'is_preset': True, 'applies_to_all': False, 'is_active': True,
+                'created_by_user_id': None, 'created_at': now, 'updated_at': now,
+            })
+        defs = self._insert_returning(ChoreDefinition, chore_rows, ChoreDefinition.id)
+        chore_defs = [dict(row, id=result.id) for row, result in zip(chore_rows, defs)]
+
+        db.session.execute(insert(chore_user_assignments), [
+            {'chore_id': chore['id'], 'user_id': child_id}
+            for chore in chore_defs for child_id, _ in child_ids
+        ])
+        return child_ids, chore_defs
+
+    def _create_history(self, child_ids, chore_defs, weeks, today):
+        """Create assignments, logs and payments for every child and week."""
+        counts = {'assignments': 0, 'chore_logs': 0, 'payments': 0}
+        now = datetime.utcnow()
+        ad_hoc_rows = []
+        assignment_rows = []
+        for child_id, _ in child_ids:
+            for week_id, monday in weeks:
+                for chore in chore_defs:
+                    assignment_rows.append({
+                        'week_id': week_id, 'chore_id': chore['id'], 'user_id': child_id,
+                        'custom_name': None, 'custom_amount': None, 'created_at': now,
+                        '_chore': chore, '_monday': monday,
+                    })
+                if self.random.random() < AD_HOC_RATE:
+                    ad_hoc_rows.append({
+                        'name': self.random.choice(AD_HOC_NAMES),
+                        'amount': self.random.choice([0.5, 1.0, 2.0]),
+                        'frequency': 'ad_hoc', 'times_per_day': 1, 'is_preset': False,
+                        'times_per_week': None, 'preferred_days': None,
+                        'applies_to_all': False, 'is_active': True, 'created_by_user_id': child_id,
+                        'created_at': now, 'updated_at': now,
+                        '_week_id': week_id, '_monday': monday,
+                    })
+
+        # Ad-hoc chores get their own definition and an assignment with a custom name, as in the app
+        defs = self._insert_returning(ChoreDefinition, _strip(ad_hoc_rows), ChoreDefinition.id)
+        for row, result in zip(ad_hoc_rows, defs):
+            chore = dict(row, id=result.id)
+            assignment_rows.append({
+                'week_id': row['_week_id'], 'chore_id': result.id, 'user_id': row['created_by_user_id'],
+                'custom_name': row['name'], 'custom_amount': row['amount'], 'created_at': now,
+                '_chore': chore, '_monday': row['_monday'],
+            })
+
+        assignment_ids = self._insert_returning(WeeklyChoreAssignment, _strip(assignment_rows),
+                                                WeeklyChoreAssignment.id)
+        counts['assignments'] = len(assignment_rows)
+
+        diligence = {child_id: self.random.uniform(0.5, 0.95) for child_id, _ in child_ids}
+        earned = {}
+        log_rows = []
+        for row, result in zip(assignment_rows, assignment_ids):
+            for log in self._completions(row['_chore'], row['_monday'], today, diligence[row['user_id']]):
+                log.update(user_id=row['user_id'], chore_id=row['chore_id'], week_id=row['week_id'],
+                           assignment_id=result.id)
+                log_rows.append(log)
+                key = (row['user_id'], row['week_id'])
+                earned[key] = earned.get(key, 0.0) + log['amount_earned']
+            if len(log_rows) >= BATCH_SIZE:
+                counts['chore_logs'] += self._insert(ChoreLog, log_rows)
+                log_rows = []
+        counts['chore_logs'] += self._insert(ChoreLog, log_rows)
+
+        payment_rows = []
+        for child_id, base_allowance in child_ids:
+            for week_id, monday in weeks[:-UNPAID_WEEKS]:
+                amount = round(base_allowance + earned.get((child_id, week_id), 0.0), 2)
+                paid_at = datetime.combine(monday + timedelta(days=6), time(19, 0))
+                payment_rows.append({
+                    'week_id': week_id, 'user_id': child_id, 'original_amount': amount, 'amount': amount,
+                    'is_paid': True, 'paid_at': paid_at, 'created_at': paid_at, 'updated_at': paid_at,
+                })
+        counts['payments'] = self._insert(WeeklyPayment, payment_rows)
+        return counts
+
+    def _completions(self, chore, monday, today, diligence):
+        """Yield the chore log rows a child with the given diligence would create in a week."""
+        amount = chore['amount']
+        days = [monday + timedelta(days=i) for i in range(7) if monday + timedelta(days=i) <= today]
+        frequency = chore['frequency']
+
+        if frequency in ('weekly', 'ad_hoc', 'flexible'):
+            target = (chore.get('times_per_week') or 1) if frequency == 'flexible' else 1
+            picked = self.random.sample(days, min(target, len(days))) if days else []
+            days_slots = [(day, 1) for day in picked if self.random.random() < diligence]
+        elif frequency == 'specific_days':
+            preferred = {int(d) for d in chore['preferred_days'].split(',')}
+            days_slots = [(day, 1) for day in days if day.weekday() in preferred and self.random.random() < diligence]
+        else:
+            slots = range(1, chore.get('times_per_day', 1) + 1)
+            days_slots = [(day, slot) for day in days for slot in slots if self.random.random() < diligence]
+
+        for day, slot in days_slots:
+            yield {
+                'completed_date': day,
+                'completed_at': datetime.combine(day, time(7 if slot == 1 else 19, self.random.randrange(60))),
+                'completion_slot': slot,
+                'amount_earned': amount,
+            }
+
+    def _insert(self, model, rows):
+        """Bulk insert rows in batches with Core (skipping the ORM). Returns the number inserted."""
+        for start in range(0, len(rows), BATCH_SIZE):
+            db.session.execute(insert(model.__table__), rows[start:start + BATCH_SIZE])
+        return len(rows)
+
+    def _insert_returning(self, model, rows, *columns):
+        """Bulk insert rows and return the requested columns in insertion order."""
+        results = []
+        for start in range(0, len(rows), BATCH_SIZE):
+            statement = insert(model.__table__).returning(*columns, sort_by_parameter_order=True)
+            results.extend(db.session.execute(statement, rows[start:start + BATCH_SIZE]).all())
+        return results
+
+
+def _strip(rows):
+    """Drop the bookkeeping keys (prefixed with _) before inserting."""
+    return [{k: v for k, v in row.items() if not k.startswith('_')} for row in rows]
@@ -0,0 +1,155 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.database import insert_or_ignore
+from app.models.chore_log import ChoreLog
+from app.models.week import WeeklyChoreAssignment, WeeklyPayment
+
+
+class ToggleSyncService:
+    """
+    Service for replaying chore toggles the PWA queued while offline.
+
+    Each change says what state a cell should end up in (done or not) and
+    when the child tapped it, rather than "toggle", so replaying a change
+    twice is harmless. Conflicts are resolved per cell:
+
+    - A tick is always applied - a chore the child did shouldn't be lost.
+    - An untick is refused if the chore was ticked on the server after the
+      child's tap (e.g. by a parent, or on another device); the newer tick wins.
+    - Changes to paid weeks, or to chores that no longer exist, are rejected.
+    - Changes another child queued on a shared device are skipped, so they
+      stay queued until that child signs in.
+    """
+
+    # Most changes accepted in one request
+    MAX_CHANGES = 200
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+    def apply(self, changes):
+        """
+        Apply a batch of queued changes and commit them.
+
+        Args:
+            changes: list of dicts with 'id' (the client's key for the cell,
+                echoed back), 'user_id' (who tapped it), 'assignment_id',
+                'date' (YYYY-MM-DD), 'slot', 'done' and 'recorded_at' (ms
+                since the epoch)
+
+        Returns:
+            list: one {'id', 'status', 'done', 'error'} dict per change, where
+            status is 'applied', 'conflict', 'rejected' or 'skipped' and done
+            is the cell's state on the server afterwards
+        """
+        parsed = [self._parse(change) for change in changes]
+        valid = [change for change in parsed if 'error' not in change]
+
+        # Everything the batch needs is loaded up front, so it's a handful of queries however many changes
+        assignments = {
+            assignment.id: assignment
+            for assignment in WeeklyChoreAssignment.query.options(
+                joinedload(WeeklyChoreAssignment.chore_definition)
+            ).filter(
+                WeeklyChoreAssignment.id.in_({change['assignment_id'] for change in valid})
+            )
+        }
+        paid_weeks = {
+            payment.week_id
+            for payment in WeeklyPayment.query.filter(
+                WeeklyPayment.week_id.in_({a.week_id for a in assignments.values()}),
+                WeeklyPayment.user_id == self.user_id,
+                WeeklyPayment.is_paid.is_(True),
+            )
+        }
+        logs = {
+            (log.chore_id, log.completed_date, log.completion_slot): log
+            for log in ChoreLog.query.filter(
+                ChoreLog.user_id == self.user_id,
+                ChoreLog.chore_id.in_({a.chore_id for a in assignments.values()}),
+                ChoreLog.completed_date.in_({change['date'] for change in valid}),
+            )
+        }
+
+        # Only the latest change to each cell matters
+        latest = {}
+        for change in sorted(valid, key=lambda c: c['recorded_at']):
+            latest[(change['assignment_id'], change['date'], change['slot'])] = change
+
+        outcomes = {}
+        untick, tick = [], []
+        for cell, change in latest.items():
+            assignment = assignments.get(change['assignment_id'])
+            if assignment is None:
+                outcomes[cell] = {'status': 'rejected', 'done': None, 'error': 'Invalid assignment'}
+                continue
+            if change['user_id'] not in (None, self.user_id) or assignment.user_id != self.user_id:
+                # Another child's tap on a shared tablet - left queued until they sign in
+                outcomes[cell] = {'status': 'skipped', 'done': None, 'error': 'Signed in as someone else'}
+                continue
+
+            log = logs.get((assignment.chore_id, change['date'], change['slot']))
+            if assignment.week_id in paid_weeks:
+                outcomes[cell] = {'status': 'rejected', 'done': log is not None,
+                                  'error': 'Week is locked - payment already made'}
+            elif not change['done'] and log is not None and log.completed_at > change['recorded_at']:
+                outcomes[cell] = {'status': 'conflict', 'done': True}
+            else:
+                if change['done'] and log is None:
+                    tick.append({
+                        'user_id': self.user_id,
+                        'chore_id': assignment.chore_id,
+                        'week_id': assignment.week_id,
+                        'assignment_id': assignment.id,
+                        'completed_date': change['date'],
+                        'completion_slot': change['slot'],
+                        'amount_earned': assignment.display_amount,
+                    })
+                elif not change['done'] and log is not None:
+                    untick.append(log.id)
+                outcomes[cell] = {'status': 'applied', 'done': change['done']}
+
+        if untick:
+            db.session.execute(db.delete(ChoreLog).where(ChoreLog.id.in_(untick)))
+        if tick:
+            # Another request may tick the same cell meanwhile
+            db.session.execute(
+                insert_or_ignore(db.session, ChoreLog, ['user_id', 'chore_id', 'completed_date', 'completion_slot']),
+                tick
+            )
+        db.session.commit()
+
+        results = []
+        for change in parsed:
+            if 'error' in change:
+                results.append({'id': change['id'], 'status': 'rejected', 'done': None, 'error': change['error']})
+            else:
+                cell = (change['assignment_id'], change['date'], change['slot'])
+                results.append({'id': change['id'], 'error': None, **outcomes[cell]})
+        return results
+
+    @staticmethod
+    def _parse(change):
+        """Validate one change, returning it with typed fields or with an 'error'."""
+        if not isinstance(change, dict):
+            return {'id': None, 'error': 'Invalid change'}
+        parsed = {'id': change.get('id')}
+        try:
+            # Who tapped it - missing from changes queued before this was recorded
+            parsed['user_id'] = None if change.get('user_id') is None else int(change['user_id'])
+            parsed['assignment_id'] = int(change['assignment_id'])
+            parsed['date'] = datetime.strptime(change['date'], '%Y-%m-%d').date()
+            parsed['slot'] = int(change.get('slot', 1))
+            parsed['done'] = change['done']
+            # completed_at is naive UTC
+            parsed['recorded_at'] = datetime.fromtimestamp(
+                change['recorded_at'] / 1000, timezone.utc
+            ).replace(tzinfo=None)
+        except (KeyError, TypeError, ValueError, OverflowError):
+            return {'id': parsed['id'], 'error': 'Invalid change'}
+        if parsed['slot'] not in (1, 2) or not isinstance(parsed['done'], bool):
+            return {'id': parsed['id'], 'error': 'Invalid change'}
+        return parsed
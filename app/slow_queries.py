@@ -0,0 +1,194 @@
+"""
+Slow-query log.
+
+Any statement slower than SLOW_QUERY_THRESHOLD_MS is written as a JSON line
+to a rotating log with its parameters, the endpoint that ran it and the
+database's query plan - ``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` on
+PostgreSQL. The admin "Slow Queries" page reads the logs back and groups
+entries by statement.
+
+Each process writes its own file, SLOW_QUERY_LOG_FILE plus its pid, as
+gunicorn workers rotating one shared file would lose or mangle lines.
+Once there are more than SLOW_QUERY_LOG_MAX_FILES files (counting rotated
+backups), the oldest are deleted.
+"""
+import glob
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('chorechamp.slow_queries')
+logger.propagate = False
+
+# Only statements that can be explained
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+# Longest parameter/statement text kept in the log
+MAX_TEXT = 2000
+
+# bcrypt hashes (PINs, passwords) are replaced before parameters are logged
+_BCRYPT_HASH = re.compile(r'\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}')
+
+
+def init_slow_query_log(app, engines):
+    """Log statements on the given engines that exceed the configured threshold."""
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('slow_query_start')
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+
+        threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS')
+        path = app.config.get('SLOW_QUERY_LOG_FILE')
+        if threshold is None or not path or elapsed_ms < threshold:
+            return
+
+        if executemany and parameters:
+            parameters = parameters[0]
+        record = {
+            'at': datetime.utcnow().isoformat(timespec='seconds'),
+            'duration_ms': round(elapsed_ms, 1),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'statement': statement[:MAX_TEXT],
+            'parameters': _BCRYPT_HASH.sub('<hash>', repr(parameters))[:MAX_TEXT],
+            'plan': explain(conn.dialect.name, cursor.connection, statement, parameters),
+        }
+        _handler_for(app, path)
+        logger.warning(json.dumps(record))
+
+    for engine in engines:
+        if engine is not None:
+            event.listen(engine, 'before_cursor_execute', before_execute)
+            event.listen(engine, 'after_cursor_execute', after_execute)
+
+
+def explain(dialect, dbapi_connection, statement, parameters):
+    """
+    Get the query plan for a statement as text.
+
+    Runs on a separate cursor of the same connection so the plan reflects
+    the same transaction. On PostgreSQL it runs inside a savepoint so a
+    failed EXPLAIN can't abort the caller's transaction.
+    """
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    savepoint = dialect == 'postgresql'
+    cursor = dbapi_connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            cursor.execute(prefix + statement, parameters or ())
+            rows = cursor.fetchall()
+        finally:
+            if savepoint:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    except Exception as e:
+        return f'EXPLAIN failed: {e}'
+    finally:
+        cursor.close()
+
+    # SQLite rows are (id, parent, notused, detail); PostgreSQL rows are one line each
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def _handler_for(app, path):
+    """Attach a rotating file handler for this process's log at ``path`` the first time it's used."""
+    base = os.path.abspath(path)
+    # Forked workers get their own file rather than writing to the one they inherited
+    own = f'{base}.{os.getpid()}'
+    for handler in logger.handlers:
+        if getattr(handler, 'baseFilename', None) == own:
+            return
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    _prune_logs(base, app.config.get('SLOW_QUERY_LOG_MAX_FILES', 20))
+    handler = RotatingFileHandler(
+        own,
+        maxBytes=app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 1024 * 1024),
+        backupCount=app.config.get('SLOW_QUERY_LOG_BACKUPS', 3)
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING)
+
+
+def _prune_logs(base, max_files):
+    """Delete the least recently written logs (of any process) beyond max_files."""
+    paths = []
+    for filename in glob.glob(glob.escape(base) + '*'):
+        try:
+            paths.append((os.path.getmtime(filename), filename))
+        except FileNotFoundError:
+            continue  # Rotated or pruned by another process
+    for _, filename in sorted(paths, reverse=True)[max_files:]:
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
+            pass
+
+
+def read_slow_queries(path):
+    """Read every entry from every process's log and its rotated backups."""
+    records = []
+    if not path:
+        return records
+    for filename in sorted(glob.glob(glob.escape(path) + '*')):
+        with open(filename) as log_file:
+            for line in log_file:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def worst_offenders(records, limit=25):
+    """
+    Group slow-query entries by statement, worst total time first.
+
+    Returns:
+        list: Dicts with statement, count, total_ms, max_ms, avg_ms,
+            endpoints, plan and last_seen
+    """
+    groups = {}
+    for record in records:
+        group = groups.setdefault(record['statement'], {
+            'statement': record['statement'],
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'endpoints': set(),
+            'plan': None,
+            'last_seen': None,
+        })
+        group['count'] += 1
+        group['total_ms'] += record['duration_ms']
+        group['max_ms'] = max(group['max_ms'], record['duration_ms'])
+        if record.get('endpoint'):
+            group['endpoints'].add(record['endpoint'])
+        if group['last_seen'] is None or record['at'] >= group['last_seen']:
+            group['last_seen'] = record['at']
+            group['plan'] = record.get('plan')
+
+    offenders = sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)[:limit]
+    for group in offenders:
+        group['avg_ms'] = group['total_ms'] / group['count']
+        group['endpoints'] = sorted(group['endpoints'])
+    return offenders
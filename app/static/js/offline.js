@@ -0,0 +1,249 @@
+// ChoreChamp offline chore toggles
+//
+// While the tablet is offline, tapping a chore records the new state in
+// IndexedDB and shows it straight away (with a ring while it's pending).
+// Queued changes are replayed through /chores/sync when the connection
+// returns - from the page, or from the service worker's Background Sync
+// event, which loads this same file with importScripts().
+//
+// The tablet may be shared, so each change records who tapped it. Pages
+// only replay the signed-in child's changes; the server skips anyone
+// else's, and those stay queued until that child signs in.
+(function (scope) {
+  const DB_NAME = 'chorechamp';
+  const STORE = 'toggles';
+  const SYNC_URL = '/chores/sync';
+  const SYNC_TAG = 'replay-toggles';
+  // Keep under ToggleSyncService.MAX_CHANGES
+  const BATCH_SIZE = 100;
+
+  function openDb() {
+    return new Promise((resolve, reject) => {
+      const request = indexedDB.open(DB_NAME, 1);
+      request.onupgradeneeded = () => request.result.createObjectStore(STORE, { keyPath: 'id' });
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    });
+  }
+
+  function withStore(mode, fn) {
+    return openDb().then((db) => new Promise((resolve, reject) => {
+      const tx = db.transaction(STORE, mode);
+      const request = fn(tx.objectStore(STORE));
+      tx.oncomplete = () => {
+        db.close();
+        resolve(request ? request.result : undefined);
+      };
+      tx.onerror = () => {
+        db.close();
+        reject(tx.error);
+      };
+    }));
+  }
+
+  // One entry per cell (keyed by the button id), so only the latest tap is kept
+  const queue = {
+    put: (change) => withStore('readwrite', (store) => store.put(change)),
+    all: () => withStore('readonly', (store) => store.getAll()),
+    // Changes tapped by one user (or everyone's, without a user). Older changes don't say who tapped them.
+    mine: (userId) => queue.all().then((changes) => (
+      userId == null ? changes : changes.filter((change) => change.user_id == null || change.user_id === userId)
+    )),
+    // Remove replayed changes, unless the cell was tapped again meanwhile
+    remove: (changes) => withStore('readwrite', (store) => {
+      changes.forEach((change) => {
+        const request = store.get(change.id);
+        request.onsuccess = () => {
+          if (request.result && request.result.recorded_at === change.recorded_at) {
+            store.delete(change.id);
+          }
+        };
+      });
+    }),
+  };
+
+  function send(changes) {
+    return fetch(SYNC_URL, {
+      method: 'POST',
+      credentials: 'same-origin',
+      headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
+      body: JSON.stringify({ changes }),
+    }).then((response) => {
+      if (response.status === 400 || response.status === 413) {
+        // The server will never accept this batch - drop it rather than retry forever
+        console.log('ChoreChamp: Discarding unsyncable toggles', response.status);
+        return { results: [] };
+      }
+      // Not JSON means we were sent to the login page - keep the queue for later
+      const type = response.headers.get('Content-Type') || '';
+      if (!response.ok || !type.includes('application/json')) {
+        throw new Error('ChoreChamp: Toggle sync failed (' + response.status + ')');
+      }
+      return response.json();
+    });
+  }
+
+  let replaying = null;
+
+  // Send queued changes to the server - only userId's, if given. Resolves with the server's per-change results.
+  function replay(userId) {
+    if (!replaying) {
+      replaying = queue.mine(userId)
+        .then((changes) => {
+          const results = [];
+          const next = (start) => {
+            const batch = changes.slice(start, start + BATCH_SIZE);
+            if (!batch.length) {
+              return results;
+            }
+            return send(batch)
+              .then((data) => {
+                results.push(...data.results);
+                // Keep changes the server skipped as someone else's
+                const skipped = new Set(data.results
+                  .filter((result) => result.status === 'skipped')
+                  .map((result) => result.id));
+                return queue.remove(batch.filter((change) => !skipped.has(change.id)));
+              })
+              .then(() => next(start + BATCH_SIZE));
+          };
+          return next(0);
+        })
+        .finally(() => {
+          replaying = null;
+        });
+    }
+    return replaying;
+  }
+
+  scope.ChoreChampToggles = { replay, SYNC_TAG };
+
+  // Everything below drives the dashboard; the service worker only needs replay()
+  if (typeof document === 'undefined') {
+    return;
+  }
+
+  const DONE_CLASSES = ['bg-success', 'border-success', 'text-white'];
+  const NOT_DONE_CLASSES = ['border-gray-300'];
+  const PENDING_CLASSES = ['ring-2', 'ring-accent', 'ring-offset-1'];
+  let pending = false;
+
+  function currentUser() {
+    const id = document.body && document.body.dataset.userId;
+    return id ? Number(id) : null;
+  }
+
+  function render(button, done, isPending) {
+    button.dataset.done = String(done);
+    button.textContent = done ? '✓' : button.dataset.label;
+    button.classList.remove(...(done ? NOT_DONE_CLASSES : DONE_CLASSES), 'bg-gray-100', 'border-gray-200', 'text-gray-400');
+    button.classList.add(...(done ? DONE_CLASSES : NOT_DONE_CLASSES));
+    PENDING_CLASSES.forEach((name) => button.classList.toggle(name, isPending));
+  }
+
+  function isToggle(element) {
+    return element && element.dataset && element.dataset.done !== undefined;
+  }
+
+  function requestBackgroundSync() {
+    if ('serviceWorker' in navigator) {
+      navigator.serviceWorker.ready
+        .then((registration) => registration.sync && registration.sync.register(SYNC_TAG))
+        .catch(() => {});
+    }
+  }
+
+  function showResults(results) {
+    // Have the week's rows and totals swapped in (see #chore-rows) if anything on this page changed
+    if (results.some((result) => result.status !== 'skipped' && document.getElementById(result.id))) {
+      htmx.trigger(document.body, 'toggles-replayed');
+    }
+  }
+
+  // Ring the cells still waiting to be synced. Resolves with how many there are.
+  function showQueued() {
+    return queue.mine(currentUser()).then((changes) => {
+      changes.forEach((change) => {
+        const button = document.getElementById(change.id);
+        if (button) {
+          render(button, change.done, true);
+        }
+      });
+      return changes.length;
+    });
+  }
+
+  function replayNow() {
+    const userId = currentUser();
+    if (navigator.onLine && userId != null) {
+      replay(userId)
+        .then((results) => queue.mine(userId).then((left) => {
+          pending = left.length > 0;
+          showResults(results);
+        }))
+        .catch((error) => console.log(error.message));
+    }
+  }
+
+  function queueToggle(button) {
+    const values = JSON.parse(button.getAttribute('hx-vals'));
+    const change = {
+      id: button.id,
+      user_id: currentUser(),
+      assignment_id: values.assignment_id,
+      date: values.date,
+      slot: values.slot,
+      done: button.dataset.done !== 'true',
+      recorded_at: Date.now(),
+    };
+    render(button, change.done, true);
+    pending = true;
+    queue.put(change).then(() => {
+      requestBackgroundSync();
+      replayNow();
+    });
+  }
+
+  // Offline, or with earlier taps still queued (so they're replayed in order): queue instead of posting
+  document.addEventListener('htmx:beforeRequest', (event) => {
+    if (isToggle(event.detail.elt) && (!navigator.onLine || pending)) {
+      event.preventDefault();
+      queueToggle(event.detail.elt);
+    }
+  });
+
+  // The request couldn't reach the server (a flaky connection that still reports online)
+  document.addEventListener('htmx:sendError', (event) => {
+    if (isToggle(event.detail.elt)) {
+      queueToggle(event.detail.elt);
+    }
+  });
+
+  // Show taps still waiting to be synced, e.g. on a cached copy of the dashboard
+  document.addEventListener('DOMContentLoaded', () => {
+    showQueued().then((count) => {
+      if (count) {
+        pending = true;
+        replayNow();
+      }
+    }).catch(() => {});
+  });
+
+  // Rows swapped in (another week, or after a replay) may still have queued taps
+  document.addEventListener('htmx:afterSettle', () => {
+    showQueued().catch(() => {});
+  });
+
+  window.addEventListener('online', replayNow);
+
+  if ('serviceWorker' in navigator) {
+    navigator.serviceWorker.addEventListener('message', (event) => {
+      if (event.data && event.data.type === 'toggles-replayed') {
+        queue.mine(currentUser()).then((left) => {
+          pending = left.length > 0;
+          showResults(event.data.results);
+        }).catch(() => {});
+      }
+    });
+  }
+})(self);
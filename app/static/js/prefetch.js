@@ -0,0 +1,56 @@
+// ChoreChamp week prefetching
+//
+// Links marked data-prefetch (the previous/next week links) are fetched
+// before they're clicked - once the page is idle, or as soon as the pointer
+// rests on one. The server sends the week fragment with an ETag, so the
+// browser keeps it and the click only has to revalidate it (a 304 when
+// nothing changed) before htmx swaps the week in place.
+(function () {
+  const HOVER_DELAY = 100;
+  const fetched = new Set();
+
+  function prefetch(link) {
+    const url = link.getAttribute('hx-get');
+    if (!url || fetched.has(url) || !navigator.onLine) {
+      return;
+    }
+    fetched.add(url);
+    // Same URL and HX-Request header as htmx's request, so the browser's cached copy matches it
+    fetch(url, { credentials: 'same-origin', headers: { 'HX-Request': 'true' } })
+      .then((response) => response.text())
+      .catch(() => fetched.delete(url));
+  }
+
+  function prefetchAll() {
+    document.querySelectorAll('[data-prefetch]').forEach(prefetch);
+  }
+
+  function whenIdle(callback) {
+    if ('requestIdleCallback' in window) {
+      window.requestIdleCallback(callback, { timeout: 2000 });
+    } else {
+      window.setTimeout(callback, 500);
+    }
+  }
+
+  let hoverTimer = null;
+
+  document.addEventListener('mouseover', (event) => {
+    const link = event.target.closest && event.target.closest('[data-prefetch]');
+    if (link) {
+      window.clearTimeout(hoverTimer);
+      hoverTimer = window.setTimeout(() => prefetch(link), HOVER_DELAY);
+    }
+  });
+
+  document.addEventListener('touchstart', (event) => {
+    const link = event.target.closest && event.target.closest('[data-prefetch]');
+    if (link) {
+      prefetch(link);
+    }
+  }, { passive: true });
+
+  // Once the page (or a newly swapped-in week) has settled
+  document.addEventListener('DOMContentLoaded', () => whenIdle(prefetchAll));
+  document.addEventListener('htmx:afterSettle', () => whenIdle(prefetchAll));
+})();
@@ -0,0 +1,118 @@
+// ChoreChamp Service Worker - generated by the server from the static asset manifest
+importScripts({{ asset_url('offline.js')|tojson }});
+
+const CACHE_PREFIX = 'chorechamp-';
+const CACHE_NAME = {{ cache_name|tojson }};
+const OFFLINE_URL = {{ offline_url|tojson }};
+
+// Assets to cache immediately on install
+const PRECACHE_ASSETS = {{ precache|tojson }};
+
+// URLs under these prefixes have a content hash in their name, so a cached copy is never stale
+const IMMUTABLE_PREFIXES = {{ immutable_prefixes|tojson }};
+
+function isImmutable(url) {
+  return IMMUTABLE_PREFIXES.some((prefix) => url.pathname.startsWith(prefix));
+}
+
+// Install event - fill this version's cache; the worker only installs if every asset is fetched
+self.addEventListener('install', (event) => {
+  event.waitUntil(
+    caches.open(CACHE_NAME)
+      .then((cache) => cache.addAll(
+        // Skip the HTTP cache for files without hashed names, which may be stale there
+        PRECACHE_ASSETS.map((url) => new Request(url, { cache: 'reload' }))
+      ))
+      .then(() => self.skipWaiting())
+  );
+});
+
+// Activate event - drop every other version's cache before taking over open pages
+self.addEventListener('activate', (event) => {
+  event.waitUntil(
+    caches.keys().then((cacheNames) => {
+      return Promise.all(
+        cacheNames
+          .filter((name) => name.startsWith(CACHE_PREFIX) && name !== CACHE_NAME)
+          .map((name) => {
+            console.log('ChoreChamp: Deleting old cache', name);
+            return caches.delete(name);
+          })
+      );
+    }).then(() => self.clients.claim())
+  );
+});
+
+function putInCache(request, response) {
+  if (response.ok) {
+    const responseClone = response.clone();
+    caches.open(CACHE_NAME).then((cache) => cache.put(request, responseClone));
+  }
+  return response;
+}
+
+// Fetch event - network first for pages, cache first for assets
+self.addEventListener('fetch', (event) => {
+  // Skip non-GET requests
+  if (event.request.method !== 'GET') {
+    return;
+  }
+
+  const url = new URL(event.request.url);
+
+  // Skip cross-origin requests (CDN fallbacks when assets aren't built)
+  if (url.origin !== self.location.origin) {
+    return;
+  }
+
+  // HTMX fragments carry their own ETags - leave them to the browser's HTTP cache
+  if (event.request.headers.get('HX-Request')) {
+    return;
+  }
+
+  // For HTML pages - network first, then cache, then offline page
+  if ((event.request.headers.get('accept') || '').includes('text/html')) {
+    event.respondWith(
+      fetch(event.request)
+        .then((response) => putInCache(event.request, response))
+        .catch(() => caches.match(event.request)
+          .then((cachedResponse) => cachedResponse || caches.match(OFFLINE_URL)))
+    );
+    return;
+  }
+
+  // Hashed assets - serve from cache without revalidating
+  if (isImmutable(url)) {
+    event.respondWith(
+      caches.match(event.request)
+        .then((cachedResponse) => cachedResponse ||
+          fetch(event.request).then((response) => putInCache(event.request, response)))
+    );
+    return;
+  }
+
+  // For other assets - cache first, then update the cache in the background
+  event.respondWith(
+    caches.match(event.request)
+      .then((cachedResponse) => {
+        const fetched = fetch(event.request).then((response) => putInCache(event.request, response));
+        if (cachedResponse) {
+          event.waitUntil(fetched.catch(() => {}));
+          return cachedResponse;
+        }
+        return fetched;
+      })
+  );
+});
+
+// Background Sync - replay chore toggles queued while offline, then tell open pages
+self.addEventListener('sync', (event) => {
+  if (event.tag === ChoreChampToggles.SYNC_TAG) {
+    event.waitUntil(
+      ChoreChampToggles.replay()
+        .then((results) => self.clients.matchAll().then((clients) => {
+          clients.forEach((client) => client.postMessage({ type: 'toggles-replayed', results }));
+        }))
+    );
+  }
+});
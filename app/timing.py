@@ -0,0 +1,104 @@
+"""
+Per-request timing breakdown sent as a ``Server-Timing`` header.
+
+Time is split into SQL (``db``), template rendering (``render``) and
+PIN/password hashing (``auth``), so browser devtools show where a slow
+page or HTMX swap spent its time. Lazy loads triggered from a template
+count towards both ``db`` and ``render``.
+"""
+import json
+import time
+from contextlib import contextmanager
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+# Order and descriptions of the phases in the header
+PHASES = {
+    'db': 'SQL',
+    'render': 'Templates',
+    'auth': 'PIN/password hashing',
+}
+
+
+def add_timing(name, seconds):
+    """Add time to a phase of the current request (no-op outside a request)."""
+    if has_request_context() and 'server_timing' in g:
+        g.server_timing[name] = g.server_timing.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(name):
+    """Time a block and add it to a phase of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(name, time.perf_counter() - start)
+
+
+def init_server_timing(app, engines):
+    """Collect per-request timings and send them in a Server-Timing header."""
+    if not app.config.get('SERVER_TIMING_ENABLED', True):
+        return
+
+    for engine in engines:
+        if engine is not None:
+            event.listen(engine, 'before_cursor_execute', _start_statement)
+            event.listen(engine, 'after_cursor_execute', _end_statement)
+
+    before_render_template.connect(_start_render, app)
+    template_rendered.connect(_end_render, app)
+
+    @app.before_request
+    def start_server_timing():
+        g.server_timing = {}
+        g.server_timing_start = time.perf_counter()
+
+    @app.after_request
+    def send_server_timing(response):
+        timings = g.pop('server_timing', None)
+        if timings is None:
+            return response
+        timings['total'] = time.perf_counter() - g.pop('server_timing_start')
+
+        response.headers['Server-Timing'] = format_server_timing(timings)
+        if app.config.get('SERVER_TIMING_LOG'):
+            app.logger.info(json.dumps({
+                'event': 'request_timing',
+                'endpoint': request.endpoint,
+                'method': request.method,
+                'status': response.status_code,
+                **{f'{name}_ms': round(seconds * 1000, 1) for name, seconds in timings.items()},
+            }))
+        return response
+
+
+def format_server_timing(timings):
+    """Format {phase: seconds} as a Server-Timing header value."""
+    parts = []
+    for name in [*PHASES, 'total']:
+        if name in timings:
+            desc = PHASES.get(name, 'Total')
+            parts.append(f'{name};dur={timings[name] * 1000:.1f};desc="{desc}"')
+    return ', '.join(parts)
+
+
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('server_timing_start', []).append(time.perf_counter())
+
+
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('server_timing_start')
+    if starts:
+        add_timing('db', time.perf_counter() - starts.pop())
+
+
+def _start_render(sender, template, context, **extra):
+    if has_request_context():
+        g.setdefault('render_starts', []).append(time.perf_counter())
+
+
+def _end_render(sender, template, context, **extra):
+    if has_request_context() and g.get('render_starts'):
+        add_timing('render', time.perf_counter() - g.render_starts.pop())
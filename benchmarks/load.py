@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test against a real gunicorn server.
+
+Starts ChoreChamp under gunicorn (using gunicorn.conf.py) on a seeded
+database, then runs virtual users - children toggling chores and loading
+their dashboard, parents checking the admin dashboard and paying - in a
+configurable mix for a fixed duration. Reports throughput, latency
+percentiles and error rates per scenario, the "database is locked" errors
+and worker timeouts found in the server log, and any duplicate rows the
+run left behind.
+
+Usage:
+    python -m benchmarks.load                                   # 20 users for 30s on a temporary SQLite database
+    python -m benchmarks.load --users 50 --duration 60 --workers 4 --worker-class gthread
+    python -m benchmarks.load --mix child_toggle=50,parent_pay=50   # hammer the write paths
+    python -m benchmarks.load --database postgresql://chorechamp@localhost/chorechamp
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from benchmarks.run import create_benchmark_app, percentile, prepare_database
+from benchmarks.smtp_sink import SMTPSink
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), 'load-results.json')
+
+# Relative weight of each scenario in a virtual user's loop
+DEFAULT_MIX = {
+    'child_toggle': 60,
+    'child_dashboard': 20,
+    'child_login': 5,
+    'parent_dashboard': 5,
+    'parent_pay': 5,
+    'api_week': 5,
+}
+
+# Final line of a traceback caused by lock contention, per database
+LOCK_ERROR = re.compile(
+    r'^sqlalchemy\.exc\.OperationalError: .*(database is locked|deadlock detected|could not serialize access)', re.M
+)
+WORKER_TIMEOUT = re.compile(r'WORKER TIMEOUT')
+SERVER_EXCEPTION = re.compile(r'Exception on \S+ \[\w+\]')
+
+# Rows that must be unique by these columns; duplicates mean a race got through
+DUPLICATE_CHECKS = {
+    'chore_logs': ['user_id', 'chore_id', 'completed_date', 'completion_slot'],
+    'weekly_chore_assignments': ['week_id', 'chore_id', 'user_id'],
+    'weekly_payments': ['week_id', 'user_id'],
+    'week_periods': ['start_date'],
+}
+
+
+class Client:
+    """A minimal HTTP client that keeps cookies and doesn't follow redirects."""
+
+    def __init__(self, host, port, timeout=30):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.cookies = {}
+
+    def request(self, method, path, form=None, json_body=None, headers=None):
+        """Send a request. Returns (status, headers, body)."""
+        headers = dict(headers or {})
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            body = json.dumps(json_body)
+            headers['Content-Type'] = 'application/json'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        finally:
+            connection.close()
+
+        for cookie in response.headers.get_all('Set-Cookie') or []:
+            name, _, value = cookie.split(';', 1)[0].partition('=')
+            self.cookies[name.strip()] = value
+        return response.status, response.headers, data
+
+
+class VirtualUser(threading.Thread):
+    """
+    One simulated family member looping over scenarios until the deadline.
+
+    Each user acts for one child (several users may share a child, which is
+    what makes concurrent toggles of the same chore possible) and logs in
+    as that child, as a parent and to the API before the run starts.
+    """
+
+    def __init__(self, server, target, mix, seed):
+        super().__init__(daemon=True)
+        self.server = server
+        self.target = target
+        self.scenarios = list(mix)
+        self.weights = list(mix.values())
+        self.deadline = None
+        self.random = random.Random(seed)
+        self.samples = []
+        self.errors = Counter()
+
+    def login(self):
+        """Log in as the child, a parent and to the API."""
+        self.child = self._login_child()
+        self.parent = Client(*self.server)
+        status, headers, _ = self.parent.request('POST', '/login', form={
+            'login_type': 'adult', 'email': self.target['parent_email'], 'password': self.target['password'],
+        })
+        self._expect_redirect(status, headers, 'parent login')
+
+        api = Client(*self.server)
+        status, _, body = api.request('POST', '/api/v1/auth/login', json_body={
+            'type': 'pin', 'user_id': self.target['child_id'], 'pin': self.target['pin'],
+        })
+        if status != 200:
+            raise RuntimeError(f"API login failed with {status}")
+        self.api = api
+        self.api_headers = {'Authorization': f"Bearer {json.loads(body)['access_token']}"}
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            scenario = self.random.choices(self.scenarios, self.weights)[0]
+            start = time.perf_counter()
+            try:
+                error = getattr(self, scenario)()
+            except (OSError, http.client.HTTPException) as e:
+                error = type(e).__name__
+            self.samples.append((scenario, (time.perf_counter() - start) * 1000, error))
+            if error:
+                self.errors[f'{scenario}: {error}'] += 1
+
+    # Scenarios return None on success or a short description of the failure
+
+    def child_toggle(self):
+        assignment_id, slots = self.random.choice(self.target['assignments'])
+        status, headers, _ = self.child.request('POST', '/chores/toggle', form={
+            'assignment_id': assignment_id,
+            'date': self.random.choice(self.target['days']),
+            'slot': self.random.randint(1, slots),
+        })
+        return self._check(status, headers)
+
+    def child_dashboard(self):
+        # The page, then the history chart it loads after first paint
+        return (self._check(*self.child.request('GET', '/')[:2])
+                or self._check(*self.child.request('GET', '/history-chart')[:2]))
+
+    def child_login(self):
+        try:
+            self._login_child()
+        except RuntimeError as e:
+            return str(e)
+
+    def parent_dashboard(self):
+        return self._check(*self.parent.request('GET', '/admin/')[:2])
+
+    def parent_pay(self):
+        path = f"/admin/weeks/{self.target['pay_week_id']}/pay/{self.target['child_id']}"
+        status, headers, _ = self.parent.request('POST', path, form={})
+        return self._check(status, headers, redirect_ok=True)
+
+    def api_week(self):
+        return self._check(*self.api.request('GET', '/api/v1/weeks/current', headers=self.api_headers)[:2])
+
+    def _login_child(self):
+        client = Client(*self.server)
+        status, headers, _ = client.request('POST', '/login', form={
+            'login_type': 'child', 'user_id': self.target['child_id'], 'pin': self.target['pin'],
+        })
+        self._expect_redirect(status, headers, 'child login')
+        return client
+
+    @staticmethod
+    def _expect_redirect(status, headers, what):
+        if status != 302 or headers.get('Location', '').endswith('/login'):
+            raise RuntimeError(f"{what} failed with {status}")
+
+    @staticmethod
+    def _check(status, headers, redirect_ok=False):
+        if status >= 400:
+            return f'HTTP {status}'
+        if status in (301, 302) and (not redirect_ok or headers.get('Location', '').endswith('/login')):
+            return 'redirected to login' if headers.get('Location', '').endswith('/login') else f'HTTP {status}'
+        return None
+
+
+def parse_mix(text):
+    """Parse 'scenario=weight,...' into a mix, checking the scenario names."""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def build_targets(app, users):
+    """
+    Pick the child, parent, assignments and week each virtual user works on.
+
+    Users act for the current week (so toggles aren't refused as paid) and
+    pay the previous one.
+    """
+    from app.models.chore import ChoreDefinition
+    from app.models.user import User
+    from app.models.week import WeekPeriod, WeeklyChoreAssignment
+    from app.services.seed_service import SeedService
+
+    with app.app_context():
+        today = datetime.now().date()
+        week = WeekPeriod.get_or_create_current_week()
+        previous = WeekPeriod.get_or_create_week_for_date(week.start_date - timedelta(days=7))
+        children = User.query.filter_by(is_admin=False, is_active=True).order_by(User.id).all()
+        parents = User.query.filter_by(is_admin=True, is_active=True).order_by(User.id).all()
+        if not children or not parents:
+            raise SystemExit("The database needs at least one active child and parent.")
+
+        days = [day.isoformat() for day in week.get_days() if day <= today]
+        targets = []
+        for index in range(users):
+            child = children[index % len(children)]
+            assignments = (
+                WeeklyChoreAssignment.query.filter_by(week_id=week.id, user_id=child.id)
+                .join(ChoreDefinition).with_entities(WeeklyChoreAssignment.id, ChoreDefinition.times_per_day).all()
+            )
+            targets.append({
+                'child_id': child.id,
+                'pin': SeedService.PIN,
+                'parent_email': parents[index % len(parents)].email,
+                'password': SeedService.PASSWORD,
+                'assignments': [(row.id, row.times_per_day or 1) for row in assignments],
+                'days': days,
+                'pay_week_id': previous.id,
+            })
+        return targets
+
+
+def find_duplicates(app):
+    """Count groups of rows that should have been unique, per table."""
+    from sqlalchemy import text
+
+    from app import db
+
+    duplicates = {}
+    with app.app_context():
+        for table, columns in DUPLICATE_CHECKS.items():
+            key = ', '.join(columns)
+            duplicates[table] = db.session.execute(text(
+                f"SELECT COUNT(*) FROM (SELECT 1 FROM {table} GROUP BY {key} HAVING COUNT(*) > 1) AS d"
+            )).scalar()
+        db.session.remove()
+    return duplicates
+
+
+def scan_server_log(path):
+    """Count lock errors, worker timeouts and unhandled exceptions in the gunicorn log."""
+    with open(path, errors='replace') as log_file:
+        log = log_file.read()
+    return {
+        'database_locked': len(LOCK_ERROR.findall(log)),
+        'worker_timeouts': len(WORKER_TIMEOUT.findall(log)),
+        'exceptions': len(SERVER_EXCEPTION.findall(log)),
+    }
+
+
+def start_server(database_url, port, smtp_port, workdir, workers, worker_class, threads):
+    """Start gunicorn and wait until /readyz answers. Returns (process, log path)."""
+    log_path = os.path.join(workdir, 'gunicorn.log')
+    env = dict(
+        os.environ,
+        FLASK_CONFIG='production',
+        DATABASE_URL=database_url,
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_WORKER_CLASS=worker_class,
+        GUNICORN_THREADS=str(threads),
+        PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, 'metrics'),
+        SLOW_QUERY_LOG_FILE=os.path.join(workdir, 'slow_queries.log'),
+        PROFILING_DIR=os.path.join(workdir, 'profiles'),
+        MAIL_SERVER='127.0.0.1',
+        MAIL_PORT=str(smtp_port),
+        MAIL_USE_TLS='false',
+        MAIL_DEFAULT_SENDER='ChoreChamp <load@chorechamp.local>',
+        # Every virtual user logs in from 127.0.0.1, far faster than any family
+        LOGIN_RATE_LIMIT_ENABLED='false',
+    )
+    env.pop('MAIL_USERNAME', None)
+    env.pop('MAIL_PASSWORD', None)
+
+    log_file = open(log_path, 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+        cwd=ROOT, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+    )
+    log_file.close()
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            with open(log_path) as log:
+                raise SystemExit(f"gunicorn exited with {process.returncode}:\n{log.read()[-2000:]}")
+        try:
+            status, _, _ = Client('127.0.0.1', port, timeout=2).request('GET', '/readyz')
+            if status == 200:
+                return process, log_path
+        except OSError:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise SystemExit("gunicorn did not become ready within 60 seconds")
+
+
+def summarize(samples, elapsed):
+    """Summarize (scenario, ms, error) samples overall and per scenario."""
+    def stats(rows):
+        durations = [ms for _, ms, _ in rows]
+        errors = sum(1 for _, _, error in rows if error)
+        return {
+            'requests': len(rows),
+            'throughput_rps': round(len(rows) / elapsed, 1),
+            'errors': errors,
+            'error_rate': round(errors / len(rows), 4) if rows else 0.0,
+            'p50_ms': round(percentile(durations, 50), 1),
+            'p90_ms': round(percentile(durations, 90), 1),
+            'p99_ms': round(percentile(durations, 99), 1),
+            'max_ms': round(max(durations, default=0), 1),
+        }
+
+    by_scenario = {}
+    for sample in samples:
+        by_scenario.setdefault(sample[0], []).append(sample)
+    return stats(samples), {name: stats(rows) for name, rows in sorted(by_scenario.items())}
+
+
+def run(database_url=None, households=2, years=0.5, users=20, duration=30, mix=None,
+        workers=2, worker_class='sync', threads=4, log=print):
+    """
+    Run a load test.
+
+    Returns:
+        dict: Overall and per-scenario results, server log counts and duplicates
+    """
+    mix = mix or DEFAULT_MIX
+    workdir = tempfile.mkdtemp(prefix='chorechamp-load-')
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+
+    with SMTPSink() as sink:
+        app = create_benchmark_app(database_url, sink.port)
+        prepare_database(app, households, years, log)
+        targets = build_targets(app, users)
+
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        log(f"Starting gunicorn ({workers} {worker_class} worker(s)) on port {port}...")
+        process, log_path = start_server(database_url, port, sink.port, workdir, workers, worker_class, threads)
+
+        try:
+            log(f"Logging in {users} virtual user(s)...")
+            virtual_users = [
+                VirtualUser(('127.0.0.1', port), target, mix, seed=index)
+                for index, target in enumerate(targets)
+            ]
+            for user in virtual_users:
+                user.login()
+
+            log(f"Running for {duration}s...")
+            deadline = time.monotonic() + duration
+            started = time.monotonic()
+            for user in virtual_users:
+                user.deadline = deadline
+                user.start()
+            for user in virtual_users:
+                user.join()
+            elapsed = time.monotonic() - started
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+        emails = sink.messages
+
+    samples = [sample for user in virtual_users for sample in user.samples]
+    errors = Counter()
+    for user in virtual_users:
+        errors.update(user.errors)
+    overall, scenarios = summarize(samples, elapsed)
+
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'database': database_url.split('@')[-1],
+            'users': users,
+            'duration_s': round(elapsed, 1),
+            'workers': workers,
+            'worker_class': worker_class,
+            'threads': threads if worker_class == 'gthread' else 1,
+            'mix': mix,
+            'emails_sent': emails,
+            'server_log': log_path,
+        },
+        'overall': overall,
+        'scenarios': scenarios,
+        'errors': dict(errors.most_common()),
+        'server': scan_server_log(log_path),
+        'duplicates': find_duplicates(app),
+    }
+
+
+def print_report(results):
+    overall = results['overall']
+    print(f"\n{overall['requests']} requests in {results['meta']['duration_s']}s: "
+          f"{overall['throughput_rps']} req/s, {overall['error_rate']:.2%} errors, "
+          f"p50 {overall['p50_ms']}ms, p99 {overall['p99_ms']}ms")
+    print(f"\n  {'scenario':18} {'req/s':>8} {'errors':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for name, stats in results['scenarios'].items():
+        print(f"  {name:18} {stats['throughput_rps']:8} {stats['errors']:8} {stats['p50_ms']:7}ms "
+              f"{stats['p90_ms']:7}ms {stats['p99_ms']:7}ms {stats['max_ms']:7}ms")
+
+    if results['errors']:
+        print("\nErrors:")
+        for error, count in results['errors'].items():
+            print(f"  {count:6}  {error}")
+
+    server = results['server']
+    print(f"\nServer log: {server['database_locked']} 'database is locked', "
+          f"{server['worker_timeouts']} worker timeouts, {server['exceptions']} unhandled exceptions "
+          f"({results['meta']['server_log']})")
+
+    duplicates = {table: count for table, count in results['duplicates'].items() if count}
+    if duplicates:
+        print("Duplicate rows: " + ', '.join(f"{table} {count}" for table, count in duplicates.items()))
+    else:
+        print("Duplicate rows: none")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test ChoreChamp under gunicorn.')
+    parser.add_argument('--database', help='database URL (default: seed a temporary SQLite file)')
+    parser.add_argument('--households', type=int, default=2, help='households to seed into an empty database')
+    parser.add_argument('--years', type=float, default=0.5, help='years of history to seed')
+    parser.add_argument('--users', type=int, default=20, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run for')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='scenario weights, e.g. child_toggle=60,parent_pay=10 '
+                             f"(scenarios: {', '.join(DEFAULT_MIX)})")
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--worker-class', choices=['sync', 'gthread'], default='sync')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gthread worker')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='where to write the JSON results')
+    args = parser.parse_args(argv)
+
+    print("ChoreChamp Load Test")
+    print("=" * 40)
+    results = run(args.database, args.households, args.years, args.users, args.duration, args.mix,
+                  args.workers, args.worker_class, args.threads)
+    print_report(results)
+
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    # Duplicates are data corruption, not just slowness
+    return 1 if any(results['duplicates'].values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for ChoreChamp's hot paths.
+
+Runs each page, API call and service method against a large seeded
+database through the Flask test client, and reports latency percentiles,
+SQL statements per call and peak Python memory. Results are written as
+JSON and compared with a stored baseline.
+
+Pages with a per-worker cache (rendered weeks and the history chart) are
+benchmarked twice: as-is, which after warmup times cache hits, and as
+"(cold)", which empties the caches before every call to time a full render.
+
+Usage:
+    python -m benchmarks.run                                # seed a temporary database
+    python -m benchmarks.run --database sqlite:///instance/scale.db
+    python -m benchmarks.run --only dashboard.index --iterations 50
+    python -m benchmarks.run --save-baseline                # store results as the baseline
+    python -m benchmarks.run --threshold 0.25               # fail on >25% slower p50
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.smtp_sink import SMTPSink
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), 'results.json')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Fraction by which a benchmark's p50 may exceed the baseline before it counts as a regression
+DEFAULT_THRESHOLD = 0.20
+
+
+def percentile(values, pct):
+    """Get the pct-th percentile of values, interpolating between ranks."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def measure(fn, iterations, warmup=2):
+    """
+    Time a callable and count its SQL statements and peak memory.
+
+    Memory is measured on a separate call so tracemalloc's overhead
+    doesn't distort the timings.
+    """
+    from app.query_budget import QueryCounter
+
+    for _ in range(warmup):
+        fn()
+
+    durations = []
+    queries = []
+    for _ in range(iterations):
+        with QueryCounter() as counter:
+            start = time.perf_counter()
+            fn()
+            durations.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(durations, 50), 3),
+        'p90_ms': round(percentile(durations, 90), 3),
+        'p99_ms': round(percentile(durations, 99), 3),
+        'mean_ms': round(statistics.mean(durations), 3),
+        'max_ms': round(max(durations), 3),
+        'queries': int(statistics.median(queries)),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare results with a baseline.
+
+    Returns:
+        list: One message per benchmark whose p50 grew by more than
+            ``threshold`` or that runs more queries than before
+    """
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous:
+            continue
+        if result['p50_ms'] > previous['p50_ms'] * (1 + threshold):
+            regressions.append(
+                f"{name}: p50 {result['p50_ms']:.2f}ms vs baseline {previous['p50_ms']:.2f}ms "
+                f"(+{(result['p50_ms'] / previous['p50_ms'] - 1) * 100:.0f}%)"
+            )
+        if result['queries'] > previous['queries']:
+            regressions.append(f"{name}: {result['queries']} queries vs baseline {previous['queries']}")
+    return regressions
+
+
+def create_benchmark_app(database_url, smtp_port):
+    """Create a production-configured app against the benchmark database and SMTP sink."""
+    from app import create_app
+    from app.config import config
+
+    config['benchmark'] = type('BenchmarkConfig', (config['production'],), {
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'MAIL_SERVER': '127.0.0.1',
+        'MAIL_PORT': smtp_port,
+        'MAIL_USE_TLS': False,
+        'MAIL_USERNAME': None,
+        'MAIL_PASSWORD': None,
+        'MAIL_DEFAULT_SENDER': 'ChoreChamp <bench@chorechamp.local>',
+        'MAIL_SUPPRESS_SEND': False,
+        'QUERY_BUDGET_ENABLED': False,
+        'SLOW_QUERY_THRESHOLD_MS': None,
+        'PROFILING_ENABLED': False,
+    })
+    return create_app('benchmark')
+
+
+def prepare_database(app, households, years, log):
+    """Create the schema and seed it unless it already has data."""
+    from app import db
+    from app.migrations import run_migrations
+    from app.models.user import User
+    from app.services.seed_service import SeedService
+
+    with app.app_context():
+        run_migrations(db.engine, log=lambda message: None)
+        if User.query.filter_by(is_admin=False).first() is None:
+            log(f"Seeding {households} household(s) with {years:g} year(s) of history...")
+            SeedService().seed_scale(households=households, years=years, log=log)
+
+
+def build_benchmarks(app):
+    """
+    Log in as a child and a parent and build the benchmark callables.
+
+    HTTP benchmarks must run outside an app context - a request reuses an
+    already pushed context, which would share ``g`` (and the logged-in user)
+    between the clients. Service benchmarks push their own, as the
+    scheduler does.
+
+    Returns:
+        dict: {name: callable}
+    """
+    from app.models.user import User
+    from app.models.week import WeekPeriod, WeeklyChoreAssignment
+    from app.services.allowance_service import AllowanceService
+    from app.services.email_service import EmailService
+    from app.services.seed_service import SeedService
+
+    with app.app_context():
+        child = User.query.filter_by(is_admin=False, is_active=True).order_by(User.id).first()
+        admin = User.query.filter_by(is_admin=True).order_by(User.id).first()
+        child_id, admin_email = child.id, admin.email
+        week = WeekPeriod.get_or_create_current_week()
+        week_id, monday = week.id, week.start_date
+
+    def checked(response):
+        if response.status_code >= 400:
+            raise RuntimeError(f"{response.request.path} returned {response.status_code}")
+        return response
+
+    child_client = app.test_client()
+    checked(child_client.post('/login', data={'login_type': 'child', 'user_id': child_id, 'pin': SeedService.PIN}))
+    checked(child_client.get('/'))  # creates this week's assignments if needed
+    with app.app_context():
+        assignment_id = WeeklyChoreAssignment.query.filter_by(week_id=week_id, user_id=child_id).first().id
+
+    admin_client = app.test_client()
+    checked(admin_client.post('/login', data={
+        'login_type': 'adult', 'email': admin_email, 'password': SeedService.PASSWORD
+    }))
+
+    api_client = app.test_client()
+    token = checked(api_client.post('/api/v1/auth/login', json={
+        'type': 'pin', 'user_id': child_id, 'pin': SeedService.PIN
+    })).get_json()['access_token']
+    api_headers = {'Authorization': f'Bearer {token}'}
+
+    toggle_data = {'assignment_id': assignment_id, 'date': monday.isoformat(), 'slot': 1}
+
+    def in_context(fn):
+        def call():
+            with app.app_context():
+                return fn()
+        return call
+
+    def cold(fn):
+        def call():
+            for cache in ('fragment_cache', 'history_cache'):
+                app.extensions.pop(cache, None)
+            return fn()
+        return call
+
+    def dashboard():
+        return checked(child_client.get('/'))
+
+    def history_chart():
+        return checked(child_client.get('/history-chart'))
+
+    def child_dashboard():
+        return checked(admin_client.get(f'/admin/view-child/{child_id}'))
+
+    return {
+        'dashboard.index': dashboard,
+        'dashboard.index (cold)': cold(dashboard),
+        'dashboard.toggle_chore': lambda: checked(child_client.post('/chores/toggle', data=toggle_data)),
+        'dashboard.history_chart': history_chart,
+        'dashboard.history_chart (cold)': cold(history_chart),
+        'admin.index': lambda: checked(admin_client.get('/admin/')),
+        'admin.view_child_dashboard': child_dashboard,
+        'admin.view_child_dashboard (cold)': cold(child_dashboard),
+        'api.current_week': lambda: checked(api_client.get('/api/v1/weeks/current', headers=api_headers)),
+        'AllowanceService.calculate_weekly_summary':
+            in_context(lambda: AllowanceService().calculate_weekly_summary(child_id, week_id)),
+        'AllowanceService.get_unpaid_weeks': in_context(lambda: AllowanceService().get_unpaid_weeks(child_id)),
+        'EmailService.send_weekly_summary': in_context(lambda: EmailService().send_weekly_summary(week_id)),
+    }
+
+
+def run(database_url=None, households=3, years=2.0, iterations=20, only=None, log=print):
+    """
+    Run the benchmarks.
+
+    Returns:
+        dict: {'meta': {...}, 'benchmarks': {name: measurement}}
+    """
+    from app import db
+
+    if database_url is None:
+        workdir = tempfile.mkdtemp(prefix='chorechamp-bench-')
+        database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    with SMTPSink() as sink:
+        app = create_benchmark_app(database_url, sink.port)
+        prepare_database(app, households, years, log)
+
+        results = {}
+        for name, fn in build_benchmarks(app).items():
+            if only and name not in only:
+                continue
+            results[name] = measure(fn, iterations)
+            log(f"  {name:45} p50 {results[name]['p50_ms']:8.2f}ms  p99 {results[name]['p99_ms']:8.2f}ms  "
+                f"{results[name]['queries']:5} queries  {results[name]['peak_kib']:9.1f} KiB")
+
+        with app.app_context():
+            # There's only a separate reader engine for SQLite
+            for engine in [*db.engines.values(), app.extensions['db_reader']]:
+                if engine is not None:
+                    engine.dispose()
+
+        emails = sink.messages
+
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'database': database_url.split('@')[-1],
+            'iterations': iterations,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'emails_sent': emails,
+        },
+        'benchmarks': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark ChoreChamp hot paths.')
+    parser.add_argument('--database', help='database URL to benchmark (default: seed a temporary SQLite file)')
+    parser.add_argument('--households', type=int, default=3, help='households to seed into an empty database')
+    parser.add_argument('--years', type=float, default=2.0, help='years of history to seed')
+    parser.add_argument('--iterations', type=int, default=20, help='timed calls per benchmark')
+    parser.add_argument('--only', action='append', help='run only this benchmark (repeatable)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='where to write the JSON results')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'allowed p50 slowdown before failing (default {DEFAULT_THRESHOLD})')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results to the baseline file')
+    args = parser.parse_args(argv)
+
+    print("ChoreChamp Benchmarks")
+    print("=" * 40)
+    results = run(args.database, args.households, args.years, args.iterations, args.only)
+
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against (run with --save-baseline to create one).")
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        regressions = compare(results, json.load(baseline_file), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print(f"\nNo regressions against {args.baseline} (threshold {args.threshold:.0%}).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""A minimal local SMTP server that accepts and discards every message."""
+import socketserver
+import threading
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Speak just enough SMTP for smtplib to deliver a message."""
+
+    def handle(self):
+        self._reply('220 chorechamp-sink ready')
+        in_data = False
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if in_data:
+                if line.rstrip(b'\r\n') == b'.':
+                    in_data = False
+                    self.server.messages += 1
+                    self._reply('250 OK')
+                continue
+
+            command = line.strip().split(b' ', 1)[0].upper()
+            if command == b'EHLO':
+                self._reply('250 chorechamp-sink')
+            elif command == b'DATA':
+                in_data = True
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+            elif command == b'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('250 OK')
+
+    def _reply(self, text):
+        self.wfile.write(text.encode() + b'\r\n')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """
+    SMTP server on localhost that counts and drops messages.
+
+    Example:
+        with SMTPSink() as sink:
+            app.config['MAIL_PORT'] = sink.port
+            ...
+            print(sink.messages)
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), _SinkHandler)
+        self.messages = 0
+        self.port = self.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+ChoreChamp Static Asset Build
+
+Compiles the Tailwind CSS (purged against the templates and minified) and
+copies the HTMX, Alpine.js and Chart.js bundles out of node_modules, plus
+our own scripts, into app/static/dist, each with a content hash in its
+filename. A manifest maps the logical names used in templates to the hashed
+files, so a changed file gets a new URL and the old one can be cached forever.
+
+Uses only the standard library (plus Node for the Tailwind CLI), so it runs
+in the Docker build stage without the app's Python dependencies.
+
+Usage:
+    npm install                   # Once, or after package.json changes
+    python build_assets.py        # Build into app/static/dist
+"""
+import argparse
+import hashlib
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+DIST = ROOT / 'app' / 'static' / 'dist'
+MANIFEST = 'manifest.json'
+
+CSS_SOURCE = ROOT / 'assets' / 'app.css'
+
+# Logical name -> prebuilt bundle in node_modules
+VENDORED = {
+    'htmx.js': 'htmx.org/dist/htmx.min.js',
+    'alpine.js': 'alpinejs/dist/cdn.min.js',
+    'chart.js': 'chart.js/dist/chart.umd.js',
+}
+
+# Logical name -> our own script, hashed as-is
+SCRIPTS = {
+    'offline.js': 'app/static/js/offline.js',
+    'prefetch.js': 'app/static/js/prefetch.js',
+}
+
+HASH_LENGTH = 10
+
+
+def hashed_name(name, content):
+    """Get the content-hashed filename for an asset, e.g. app.css -> app.3f2a9c1b0d.css."""
+    stem, _, extension = name.rpartition('.')
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return f'{stem}.{digest}.{extension}'
+
+
+def compile_css(node_modules):
+    """Run the Tailwind CLI and return the minified CSS."""
+    tailwind = node_modules / '.bin' / 'tailwindcss'
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / 'app.css'
+        subprocess.run(
+            [str(tailwind), '--config', str(ROOT / 'tailwind.config.js'),
+             '--input', str(CSS_SOURCE), '--output', str(output), '--minify'],
+            cwd=ROOT, check=True,
+        )
+        return output.read_bytes()
+
+
+def build(node_modules=ROOT / 'node_modules', dist=DIST):
+    """Build every asset into dist and write its manifest. Returns the manifest."""
+    if not (node_modules / '.bin' / 'tailwindcss').exists():
+        raise SystemExit(f'{node_modules} has no tailwindcss - run "npm install" first.')
+
+    contents = {'app.css': compile_css(node_modules)}
+    for name, path in VENDORED.items():
+        contents[name] = (node_modules / path).read_bytes()
+    for name, path in SCRIPTS.items():
+        contents[name] = (ROOT / path).read_bytes()
+
+    dist.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    for name, content in contents.items():
+        manifest[name] = hashed_name(name, content)
+        (dist / manifest[name]).write_bytes(content)
+
+    # Drop files from earlier builds; the manifest is written last so a
+    # running server never sees a name whose file isn't there yet
+    for path in dist.iterdir():
+        if path.name != MANIFEST and path.name not in manifest.values():
+            path.unlink() if path.is_file() else shutil.rmtree(path)
+    (dist / MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True) + '\n')
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build ChoreChamp static assets.')
+    parser.add_argument('--node-modules', type=Path, default=ROOT / 'node_modules',
+                        help='where "npm install" put the build dependencies')
+    args = parser.parse_args()
+
+    print("ChoreChamp Asset Build")
+    print("=" * 40)
+    manifest = build(args.node_modules)
+    for name, filename in sorted(manifest.items()):
+        size = (DIST / filename).stat().st_size
+        print(f"  {name:<10} -> dist/{filename} ({size / 1024:.1f} KiB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Gunicorn configuration for ChoreChamp.
+
+The app is loaded once in the master and the resulting heap is frozen so
+forked workers share its pages copy-on-write instead of each importing
+Flask, SQLAlchemy and the blueprints again.
+
+Environment variables:
+    GUNICORN_BIND          Address to listen on (default 0.0.0.0:5000)
+    GUNICORN_WORKERS       Worker processes (default 2)
+    GUNICORN_WORKER_CLASS  'sync' or 'gthread' (default sync). Use gthread
+                           when requests wait on I/O such as SMTP.
+    GUNICORN_THREADS       Threads per gthread worker (default 4)
+    GUNICORN_TIMEOUT       Seconds before a silent worker is restarted (default 120)
+    PROMETHEUS_MULTIPROC_DIR  Where workers write metrics for /metrics to merge
+                           (default a fresh temporary directory)
+
+Usage:
+    gunicorn -c gunicorn.conf.py run:app
+"""
+import gc
+import glob
+import os
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+keepalive = 5
+
+# Import the app in the master so workers inherit it
+preload_app = True
+
+# Keep worker heartbeat files off the (possibly SD card) disk
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Workers share metrics through files in this directory. It has to be set
+# before the app (and prometheus_client) is imported, and stale files from a
+# previous run would be merged in, so start from an empty directory.
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='chorechamp-metrics-')
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+for stale in glob.glob(os.path.join(os.environ['PROMETHEUS_MULTIPROC_DIR'], '*.db')):
+    os.remove(stale)
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    """Freeze everything loaded so far before the first worker is forked.
+
+    Frozen objects are never scanned by the cyclic GC, so workers don't
+    write to (and copy) the shared pages when they collect.
+    """
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Preloaded app; froze {gc.get_freeze_count()} objects")
+
+
+def post_fork(server, worker):
+    """Give each worker its own database connection pools."""
+    from app.database import dispose_engines
+    dispose_engines(server.app.wsgi())
+
+
+def child_exit(server, worker):
+    """Stop reporting live gauges for a worker that has exited."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
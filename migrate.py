@@ -2,93 +2,55 @@
 """
 ChoreChamp Database Migration Script
 
-This script applies any pending database migrations.
-It's safe to run multiple times - it only applies migrations that haven't been run yet.
+This script creates the database schema on first run and applies any pending
+migrations. The app itself never creates tables, so run this before starting
+the server. It's safe to run multiple times - applied migrations are recorded
+in the schema_version table and never run twice.
+
+Usage:
+    python migrate.py              # Apply pending migrations
+    python migrate.py --dry-run    # Report pending migrations, estimated rows and timing
 """
+import argparse
 
 from app import create_app, db
-from sqlalchemy import text, inspect
+from app.migrations import DEFAULT_CHUNK_SIZE, run_migrations
 
-app = create_app()
 
+def main():
+    parser = argparse.ArgumentParser(description='Apply pending ChoreChamp database migrations.')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='report pending migrations without applying them')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'rows per transaction for backfills (default {DEFAULT_CHUNK_SIZE})')
+    args = parser.parse_args()
 
-def column_exists(table_name, column_name):
-    """Check if a column exists in a table."""
-    with app.app_context():
-        inspector = inspect(db.engine)
-        columns = [col['name'] for col in inspector.get_columns(table_name)]
-        return column_name in columns
-
-
-def table_exists(table_name):
-    """Check if a table exists."""
-    with app.app_context():
-        inspector = inspect(db.engine)
-        return table_name in inspector.get_table_names()
-
-
-def run_migrations():
-    """Run all pending migrations."""
-    migrations_applied = 0
+    print("ChoreChamp Database Migration")
+    print("=" * 40)
 
+    app = create_app()
     with app.app_context():
-        # Migration 1: Add avatar_style to users
-        if not column_exists('users', 'avatar_style'):
-            print("  - Adding avatar_style column to users table...")
-            db.session.execute(text('ALTER TABLE users ADD COLUMN avatar_style VARCHAR(50) DEFAULT "bottts"'))
-            db.session.commit()
-            migrations_applied += 1
-
-        # Migration 2: Add avatar_seed to users
-        if not column_exists('users', 'avatar_seed'):
-            print("  - Adding avatar_seed column to users table...")
-            db.session.execute(text('ALTER TABLE users ADD COLUMN avatar_seed VARCHAR(100)'))
-            db.session.commit()
-            migrations_applied += 1
+        results = run_migrations(db.engine, dry_run=args.dry_run, chunk_size=args.chunk_size)
 
-        # Migration 3: Add is_active to users
-        if not column_exists('users', 'is_active'):
-            print("  - Adding is_active column to users table...")
-            db.session.execute(text('ALTER TABLE users ADD COLUMN is_active BOOLEAN DEFAULT 1 NOT NULL'))
-            db.session.commit()
-            migrations_applied += 1
+    applied = [r for r in results if r['status'] == 'applied']
+    pending = [r for r in results if r['status'] == 'pending']
 
-        # Migration 4: Create app_settings table
-        if not table_exists('app_settings'):
-            print("  - Creating app_settings table...")
-            db.session.execute(text('''
-                CREATE TABLE app_settings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    key VARCHAR(100) UNIQUE NOT NULL,
-                    value TEXT,
-                    is_encrypted BOOLEAN DEFAULT 0,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
-                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL
-                )
-            '''))
-            db.session.commit()
-            migrations_applied += 1
-
-        # Add future migrations here...
-        # Migration N: Description
-        # if not column_exists('table', 'column'):
-        #     db.session.execute(text('ALTER TABLE ...'))
-        #     db.session.commit()
-        #     migrations_applied += 1
-
-    return migrations_applied
+    if args.dry_run:
+        if pending:
+            total_rows = sum(r['rows'] for r in pending)
+            total_seconds = sum(r['seconds'] for r in pending)
+            print(f"\n{len(pending)} migration(s) pending: ~{total_rows} rows, ~{total_seconds:.2f}s estimated.")
+        else:
+            print("\nDatabase is up to date. No migrations needed.")
+    elif applied:
+        print(f"\n{len(applied)} migration(s) applied successfully!")
+    else:
+        print("\nDatabase is up to date. No migrations needed.")
 
 
 if __name__ == '__main__':
-    print("ChoreChamp Database Migration")
-    print("=" * 40)
-
     try:
-        count = run_migrations()
-        if count > 0:
-            print(f"\n{count} migration(s) applied successfully!")
-        else:
-            print("\nDatabase is up to date. No migrations needed.")
+        main()
     except Exception as e:
         print(f"\nError during migration: {e}")
         exit(1)
@@ -1,7 +1,12 @@
 #!/usr/bin/env python
 """Entry point for ChoreChamp application."""
 import os
+import time
+
+import click
+
 from app import create_app, db
+from app.migrations import run_migrations
 from app.models import User, ChoreDefinition, WeekPeriod
 
 app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
@@ -9,9 +14,9 @@ app = create_app(os.environ.get('FLASK_CONFIG', 'development'))
 
 @app.cli.command('init-db')
 def init_db():
-    """Initialize the database with tables."""
-    db.create_all()
-    print('Database tables created.')
+    """Create the database tables and apply pending migrations."""
+    run_migrations(db.engine)
+    print('Database is up to date.')
 
 
 @app.cli.command('seed')
@@ -79,6 +84,26 @@ def seed_data():
     print('Seed data complete!')
 
 
+@app.cli.command('seed-scale')
+@click.option('--households', default=1, show_default=True, help='Families to generate, each with its own parent and chores.')
+@click.option('--children', default=3, show_default=True, help='Children per household.')
+@click.option('--chores', default=8, show_default=True, help='Chores per household.')
+@click.option('--years', default=1.0, show_default=True, help='Years of history ending this week.')
+@click.option('--seed', default=42, show_default=True, help='Random seed, for repeatable datasets.')
+def seed_scale(households, children, chores, years, seed):
+    """Generate a large synthetic dataset for benchmarking."""
+    from app.services.seed_service import SeedService
+
+    print(f'Generating {households} household(s) x {children} children x {chores} chores over {years:g} year(s)...')
+    start = time.perf_counter()
+    counts = SeedService(seed=seed).seed_scale(households, children, chores, years)
+    elapsed = time.perf_counter() - start
+
+    print(', '.join(f'{count} {table}' for table, count in counts.items()))
+    print(f'Done in {elapsed:.1f}s. Children log in with PIN {SeedService.PIN}, '
+          f'parents as parentN@scale.chorechamp.local / {SeedService.PASSWORD}.')
+
+
 @app.shell_context_processor
 def make_shell_context():
     """Make database models available in flask shell."""
@@ -7,6 +7,7 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app, db
+from app.migrations import run_migrations
 from app.models.user import User
 from app.models.chore import ChoreDefinition
 
@@ -17,7 +18,7 @@ def setup():
 
     with app.app_context():
         print("Creating database tables...")
-        db.create_all()
+        run_migrations(db.engine)
         print("Done!")
 
         # Check if we need to seed
@@ -0,0 +1,15 @@
+/** Tailwind config for build_assets.py - keep the colors in step with base.html's CDN fallback. */
+module.exports = {
+  // Classes are also built in Python (HTMX fragments), Alpine :class strings and our scripts
+  content: ['./app/templates/**/*.html', './app/**/*.py', './app/static/js/**/*.js'],
+  theme: {
+    extend: {
+      colors: {
+        primary: '#6366F1',
+        secondary: '#10B981',
+        accent: '#F59E0B',
+        success: '#22C55E',
+      },
+    },
+  },
+};
@@ -0,0 +1,174 @@
+import json
+import re
+import shutil
+import stat
+
+import pytest
+
+import build_assets
+from app.assets import CDN_FALLBACKS, load_manifest
+
+
+@pytest.fixture
+def node_modules(tmp_path):
+    """Create a node_modules with stand-in bundles and a Tailwind CLI that copies its input."""
+    modules = tmp_path / 'node_modules'
+    for path in build_assets.VENDORED.values():
+        (modules / path).parent.mkdir(parents=True, exist_ok=True)
+        (modules / path).write_text(f'/* {path} */')
+    tailwind = modules / '.bin' / 'tailwindcss'
+    tailwind.parent.mkdir(parents=True)
+    tailwind.write_text('#!/bin/sh\n'
+                        'while [ $# -gt 0 ]; do case $1 in --input) in=$2;; --output) out=$2;; esac; shift; done\n'
+                        'cp "$in" "$out"\n')
+    tailwind.chmod(tailwind.stat().st_mode | stat.S_IEXEC)
+    return modules
+
+
+@pytest.fixture
+def built(app, tmp_path, node_modules):
+    """Build assets into a temporary static folder and point the app at it."""
+    static = tmp_path / 'static'
+    build_assets.build(node_modules, static / 'dist')
+    app.static_folder = str(static)
+    app.extensions['assets'] = load_manifest(app.static_folder)
+    return app.extensions['assets']
+
+
+class TestBuildAssets:
+    """Tests for the asset build."""
+
+    def test_hashed_name(self):
+        """Test the hash changes with the content but not the name."""
+        assert build_assets.hashed_name('app.css', b'a') == build_assets.hashed_name('app.css', b'a')
+        assert build_assets.hashed_name('app.css', b'a') != build_assets.hashed_name('app.css', b'b')
+        assert build_assets.hashed_name('chart.js', b'a').startswith('chart.')
+
+    def test_build_writes_manifest(self, tmp_path, node_modules):
+        """Test every asset is written under its hashed name and listed in the manifest."""
+        dist = tmp_path / 'dist'
+
+        manifest = build_assets.build(node_modules, dist)
+
+        assert set(manifest) == {'app.css', 'htmx.js', 'alpine.js', 'chart.js', 'offline.js', 'prefetch.js'}
+        assert json.loads((dist / 'manifest.json').read_text()) == manifest
+        assert b'@tailwind utilities' in (dist / manifest['app.css']).read_bytes()
+        assert (dist / manifest['htmx.js']).read_text() == '/* htmx.org/dist/htmx.min.js */'
+
+    def test_rebuild_removes_stale_files(self, tmp_path, node_modules):
+        """Test a rebuild drops files from the previous build."""
+        dist = tmp_path / 'dist'
+        old = build_assets.build(node_modules, dist)
+        (node_modules / build_assets.VENDORED['htmx.js']).write_text('/* htmx 2 */')
+
+        new = build_assets.build(node_modules, dist)
+
+        assert new['htmx.js'] != old['htmx.js']
+        assert not (dist / old['htmx.js']).exists()
+        assert sorted(p.name for p in dist.iterdir()) == sorted([*new.values(), 'manifest.json'])
+
+    def test_requires_node_modules(self, tmp_path):
+        """Test the build explains what to do before npm install has run."""
+        with pytest.raises(SystemExit, match='npm install'):
+            build_assets.build(tmp_path / 'node_modules', tmp_path / 'dist')
+
+
+class TestAssetUrls:
+    """Tests for serving built assets."""
+
+    def test_cdn_fallback(self, app, client):
+        """Test pages use the CDNs when the assets haven't been built."""
+        app.extensions['assets'] = {}
+
+        html = client.get('/login').data.decode()
+
+        assert 'https://cdn.tailwindcss.com' in html
+        assert CDN_FALLBACKS['htmx.js'] in html
+
+    def test_hashed_urls(self, app, client, built):
+        """Test pages link the hashed files and not the CDNs."""
+        html = client.get('/login').data.decode()
+
+        assert f'/static/dist/{built["app.css"]}' in html
+        assert f'/static/dist/{built["alpine.js"]}' in html
+        assert 'cdn.tailwindcss.com' not in html
+        assert 'unpkg.com' not in html
+
+    def test_immutable_cache_headers(self, client, built):
+        """Test hashed files are cached for a year without revalidation."""
+        response = client.get(f'/static/dist/{built["app.css"]}')
+
+        assert response.status_code == 200
+        assert response.cache_control.immutable
+        assert response.cache_control.public
+        assert response.cache_control.max_age == 365 * 24 * 60 * 60
+        assert not response.cache_control.no_cache
+
+    def test_other_static_files_not_immutable(self, client, built):
+        """Test files without a hashed name keep revalidating."""
+        for path in ['/static/dist/manifest.json', '/static/manifest.json']:
+            assert not client.get(path).cache_control.immutable
+
+    def test_unknown_asset(self, app):
+        """Test a typo in a template fails loudly."""
+        with app.test_request_context():
+            with pytest.raises(KeyError):
+                app.jinja_env.globals['asset_url']('app.js')
+
+
+@pytest.fixture
+def static_copy(app, tmp_path):
+    """Point the app at a copy of the static folder, without built assets."""
+    static = tmp_path / 'static'
+    shutil.copytree(app.static_folder, static, ignore=shutil.ignore_patterns('dist'))
+    app.static_folder = str(static)
+    app.extensions['assets'] = {}
+    return static
+
+
+def _cache_name(client):
+    return re.search(r"const CACHE_NAME = \"([^\"]+)\"", client.get('/sw.js').data.decode()).group(1)
+
+
+class TestServiceWorker:
+    """Tests for the generated service worker."""
+
+    def test_served_from_root(self, client, static_copy):
+        """Test the worker is served as JavaScript that browsers always revalidate."""
+        response = client.get('/sw.js')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/javascript'
+        assert response.cache_control.no_cache
+        assert client.get('/sw.js', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    def test_precaches_built_assets(self, app, client, static_copy, node_modules):
+        """Test the hashed assets and the offline page are precached."""
+        manifest = build_assets.build(node_modules, static_copy / 'dist')
+        app.extensions['assets'] = load_manifest(app.static_folder)
+
+        js = client.get('/sw.js').data.decode()
+
+        assert f'/static/dist/{manifest["app.css"]}' in js
+        assert '"/offline"' in js
+        assert 'const IMMUTABLE_PREFIXES = ["/static/dist/"]' in js
+
+    def test_cache_name_follows_assets(self, app, client, static_copy, node_modules):
+        """Test the cache name changes when a precached asset does."""
+        unbuilt = _cache_name(client)
+        build_assets.build(node_modules, static_copy / 'dist')
+        app.extensions['assets'] = load_manifest(app.static_folder)
+        app.extensions.pop('service_worker')
+        built = _cache_name(client)
+        (static_copy / 'icons' / 'icon-192.png').write_bytes(b'new icon')
+        app.extensions.pop('service_worker')
+
+        assert built != unbuilt
+        assert _cache_name(client) not in (built, unbuilt)
+        assert built.startswith('chorechamp-')
+
+    def test_page_registers_root_worker(self, client, static_copy):
+        """Test pages register the generated worker rather than the retired static one."""
+        html = client.get('/login').data.decode()
+
+        assert "register('/sw.js')" in html
@@ -0,0 +1,111 @@
+import argparse
+import smtplib
+
+import pytest
+
+from app import db
+from app.models.week import WeeklyPayment
+from benchmarks.load import find_duplicates, parse_mix, scan_server_log, summarize
+from benchmarks.run import compare, percentile
+from benchmarks.smtp_sink import SMTPSink
+
+
+def _results(p50_ms, queries):
+    return {'benchmarks': {'dashboard.index': {'p50_ms': p50_ms, 'queries': queries}}}
+
+
+class TestBenchmarkReport:
+    """Tests for benchmark percentiles and baseline comparison."""
+
+    def test_percentile_interpolates(self):
+        """Test percentiles interpolate between ranks."""
+        values = [4, 1, 3, 2]
+
+        assert percentile(values, 0) == 1
+        assert percentile(values, 50) == 2.5
+        assert percentile(values, 100) == 4
+        assert percentile([], 50) == 0.0
+
+    def test_within_threshold_passes(self):
+        """Test a slowdown inside the threshold is not a regression."""
+        assert compare(_results(11.0, 10), _results(10.0, 10), threshold=0.2) == []
+
+    def test_slower_p50_regresses(self):
+        """Test a slowdown past the threshold is reported."""
+        regressions = compare(_results(13.0, 10), _results(10.0, 10), threshold=0.2)
+
+        assert len(regressions) == 1
+        assert 'dashboard.index: p50 13.00ms' in regressions[0]
+
+    def test_more_queries_regresses(self):
+        """Test an extra query is reported however fast the call is."""
+        regressions = compare(_results(5.0, 11), _results(10.0, 10))
+
+        assert regressions == ['dashboard.index: 11 queries vs baseline 10']
+
+    def test_new_benchmark_ignored(self):
+        """Test benchmarks missing from the baseline are skipped."""
+        assert compare(_results(10.0, 10), {'benchmarks': {}}) == []
+
+
+class TestSMTPSink:
+    """Tests for the local SMTP sink."""
+
+    def test_counts_messages(self):
+        """Test messages sent with smtplib are accepted and counted."""
+        with SMTPSink() as sink:
+            with smtplib.SMTP('127.0.0.1', sink.port) as smtp:
+                smtp.sendmail('a@example.com', ['b@example.com'], 'Subject: Hi\r\n\r\nHello')
+                smtp.sendmail('a@example.com', ['b@example.com'], 'Subject: Again\r\n\r\n.\r\n..Dotted')
+
+        assert sink.messages == 2
+
+
+class TestLoadReport:
+    """Tests for the load test's parsing and reporting."""
+
+    def test_parse_mix(self):
+        """Test scenario weights are parsed and unknown scenarios refused."""
+        assert parse_mix('child_toggle=3,parent_pay') == {'child_toggle': 3.0, 'parent_pay': 1.0}
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_mix('child_toggle=3,rm_rf=1')
+
+    def test_summarize(self):
+        """Test throughput, errors and percentiles per scenario."""
+        samples = [('child_toggle', 10.0, None), ('child_toggle', 30.0, 'HTTP 500'), ('api_week', 5.0, None)]
+
+        overall, scenarios = summarize(samples, elapsed=2.0)
+
+        assert overall['requests'] == 3
+        assert overall['throughput_rps'] == 1.5
+        assert overall['errors'] == 1
+        assert scenarios['child_toggle']['p50_ms'] == 20.0
+        assert scenarios['child_toggle']['error_rate'] == 0.5
+        assert scenarios['api_week']['errors'] == 0
+
+    def test_scan_server_log(self, tmp_path):
+        """Test lock errors, worker timeouts and exceptions are counted from the log."""
+        log = tmp_path / 'gunicorn.log'
+        log.write_text(
+            '[ERROR] Exception on /chores/toggle [POST]\n'
+            'Traceback (most recent call last):\n'
+            'sqlite3.OperationalError: database is locked\n'
+            '\n'
+            'sqlalchemy.exc.OperationalError: (sqlite3.OperationalError) database is locked\n'
+            '[CRITICAL] WORKER TIMEOUT (pid:42)\n'
+        )
+
+        assert scan_server_log(log) == {'database_locked': 1, 'worker_timeouts': 1, 'exceptions': 1}
+
+    def test_find_duplicates(self, app, child_user, current_week):
+        """Test rows that should be unique are reported."""
+        with app.app_context():
+            for _ in range(2):
+                db.session.add(WeeklyPayment(week_id=current_week['id'], user_id=child_user['id'],
+                                             original_amount=1.0, amount=1.0))
+            db.session.commit()
+
+        duplicates = find_duplicates(app)
+
+        assert duplicates['weekly_payments'] == 1
+        assert duplicates['chore_logs'] == 0
@@ -0,0 +1,242 @@
+import os
+import pytest
+from datetime import date
+
+from sqlalchemy import text
+
+from app import create_app, db
+from app.config import config
+from app.database import (
+    dispose_engines, insert_or_ignore, normalize_database_uri, postgres_engine_options, read_sqlite_pragmas, verify_sqlite_pragmas
+)
+from app.models.chore import ChoreDefinition
+from app.models.chore_log import ChoreLog
+from app.models.user import User
+from app.models.week import WeekPeriod
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """Create an app backed by an on-disk SQLite database with production PRAGMAs."""
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI',
+                        f"sqlite:///{tmp_path / 'chorechamp.db'}")
+    monkeypatch.setattr(config['testing'], 'SQLITE_PRAGMAS',
+                        config['production'].SQLITE_PRAGMAS)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+        db.engine.dispose()
+
+
+class TestStartup:
+    """Tests for app startup."""
+
+    def test_create_app_does_no_database_io(self, tmp_path, monkeypatch):
+        """Test building the app doesn't open or create the database."""
+        path = tmp_path / 'untouched.db'
+        monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{path}")
+
+        app = create_app('testing')
+
+        assert not path.exists()
+        with app.app_context():
+            db.engine.dispose()
+
+
+class TestSqlitePragmas:
+    """Tests for SQLite connection tuning."""
+
+    def test_pragmas_applied_on_connect(self, file_app):
+        """Test every new connection gets the configured PRAGMAs."""
+        values = read_sqlite_pragmas(db.engine, ['journal_mode', 'synchronous', 'busy_timeout', 'temp_store'])
+
+        assert values['journal_mode'] == 'wal'
+        assert values['synchronous'] == 1  # NORMAL
+        assert values['busy_timeout'] == 15000
+        assert values['temp_store'] == 2  # MEMORY
+
+    def test_verify_reports_actual_values(self, file_app):
+        """Test startup verification returns what SQLite reports."""
+        actual = verify_sqlite_pragmas(file_app, db.engine)
+
+        assert set(actual) == set(config['production'].SQLITE_PRAGMAS)
+        assert actual['cache_size'] == -64000
+
+    def test_pragmas_logged_on_first_connect(self, tmp_path, monkeypatch, caplog):
+        """Test the first connection logs the effective PRAGMAs."""
+        import logging
+        monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'log.db'}")
+        monkeypatch.setattr(config['testing'], 'SQLITE_PRAGMAS', {'journal_mode': 'WAL', 'busy_timeout': 1234})
+        app = create_app('testing')
+
+        with caplog.at_level(logging.INFO, logger=app.logger.name), app.app_context():
+            with db.engine.connect():
+                pass
+            db.engine.dispose()
+
+        assert 'journal_mode=wal, busy_timeout=1234' in caplog.text
+
+    def test_verify_warns_on_mismatch(self, app, caplog):
+        """Test a PRAGMA that didn't take effect is logged as a warning."""
+        app.config['SQLITE_PRAGMAS'] = {'journal_mode': 'WAL'}
+
+        verify_sqlite_pragmas(app, db.engine)
+
+        assert 'journal_mode' in caplog.text
+
+
+@pytest.fixture
+def routed_app(file_app):
+    """Enable read/write routing on the on-disk app."""
+    from app.database import create_reader_engine
+    file_app.config['DATABASE_READ_ROUTING'] = True
+    reader = create_reader_engine(file_app, db.engine)
+    yield file_app
+    reader.dispose()
+
+
+class TestReadWriteRouting:
+    """Tests for routing GET requests to the read-only engine."""
+
+    def test_get_request_reads_from_reader(self, routed_app):
+        """Test reads in a GET request use the read-only engine."""
+        with routed_app.test_request_context('/dashboard', method='GET'):
+            assert db.session.get_bind() is routed_app.extensions['db_reader']
+            db.session.remove()
+
+    def test_post_request_uses_writer(self, routed_app):
+        """Test reads in a POST request use the writer engine."""
+        with routed_app.test_request_context('/chores/toggle', method='POST'):
+            assert db.session.get_bind() is db.engine
+            db.session.remove()
+
+    def test_writes_in_get_request_stick_to_writer(self, routed_app):
+        """Test a GET request that writes keeps reading its own writes."""
+        with routed_app.test_request_context('/dashboard', method='GET'):
+            WeekPeriod.get_or_create_current_week()
+            db.session.add(WeekPeriod(start_date=date(2000, 1, 3), end_date=date(2000, 1, 9)))
+            db.session.flush()
+            assert db.session.get_bind() is db.engine
+
+            db.session.commit()
+            assert db.session.get_bind() is routed_app.extensions['db_reader']
+            assert WeekPeriod.query.count() == 2
+            db.session.remove()
+
+    def test_dispose_engines_resets_pools(self, routed_app):
+        """Test a forked worker starts with empty writer and reader pools."""
+        reader = routed_app.extensions['db_reader']
+        for engine in (db.engine, reader):
+            with engine.connect():
+                pass
+        old_pools = (db.engine.pool, reader.pool)
+
+        dispose_engines(routed_app)
+
+        assert db.engine.pool is not old_pools[0]
+        assert reader.pool is not old_pools[1]
+        assert reader.pool.checkedin() == 0
+
+    def test_reader_is_query_only(self, routed_app):
+        """Test the reader engine refuses writes."""
+        from sqlalchemy.exc import OperationalError
+
+        reader = routed_app.extensions['db_reader']
+        with reader.connect() as connection:
+            assert connection.execute(text('SELECT COUNT(*) FROM users')).scalar() == 0
+            with pytest.raises(OperationalError):
+                connection.execute(text("INSERT INTO week_periods (start_date, end_date, created_at) "
+                                        "VALUES ('2024-01-01', '2024-01-07', '2024-01-01')"))
+
+
+class TestPostgresProfile:
+    """Tests for the PostgreSQL engine configuration."""
+
+    def test_legacy_scheme_normalized(self):
+        """Test postgres:// URIs are rewritten to use the psycopg driver."""
+        assert normalize_database_uri('postgres://u:p@db/chores') == 'postgresql+psycopg://u:p@db/chores'
+        assert normalize_database_uri('postgresql://u:p@db/chores') == 'postgresql+psycopg://u:p@db/chores'
+        assert normalize_database_uri('postgresql+psycopg://u:p@db/c') == 'postgresql+psycopg://u:p@db/c'
+        assert normalize_database_uri('sqlite:///chores.db') == 'sqlite:///chores.db'
+
+    def test_pool_options_per_config(self):
+        """Test production gets a larger pool with pre-ping and a statement timeout."""
+        options = postgres_engine_options({
+            'POSTGRES_ENGINE_OPTIONS': config['production'].POSTGRES_ENGINE_OPTIONS,
+            'POSTGRES_STATEMENT_TIMEOUT_MS': 2500,
+        })
+
+        assert options['pool_pre_ping'] is True
+        assert options['pool_size'] >= config['development'].POSTGRES_ENGINE_OPTIONS['pool_size']
+        assert options['connect_args']['options'] == '-c statement_timeout=2500'
+
+    def test_sqlite_uri_keeps_default_options(self, app):
+        """Test the PostgreSQL pool options are not applied to SQLite."""
+        assert 'pool_pre_ping' not in app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+
+
+class TestConflictSafeWrites:
+    """Tests for the ON CONFLICT insert paths."""
+
+    def test_insert_or_ignore_skips_duplicate_log(self, app, child_user, sample_chores, current_week):
+        """Test a second insert for the same chore slot is ignored."""
+        chore_id = sample_chores[0]['id']
+        key = dict(user_id=child_user['id'], chore_id=chore_id, completed_date=date.today(), completion_slot=1)
+
+        ChoreLog.toggle_completion(child_user['id'], chore_id, current_week['id'], date.today(), slot=1)
+        db.session.execute(insert_or_ignore(db.session, ChoreLog, list(key)).values(week_id=current_week['id'], **key))
+        db.session.commit()
+
+        assert ChoreLog.query.filter_by(**key).count() == 1
+
+    def test_week_creation_is_idempotent(self, app):
+        """Test creating the same week twice returns one row."""
+        first = WeekPeriod.get_or_create_week_for_date(date(2024, 3, 6))
+        second = WeekPeriod.get_or_create_week_for_date(date(2024, 3, 10))
+
+        assert first.id == second.id
+        assert first.start_date == date(2024, 3, 4)
+
+
+@pytest.fixture
+def postgres_app(monkeypatch):
+    """Create an app against the PostgreSQL server in TEST_DATABASE_URL."""
+    url = os.environ.get('TEST_DATABASE_URL', '')
+    if not url.startswith(('postgres://', 'postgresql')):
+        pytest.skip('TEST_DATABASE_URL does not point at PostgreSQL')
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', url)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+class TestPostgres:
+    """Tests that run against a real PostgreSQL server."""
+
+    def test_pool_configured(self, postgres_app):
+        """Test the engine uses the configured pool and statement timeout."""
+        assert db.engine.pool.size() == postgres_app.config['POSTGRES_ENGINE_OPTIONS']['pool_size']
+        timeout = db.session.execute(text("SELECT setting FROM pg_settings WHERE name = 'statement_timeout'")).scalar()
+        assert int(timeout) == postgres_app.config['POSTGRES_STATEMENT_TIMEOUT_MS']
+
+    def test_toggle_round_trip(self, postgres_app):
+        """Test toggling on and off uses the upsert path."""
+        child = User(name='PG Child', is_admin=False)
+        chore = ChoreDefinition(name='Make Bed', amount=0.5, frequency='daily')
+        db.session.add_all([child, chore])
+        db.session.commit()
+        week = WeekPeriod.get_or_create_current_week()
+
+        is_completed, log = ChoreLog.toggle_completion(child.id, chore.id, week.id, date.today(), amount=0.5)
+        assert is_completed is True
+        assert log.amount_earned == 0.5
+
+        is_completed, log = ChoreLog.toggle_completion(child.id, chore.id, week.id, date.today(), amount=0.5)
+        assert is_completed is False
+        assert ChoreLog.query.count() == 0
@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+
+from app import db
+from app.hashing import BUSY_MESSAGE, HashingBusy, HashingPool
+from app.models.user import User
+
+
+@pytest.fixture
+def busy_pool(app):
+    """Replace the hashing pool with a one-slot pool that is kept busy."""
+    pool = HashingPool(workers=1, queue_limit=0)
+    app.extensions['hashing'] = pool
+    started, release = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    holder = threading.Thread(target=pool.run, args=(hold,))
+    holder.start()
+    started.wait(5)
+    yield pool
+    release.set()
+    holder.join()
+
+
+class TestHashingPool:
+    """Tests for the bounded hashing pool."""
+
+    def test_runs_on_pool(self):
+        """Test work runs on a pool thread and returns its result."""
+        pool = HashingPool(workers=1, queue_limit=0)
+
+        assert pool.run(lambda: threading.current_thread().name).startswith('bcrypt')
+
+    def test_full_pool_refuses_work(self, busy_pool):
+        """Test work beyond the pool's capacity is refused rather than queued."""
+        with pytest.raises(HashingBusy):
+            busy_pool.run(lambda: None)
+
+    def test_slot_released_after_error(self):
+        """Test a failing hash doesn't keep its slot."""
+        pool = HashingPool(workers=1, queue_limit=0)
+
+        with pytest.raises(ZeroDivisionError):
+            pool.run(lambda: 1 / 0)
+        assert pool.run(lambda: 'ok') == 'ok'
+
+    def test_login_shed_with_503(self, client, child_user, busy_pool):
+        """Test a PIN login is turned away quickly while the pool is full."""
+        response = client.post('/login', data={'user_id': child_user['id'], 'pin': child_user['pin']})
+
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        assert b'Lots of people are logging in' in response.data
+
+    def test_api_login_shed_with_503(self, client, admin_user, busy_pool):
+        """Test an API login gets a JSON 503 while the pool is full."""
+        response = client.post('/api/v1/auth/login', json={
+            'type': 'password', 'email': admin_user['email'], 'password': admin_user['password']
+        })
+
+        assert response.status_code == 503
+        assert response.get_json() == {'error': BUSY_MESSAGE}
+
+
+class TestBcryptCost:
+    """Tests for per-role bcrypt cost and rehashing."""
+
+    def test_cost_per_role(self, app):
+        """Test PINs and passwords are hashed at their own cost."""
+        app.config.update(BCRYPT_PIN_ROUNDS=5, BCRYPT_PASSWORD_ROUNDS=6)
+        user = User(name='Parent', email='parent@test.com', is_admin=True)
+
+        user.set_pin('1234')
+        user.set_password('password123')
+
+        assert user.pin_hash.startswith('$2b$05$')
+        assert user.password_hash.startswith('$2b$06$')
+
+    def test_pin_rehashed_on_login(self, app, client, child_user):
+        """Test a PIN hashed at an old cost is upgraded when the child logs in."""
+        app.config['BCRYPT_PIN_ROUNDS'] = 5
+
+        response = client.post('/login', data={'user_id': child_user['id'], 'pin': child_user['pin']})
+
+        assert response.status_code == 302
+        db.session.expire_all()
+        user = db.session.get(User, child_user['id'])
+        assert user.pin_hash.startswith('$2b$05$')
+        assert user.check_pin(child_user['pin'])
+
+    def test_password_rehashed_on_api_login(self, app, client, admin_user):
+        """Test a password hashed at an old cost is upgraded on API login."""
+        app.config['BCRYPT_PASSWORD_ROUNDS'] = 5
+
+        response = client.post('/api/v1/auth/login', json={
+            'type': 'password', 'email': admin_user['email'], 'password': admin_user['password']
+        })
+
+        assert response.status_code == 200
+        db.session.expire_all()
+        assert db.session.get(User, admin_user['id']).password_hash.startswith('$2b$05$')
+
+    def test_wrong_pin_not_rehashed(self, app, child_user):
+        """Test a failed check leaves the hash alone."""
+        app.config['BCRYPT_PIN_ROUNDS'] = 5
+        user = db.session.get(User, child_user['id'])
+        old_hash = user.pin_hash
+
+        assert not user.check_pin('9999')
+        assert user.pin_hash == old_hash
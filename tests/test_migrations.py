@@ -0,0 +1,134 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app import db
+from app.migrations import MIGRATIONS, applied_versions, run_migrations
+
+
+LEGACY_SCHEMA = [
+    '''CREATE TABLE users (
+        id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, email VARCHAR(120),
+        is_admin BOOLEAN NOT NULL, pin_hash VARCHAR(128), password_hash VARCHAR(128),
+        base_allowance FLOAT NOT NULL, created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL
+    )''',
+    '''CREATE TABLE weekly_chore_assignments (
+        id INTEGER PRIMARY KEY, week_id INTEGER NOT NULL, chore_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL, custom_name VARCHAR(100), custom_amount FLOAT, created_at DATETIME NOT NULL
+    )''',
+    '''CREATE TABLE weekly_payments (
+        id INTEGER PRIMARY KEY, week_id INTEGER NOT NULL, user_id INTEGER NOT NULL,
+        original_amount FLOAT, amount FLOAT NOT NULL, is_paid BOOLEAN NOT NULL, paid_at DATETIME,
+        notes TEXT, created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL
+    )''',
+    '''CREATE TABLE chore_logs (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, chore_id INTEGER NOT NULL,
+        week_id INTEGER NOT NULL, assignment_id INTEGER, completed_date DATE NOT NULL,
+        completed_at DATETIME NOT NULL, completion_slot INTEGER NOT NULL, amount_earned FLOAT NOT NULL
+    )''',
+]
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """Create a database with the schema from before the ledger, with some history."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        for ddl in LEGACY_SCHEMA:
+            connection.execute(text(ddl))
+        connection.execute(text(
+            "INSERT INTO weekly_chore_assignments VALUES (7, 1, 1, 1, NULL, NULL, '2024-01-01')"
+        ))
+        for log_id in range(1, 6):
+            connection.execute(
+                text("INSERT INTO chore_logs VALUES (:id, 1, 1, 1, NULL, :day, '2024-01-01', 1, 0.5)"),
+                {'id': log_id, 'day': f'2024-01-0{log_id}'}
+            )
+        # A duplicate of log 1 that the unique index migration must remove
+        connection.execute(text("INSERT INTO chore_logs VALUES (6, 1, 1, 1, NULL, '2024-01-01', '2024-01-01', 1, 0.5)"))
+    yield engine
+    engine.dispose()
+
+
+class TestMigrations:
+    """Tests for the versioned migration ledger."""
+
+    def test_legacy_database_migrated(self, legacy_engine):
+        """Test all migrations run in order on a database from before the ledger."""
+        results = run_migrations(legacy_engine, chunk_size=2, log=lambda message: None)
+
+        assert [r['version'] for r in results] == sorted(m.version for m in MIGRATIONS)
+        assert applied_versions(legacy_engine) == {m.version for m in MIGRATIONS}
+
+        inspector = inspect(legacy_engine)
+        assert 'avatar_style' in [c['name'] for c in inspector.get_columns('users')]
+        assert inspector.has_table('app_settings')
+        assert 'ix_chore_logs_user_week' in [i['name'] for i in inspector.get_indexes('chore_logs')]
+
+    def test_backfill_runs_in_chunks(self, legacy_engine):
+        """Test the assignment backfill updates every matching log."""
+        results = run_migrations(legacy_engine, chunk_size=2, log=lambda message: None)
+
+        backfill = next(r for r in results if r['version'] == 9)
+        assert backfill['rows'] == 5
+        with legacy_engine.connect() as connection:
+            linked = connection.execute(text('SELECT COUNT(*) FROM chore_logs WHERE assignment_id = 7')).scalar()
+        assert linked == 5
+
+    def test_migrations_run_once(self, legacy_engine):
+        """Test a second run finds nothing to do."""
+        run_migrations(legacy_engine, log=lambda message: None)
+
+        assert run_migrations(legacy_engine, log=lambda message: None) == []
+
+    def test_dry_run_changes_nothing(self, legacy_engine):
+        """Test a dry run reports estimates without touching the database."""
+        results = run_migrations(legacy_engine, dry_run=True, log=lambda message: None)
+
+        unique_index = next(r for r in results if r['version'] == 5)
+        assert unique_index['status'] == 'pending'
+        assert unique_index['rows'] == 6
+        assert unique_index['seconds'] >= 0
+        assert not inspect(legacy_engine).has_table('schema_version')
+        assert 'avatar_style' not in [c['name'] for c in inspect(legacy_engine).get_columns('users')]
+
+    def test_current_schema_is_recorded(self, app):
+        """Test a database created from the models records schema migrations without running them."""
+        results = run_migrations(db.engine, log=lambda message: None)
+
+        statuses = {r['version']: r['status'] for r in results}
+        assert statuses[1] == 'recorded'
+        assert statuses[5] == 'recorded'
+        assert statuses[9] == 'applied'
+
+    def test_empty_database_gets_schema(self, tmp_path):
+        """Test the first migration creates the schema on an empty database."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+
+        results = run_migrations(engine, log=lambda message: None)
+
+        assert results[0] == {**results[0], 'version': 0, 'status': 'applied'}
+        assert all(r['status'] == 'recorded' for r in results[1:] if r['version'] != 9)
+        assert inspect(engine).has_table('chore_logs')
+        engine.dispose()
+
+    def test_dry_run_on_empty_database(self, tmp_path):
+        """Test a dry run on an empty database reports the schema as pending and the rest as covered by it."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+
+        results = run_migrations(engine, dry_run=True, log=lambda message: None)
+
+        assert results[0] == {**results[0], 'version': 0, 'status': 'pending'}
+        assert all(r['status'] == 'covered' for r in results[1:])
+        assert inspect(engine).get_table_names() == []
+        engine.dispose()
+
+    def test_missing_tables_are_not_inspected(self, tmp_path):
+        """Test column checks and backfill estimates treat a missing table as not yet migrated."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+        add_column = next(m for m in MIGRATIONS if m.version == 1)
+        backfill = next(m for m in MIGRATIONS if m.version == 9)
+
+        assert add_column.is_applied(inspect(engine)) is False
+        with engine.connect() as connection:
+            assert backfill.estimate_rows(connection) == 0
+        engine.dispose()
@@ -169,3 +169,53 @@ class TestAllowanceService:
 
             # Should be about 42.9% (3/7)
             assert summary['completion_percentage'] == pytest.approx(42.9, rel=0.1)
+
+    def test_calculate_weekly_summaries(self, app, admin_user, child_user, assigned_chores, current_week):
+        """Test batched summaries match the one-at-a-time summaries."""
+        assignment = assigned_chores[0]
+        ChoreLog.toggle_completion(child_user['id'], assignment['chore_id'], current_week['id'], date.today(),
+                                   amount=0.50, assignment_id=assignment['id'])
+
+        service = AllowanceService()
+        summaries = service.calculate_weekly_summaries([child_user['id'], admin_user['id']], [current_week['id'], -1])
+
+        assert set(summaries) == {(child_user['id'], current_week['id']), (admin_user['id'], current_week['id'])}
+        assert summaries[(child_user['id'], current_week['id'])] == \
+            service.calculate_weekly_summary(child_user['id'], current_week['id'])
+        assert summaries[(child_user['id'], current_week['id'])]['chores_earned'] == 0.50
+
+    def test_completed_slots(self, app, child_user, sample_chores, current_week):
+        """Test a week's completions are loaded as (chore, date, slot) in one go."""
+        make_bed = next(c for c in sample_chores if c['name'] == 'Make Bed')
+        today = date.today()
+        ChoreLog.toggle_completion(child_user['id'], make_bed['id'], current_week['id'], today, slot=2)
+
+        completed = ChoreLog.completed_slots(child_user['id'], today - timedelta(days=6), today)
+
+        assert completed == {(make_bed['id'], today, 2)}
+        assert ChoreLog.completed_slots(child_user['id'], today + timedelta(days=1), today + timedelta(days=7)) == set()
+
+
+class TestWeekCalendar:
+    """Tests for the in-memory week calendar."""
+
+    def test_adjacent_weeks(self, app, current_week):
+        """Test the neighbouring weeks are looked up from the calendar, and missing ones are None."""
+        with app.app_context():
+            previous_week = WeekPeriod.get_or_create_week_for_date(current_week['start_date'] - timedelta(days=7))
+            week = db.session.get(WeekPeriod, current_week['id'])
+
+            assert AllowanceService().get_adjacent_weeks(week) == (previous_week.id, None)
+
+    def test_missing_week_reloads_at_most_once_per_refresh(self, app, current_week, monkeypatch):
+        """Test a week the calendar doesn't know only reloads it once the refresh interval has passed."""
+        with app.app_context():
+            service = AllowanceService()
+            next_start = current_week['start_date'] + timedelta(days=7)
+            assert service.get_week_id(current_week['start_date']) == current_week['id']
+
+            next_week = WeekPeriod.get_or_create_week_for_date(next_start)
+            assert service.get_week_id(next_start) is None
+
+            monkeypatch.setattr(AllowanceService, 'CALENDAR_REFRESH', 0)
+            assert service.get_week_id(next_start) == next_week.id
@@ -0,0 +1,71 @@
+import os
+import pytest
+
+from app.profiling import list_profiles
+from tests.conftest import login_admin, login_child
+
+
+@pytest.fixture
+def profile_dir(app, tmp_path):
+    """Write profiles to a temporary directory."""
+    app.config['PROFILING_DIR'] = str(tmp_path / 'profiles')
+    return app.config['PROFILING_DIR']
+
+
+class TestProfiling:
+    """Tests for on-demand request profiling."""
+
+    def test_header_profiles_admin_request(self, app, client, admin_user, profile_dir):
+        """Test an admin request with the profile header saves a .prof file."""
+        login_admin(client, admin_user)
+
+        response = client.get('/admin/', headers={'X-Profile': '1'})
+
+        name = response.headers['X-Profile-Id']
+        assert '-admin.index-' in name
+        assert os.path.isfile(os.path.join(profile_dir, name))
+
+    def test_header_ignored_for_children(self, app, client, child_user, profile_dir):
+        """Test children can't trigger profiling."""
+        login_child(client, child_user)
+
+        response = client.get('/dashboard', headers={'X-Profile': '1'})
+
+        assert 'X-Profile-Id' not in response.headers
+        assert list_profiles() == []
+
+    def test_sampling(self, app, client, admin_user, profile_dir):
+        """Test setting a sample rate of 1 profiles every request."""
+        login_admin(client, admin_user)
+        client.post('/admin/profiling', data={'sample_rate': 1})
+
+        client.get('/login')
+        client.get('/login')
+        client.post('/admin/profiling', data={'sample_rate': 0})
+        client.get('/login')
+
+        assert len([p for p in list_profiles() if 'auth.login' in p['name']]) == 2
+
+    def test_old_profiles_pruned(self, app, client, admin_user, profile_dir):
+        """Test only the newest PROFILING_KEEP profiles are kept."""
+        app.config['PROFILING_KEEP'] = 2
+        login_admin(client, admin_user)
+
+        for _ in range(4):
+            client.get('/login', headers={'X-Profile': '1'})
+
+        assert len(list_profiles()) == 2
+
+    def test_view_and_download(self, app, client, admin_user, profile_dir):
+        """Test a saved profile can be summarised and downloaded."""
+        login_admin(client, admin_user)
+        name = client.get('/admin/', headers={'X-Profile': '1'}).headers['X-Profile-Id']
+
+        summary = client.get(f'/admin/profiling/{name}')
+        download = client.get(f'/admin/profiling/{name}/download')
+
+        assert summary.status_code == 200
+        assert b'cumulative' in summary.data
+        assert download.status_code == 200
+        assert f'filename={name}' in download.headers['Content-Disposition']
+        assert client.get('/admin/profiling/..%2Fchorechamp.db/download').status_code == 404
@@ -0,0 +1,134 @@
+import logging
+import pytest
+
+from app import db
+from app.config import Config
+from app.models.user import User
+from app.query_budget import QueryBudgetExceeded, QueryCounter, query_budget
+from tests.conftest import login_admin, login_child
+
+
+class TestQueryBudget:
+    """Tests for query counting and N+1 detection."""
+
+    def test_counter_records_statements(self, app, child_user):
+        """Test every statement inside the block is counted."""
+        with QueryCounter() as counter:
+            User.query.all()
+            User.query.filter_by(is_admin=False).count()
+
+        assert counter.count == 2
+
+    def test_over_budget_raises(self, app, child_user):
+        """Test exceeding the budget raises while testing."""
+        with pytest.raises(QueryBudgetExceeded, match='budget 1'):
+            with query_budget(1):
+                User.query.all()
+                User.query.all()
+
+    def test_repeated_statement_flagged(self, app, admin_user, child_user):
+        """Test one statement run in a loop is reported as a likely N+1."""
+        ids = [admin_user['id'], child_user['id']] * 3
+        db.session.expire_all()
+
+        with pytest.raises(QueryBudgetExceeded, match='likely N\\+1'):
+            with query_budget(repeat_limit=3):
+                for user_id in ids:
+                    db.session.execute(db.select(User).filter_by(id=user_id)).scalar()
+
+    def test_decorator(self, app, child_user):
+        """Test query_budget works as a decorator."""
+        @query_budget(1, name='load users')
+        def load_users():
+            return User.query.all() + User.query.all()
+
+        with pytest.raises(QueryBudgetExceeded, match='load users'):
+            load_users()
+
+    def test_logs_when_not_strict(self, app, child_user, caplog):
+        """Test production mode logs instead of raising."""
+        with caplog.at_level(logging.WARNING, logger=app.logger.name):
+            with query_budget(0, strict=False):
+                User.query.all()
+
+        assert 'ran 1 SQL statements (budget 0)' in caplog.text
+
+    def test_request_over_endpoint_budget_logged(self, app, client, caplog):
+        """Test a request over its endpoint budget is logged, not failed."""
+        app.config['QUERY_BUDGETS'] = {'health.readyz': 0}
+
+        with caplog.at_level(logging.WARNING, logger=app.logger.name):
+            response = client.get('/readyz')
+
+        assert response.status_code == 200
+        assert 'health.readyz ran 1 SQL statements (budget 0)' in caplog.text
+
+    def test_default_repeat_limit(self, app, admin_user, child_user):
+        """Test the repeat limit defaults to the configured N_PLUS_ONE_THRESHOLD."""
+        app.config.pop('N_PLUS_ONE_THRESHOLD')
+        ids = [admin_user['id'], child_user['id']] * (Config.N_PLUS_ONE_THRESHOLD // 2)
+        db.session.expire_all()
+
+        with pytest.raises(QueryBudgetExceeded, match='likely N\\+1'):
+            with query_budget():
+                for user_id in ids:
+                    db.session.execute(db.select(User).filter_by(id=user_id)).scalar()
+
+
+class TestEndpointBudgets:
+    """Keep endpoints within their configured query budgets."""
+
+    def test_toggle_within_budget(self, app, client, child_user, assigned_chores):
+        """Test toggling a chore stays within budget."""
+        login_child(client, child_user)
+
+        with query_budget(app.config['QUERY_BUDGETS']['dashboard.toggle_chore']):
+            client.post('/chores/toggle', data={'assignment_id': assigned_chores[1]['id'], 'slot': 1})
+
+    def test_admin_pages_within_budget(self, app, client, admin_user, assigned_chores):
+        """Test the admin overview and payments pages stay within budget."""
+        login_admin(client, admin_user)
+
+        with query_budget(app.config['QUERY_BUDGETS']['admin.index']):
+            client.get('/admin/')
+        with query_budget(app.config['QUERY_BUDGETS']['admin.payments']):
+            client.get('/admin/payments')
+
+    def test_week_views_have_no_n_plus_one(self, app, client, child_user, assigned_chores, caplog):
+        """Test the week dashboard loads its cells and totals without repeating statements."""
+        login_child(client, child_user)
+        app.config['N_PLUS_ONE_THRESHOLD'] = 3
+        app.extensions.pop('fragment_cache', None)
+
+        with caplog.at_level(logging.WARNING, logger=app.logger.name):
+            client.get('/dashboard')
+            client.get('/history-chart')
+
+        assert 'likely N+1' not in caplog.text
+
+    def test_admin_index_independent_of_children(self, app, client, admin_user, assigned_chores):
+        """Test the admin overview runs the same statements however many children there are."""
+        login_admin(client, admin_user)
+
+        def count_with_extra_children(n):
+            for i in range(n):
+                child = User(name=f'Extra Child {i}', is_admin=False)
+                child.set_pin('1234')
+                db.session.add(child)
+            db.session.commit()
+            with QueryCounter() as counter:
+                client.get('/admin/')
+            return counter.count
+
+        assert count_with_extra_children(1) == count_with_extra_children(3)
+
+    def test_api_current_week_within_budget(self, app, client, child_user, assigned_chores):
+        """Test the API's current week stays within budget."""
+        token = client.post('/api/v1/auth/login', json={
+            'type': 'pin', 'user_id': child_user['id'], 'pin': child_user['pin']
+        }).get_json()['access_token']
+
+        with query_budget(app.config['QUERY_BUDGETS']['api.current_week'], repeat_limit=2):
+            response = client.get('/api/v1/weeks/current', headers={'Authorization': f'Bearer {token}'})
+
+        assert response.status_code == 200
@@ -0,0 +1,189 @@
+import time
+
+import pytest
+
+from app import db
+from app.models.login_throttle import LoginThrottle
+from app.rate_limit import LoginThrottled, account_key, check_login_allowed, record_login_failure
+
+
+def _pin_login(client, user_id, pin):
+    return client.post('/login', data={'login_type': 'child', 'user_id': user_id, 'pin': pin})
+
+
+def _throttle(key):
+    db.session.expire_all()
+    return db.session.execute(db.select(LoginThrottle).filter_by(key=key)).scalar_one()
+
+
+@pytest.fixture
+def no_hashing(monkeypatch):
+    """Fail the test if a PIN or password is hashed."""
+    def check_secret(*args):
+        raise AssertionError('a throttled login was hashed')
+    monkeypatch.setattr('app.models.user.check_secret', check_secret)
+
+
+class TestLoginRateLimit:
+    """Tests for login token buckets."""
+
+    def test_account_bucket(self, app, client, child_user):
+        """Test an account gets a burst of attempts, then is refused."""
+        app.config['LOGIN_RATE_LIMITS'] = {**app.config['LOGIN_RATE_LIMITS'], 'account': (3, 60)}
+        # A fresh client each time, as a logged-in client skips the login check
+        for _ in range(3):
+            assert _pin_login(app.test_client(), child_user['id'], child_user['pin']).status_code == 302
+
+        response = _pin_login(app.test_client(), child_user['id'], child_user['pin'])
+
+        assert response.status_code == 429
+        assert 0 < int(response.headers['Retry-After']) <= 20
+        assert b'Too many login attempts' in response.data
+
+    def test_refused_before_hashing(self, app, client, child_user, no_hashing):
+        """Test an over-limit attempt is refused without checking the PIN."""
+        app.config['LOGIN_RATE_LIMITS'] = {**app.config['LOGIN_RATE_LIMITS'], 'account': (1, 60)}
+        key = account_key(user_id=child_user['id'])
+        db.session.add(LoginThrottle(key=key, tokens=0, refilled_at=time.time(), failures=0))
+        db.session.commit()
+
+        assert _pin_login(client, child_user['id'], child_user['pin']).status_code == 429
+
+    def test_bucket_refills(self, app, client, child_user):
+        """Test attempts are allowed again once the bucket refills."""
+        key = account_key(user_id=child_user['id'])
+        db.session.add(LoginThrottle(key=key, tokens=0, refilled_at=time.time() - 60, failures=0))
+        db.session.commit()
+
+        assert _pin_login(client, child_user['id'], child_user['pin']).status_code == 302
+        assert _throttle(key).tokens == pytest.approx(4, abs=0.1)
+
+    def test_ip_bucket(self, app, client, child_user):
+        """Test one address can't spread guesses across many accounts."""
+        app.config['LOGIN_RATE_LIMITS'] = {**app.config['LOGIN_RATE_LIMITS'], 'ip': (2, 60)}
+
+        assert _pin_login(client, 1001, '0000').status_code == 302
+        assert _pin_login(client, 1002, '0000').status_code == 302
+        assert _pin_login(client, child_user['id'], child_user['pin']).status_code == 429
+
+    def test_global_bucket(self, app, client, admin_user):
+        """Test the whole site is limited too."""
+        app.config['LOGIN_RATE_LIMITS'] = {**app.config['LOGIN_RATE_LIMITS'], 'global': (1, 60)}
+        data = {'type': 'password', 'email': admin_user['email'], 'password': admin_user['password']}
+
+        assert client.post('/api/v1/auth/login', json=data).status_code == 200
+        response = client.post('/api/v1/auth/login', json=data)
+
+        assert response.status_code == 429
+        assert response.get_json()['retry_after'] > 0
+        assert 'Retry-After' in response.headers
+
+    def test_disabled(self, app, client, child_user):
+        """Test no limits apply when rate limiting is turned off."""
+        app.config['LOGIN_RATE_LIMIT_ENABLED'] = False
+        app.config['LOGIN_RATE_LIMITS'] = {**app.config['LOGIN_RATE_LIMITS'], 'account': (1, 60)}
+
+        for _ in range(3):
+            assert _pin_login(app.test_client(), child_user['id'], child_user['pin']).status_code == 302
+        assert db.session.execute(db.select(LoginThrottle)).first() is None
+
+
+class TestLoginLockout:
+    """Tests for lockout after repeated failures."""
+
+    def test_locked_after_failures(self, app, client, child_user, no_hashing):
+        """Test the right PIN is refused, unchecked, once an account is locked."""
+        app.config['LOGIN_LOCKOUT_THRESHOLD'] = 3
+        key = account_key(user_id=child_user['id'])
+        db.session.add(LoginThrottle(key=key, tokens=5, refilled_at=time.time(), failures=2))
+        db.session.commit()
+        with app.test_request_context('/login', method='POST'):
+            record_login_failure(key)
+
+        response = _pin_login(client, child_user['id'], child_user['pin'])
+
+        assert response.status_code == 429
+        assert b'Too many wrong attempts' in response.data
+        assert 25 <= int(response.headers['Retry-After']) <= 30
+
+    def test_wrong_pins_lock_account(self, app, client, child_user):
+        """Test wrong PINs through the login page lead to a lockout."""
+        app.config['LOGIN_LOCKOUT_THRESHOLD'] = 2
+        key = account_key(user_id=child_user['id'])
+
+        _pin_login(client, child_user['id'], '0000')
+        assert _throttle(key).locked_until is None
+        _pin_login(client, child_user['id'], '0000')
+
+        assert _throttle(key).failures == 2
+        assert _throttle(key).locked_until > time.time()
+
+    def test_padded_ids_share_account(self, app, client, child_user):
+        """Test zero-padded user ids count against the same account as the plain id."""
+        app.config['LOGIN_LOCKOUT_THRESHOLD'] = 2
+        user_id = child_user['id']
+
+        _pin_login(app.test_client(), user_id, '0000')
+        _pin_login(app.test_client(), f'0{user_id}', '0000')
+
+        assert _throttle(account_key(user_id=user_id)).failures == 2
+        for padded in (f'000{user_id}', '0' * 20 + str(user_id)):
+            assert _pin_login(app.test_client(), padded, child_user['pin']).status_code == 429
+
+    def test_api_padded_ids_share_account(self, app, client, child_user):
+        """Test the API keys PIN logins on the parsed user id too."""
+        app.config['LOGIN_LOCKOUT_THRESHOLD'] = 1
+        client.post('/api/v1/auth/login', json={'user_id': f'00{child_user["id"]}', 'pin': '0000'})
+
+        response = client.post('/api/v1/auth/login', json={'user_id': child_user['id'], 'pin': child_user['pin']})
+
+        assert response.status_code == 429
+
+    def test_invalid_user_id(self, client):
+        """Test ids that aren't a user id are refused before any bucket is touched."""
+        for user_id in ('abc', '-1', '9' * 30):
+            response = _pin_login(client, user_id, '1234')
+            assert response.status_code == 302
+        assert db.session.execute(db.select(LoginThrottle).filter(LoginThrottle.key.like('account:%'))).first() is None
+
+    def test_lockout_escalates(self, app):
+        """Test each further failure doubles the lockout, up to the maximum."""
+        app.config.update(LOGIN_LOCKOUT_THRESHOLD=1, LOGIN_LOCKOUT_SECONDS=30, LOGIN_LOCKOUT_MAX_SECONDS=100)
+        key = account_key(email='Parent@Example.com')
+        db.session.add(LoginThrottle(key=key, tokens=5, refilled_at=time.time(), failures=0))
+        db.session.commit()
+
+        lockouts = []
+        with app.test_request_context('/login', method='POST'):
+            for _ in range(4):
+                record_login_failure(key)
+                lockouts.append(round(_throttle(key).locked_until - time.time()))
+
+        assert lockouts == [30, 60, 100, 100]
+        assert key == 'account:email:parent@example.com'
+
+    def test_success_clears_failures(self, app, client, admin_user):
+        """Test a successful login resets the failure count."""
+        key = account_key(email=admin_user['email'])
+        data = {'type': 'password', 'email': admin_user['email']}
+
+        client.post('/api/v1/auth/login', json={**data, 'password': 'wrong-password'})
+        assert _throttle(key).failures == 1
+        client.post('/api/v1/auth/login', json={**data, 'password': admin_user['password']})
+
+        assert _throttle(key).failures == 0
+
+    def test_check_raises(self, app, child_user):
+        """Test check_login_allowed raises with the scope and wait."""
+        key = account_key(user_id=child_user['id'])
+        db.session.add(LoginThrottle(key=key, tokens=5, refilled_at=time.time(), failures=9,
+                                     locked_until=time.time() + 90))
+        db.session.commit()
+
+        with app.test_request_context('/login', method='POST'):
+            with pytest.raises(LoginThrottled) as error:
+                check_login_allowed(key)
+
+        assert error.value.scope == 'locked'
+        assert error.value.retry_after == 90
+        assert '2 minutes' in error.value.message
@@ -1,4 +1,7 @@
 import pytest
+from datetime import date, timedelta
+
+from app.models.week import WeekPeriod
 from tests.conftest import login_admin, login_child
 
 
@@ -103,3 +106,38 @@ class TestAdminRoutes:
 
         assert response.status_code == 200
         assert b'assigned successfully' in response.data or b'Help with Garden' in response.data
+
+    def test_view_child_week_navigation(self, app, client, admin_user, child_user, current_week, assigned_chores):
+        """Test the child's week has prefetched links to its neighbours and is served from the fragment cache."""
+        with app.app_context():
+            previous_week = WeekPeriod.get_or_create_week_for_date(current_week['start_date'] - timedelta(days=7))
+            previous_week_id = previous_week.id
+        login_admin(client, admin_user)
+
+        html = client.get(f"/admin/view-child/{child_user['id']}").data.decode()
+        assert f'hx-get="/admin/view-child/{child_user["id"]}/week/{previous_week_id}"' in html
+        assert 'Current Week' in html
+
+        fragment = client.get(f"/admin/view-child/{child_user['id']}/week/{previous_week_id}",
+                              headers={'HX-Request': 'true'})
+        assert fragment.data.decode().startswith('<div id="week"')
+        assert f'hx-get="/admin/view-child/{child_user["id"]}/week/{current_week["id"]}"' in fragment.data.decode()
+        assert len(app.extensions['fragment_cache']) == 2
+
+    def test_toggle_child_chore_returns_cell(self, client, admin_user, child_user, assigned_chores):
+        """Test a parent's toggle returns the updated cell and totals, rather than an empty body."""
+        login_admin(client, admin_user)
+        assignment_id = assigned_chores[1]['id']
+        today = date.today().isoformat()
+
+        response = client.post(f"/admin/toggle-chore/{child_user['id']}", data={
+            'assignment_id': assignment_id, 'date': today, 'slot': 1
+        })
+
+        html = response.data.decode()
+        assert response.status_code == 200
+        assert html.lstrip().startswith(f'<button\n    id="admin-chore-{assignment_id}-{today}-1"')
+        assert '✓' in html
+        assert 'id="weekly-summary" class="text-right" hx-swap-oob="true"' in html
+        assert f'id="progress-{assignment_id}"' in html
+        assert 'id="summary-cards"' in html
@@ -1,4 +1,8 @@
 import pytest
+
+from app import db
+from app.models.user import User
+from app.query_budget import QueryCounter
 from tests.conftest import login_admin, login_child
 
 
@@ -75,3 +79,48 @@ class TestAuthRoutes:
 
         assert response.status_code == 200
         assert b'log in' in response.data.lower() or b'login' in response.data.lower()
+
+
+class TestLoginRoster:
+    """Tests for the cached child picker on the login page."""
+
+    def test_roster_cached(self, client, child_user):
+        """Test repeat views render the picker from cache with a single query."""
+        client.get('/login')
+
+        with QueryCounter() as counter:
+            response = client.get('/login')
+
+        assert counter.count == 1
+        assert b'Test Child' in response.data
+        assert f'value="{child_user["id"]}"'.encode() in response.data
+
+    def test_roster_refreshed_when_child_changes(self, client, child_user):
+        """Test renaming a child shows up on the next view."""
+        client.get('/login')
+        user = db.session.get(User, child_user['id'])
+        user.name = 'Renamed Child'
+        db.session.commit()
+
+        response = client.get('/login')
+
+        assert b'Renamed Child' in response.data
+        assert b'Test Child' not in response.data
+
+    def test_roster_refreshed_when_child_added(self, client, child_user):
+        """Test a new child appears on the next view."""
+        client.get('/login')
+        user = User(name='New Child', is_admin=False)
+        user.set_pin('4321')
+        db.session.add(user)
+        db.session.commit()
+
+        assert b'New Child' in client.get('/login').data
+
+    def test_inactive_children_hidden(self, client, child_user):
+        """Test a deactivated child disappears from the picker."""
+        client.get('/login')
+        db.session.get(User, child_user['id']).is_active = False
+        db.session.commit()
+
+        assert b'Test Child' not in client.get('/login').data
@@ -1,7 +1,34 @@
+import time
+from datetime import date, timedelta
+
 import pytest
+from app import db
+from app.models.chore_log import ChoreLog
+from app.models.user import User
+from app.models.week import WeekPeriod, WeeklyChoreAssignment, WeeklyPayment
+from app.query_budget import query_budget
+from app.services.toggle_sync_service import ToggleSyncService
 from tests.conftest import login_child
 
 
+def _change(assignment_id, done=True, recorded_at=None, slot=1, day=None):
+    """Build a queued toggle as the PWA sends it."""
+    day = (day or date.today()).isoformat()
+    return {
+        'id': f'chore-{assignment_id}-{day}-{slot}',
+        'assignment_id': assignment_id,
+        'date': day,
+        'slot': slot,
+        'done': done,
+        'recorded_at': recorded_at if recorded_at is not None else time.time() * 1000,
+    }
+
+
+def _logs(child_user):
+    db.session.expire_all()
+    return ChoreLog.query.filter_by(user_id=child_user['id']).all()
+
+
 class TestDashboardRoutes:
     """Tests for dashboard routes."""
 
@@ -66,3 +93,321 @@ class TestDashboardRoutes:
         response = client.get('/weekly-summary')
 
         assert response.status_code == 200
+
+    def test_add_adhoc_chore_inserts_row(self, client, child_user, assigned_chores, current_week):
+        """Test adding an ad-hoc chore returns its row and the new totals, rather than a reload."""
+        login_child(client, child_user)
+
+        response = client.post('/chores/add-adhoc', data={
+            'name': 'Washed the car', 'amount': 1.50, 'week_id': current_week['id']
+        })
+
+        html = response.data.decode()
+        assert response.status_code == 200
+        assert 'location.reload' not in html
+        assert f'hx-swap-oob="beforeend:#chore-rows-{current_week["id"]}"' in html
+        assert '<tr class="hover:bg-gray-50" id="row-' in html
+        assert 'Washed the car' in html
+        assert 'id="weekly-summary" hx-swap-oob="innerHTML"' in html
+        assert 'id="chore-details"' in html
+
+    def test_add_adhoc_chore_from_another_week(self, client, child_user, assigned_chores, current_week):
+        """Test a chore added while another week is shown is only confirmed, not inserted into that week."""
+        login_child(client, child_user)
+
+        response = client.post('/chores/add-adhoc', data={
+            'name': 'Washed the car', 'amount': 1.50, 'week_id': current_week['id'] + 1
+        })
+
+        assert response.status_code == 200
+        assert 'Added!' in response.data.decode()
+        assert 'hx-swap-oob' not in response.data.decode()
+
+
+class TestChoreSync:
+    """Tests for replaying toggles queued offline."""
+
+    def test_ticks_applied(self, client, child_user, assigned_chores):
+        """Test queued ticks are saved, and replaying them again changes nothing."""
+        login_child(client, child_user)
+        changes = [_change(assigned_chores[1]['id']), _change(assigned_chores[0]['id'], slot=2)]
+
+        for _ in range(2):
+            response = client.post('/chores/sync', json={'changes': changes})
+            assert response.status_code == 200
+            assert [r['status'] for r in response.get_json()['results']] == ['applied', 'applied']
+
+        assert len(_logs(child_user)) == 2
+        assert response.get_json()['results'][0] == {
+            'id': changes[0]['id'], 'status': 'applied', 'done': True, 'error': None
+        }
+
+    def test_untick_applied(self, client, child_user, assigned_chores):
+        """Test an untick made after the tick removes it."""
+        login_child(client, child_user)
+        client.post('/chores/toggle', data={'assignment_id': assigned_chores[1]['id'],
+                                            'date': date.today().isoformat(), 'slot': 1})
+        later = (time.time() + 5) * 1000
+
+        response = client.post('/chores/sync', json={'changes': [_change(assigned_chores[1]['id'], False, later)]})
+
+        assert response.get_json()['results'][0]['status'] == 'applied'
+        assert _logs(child_user) == []
+
+    def test_newer_tick_wins(self, client, child_user, assigned_chores):
+        """Test an untick recorded before a newer tick on the server is refused."""
+        login_child(client, child_user)
+        client.post('/chores/toggle', data={'assignment_id': assigned_chores[1]['id'],
+                                            'date': date.today().isoformat(), 'slot': 1})
+        earlier = (time.time() - 60) * 1000
+
+        response = client.post('/chores/sync', json={'changes': [_change(assigned_chores[1]['id'], False, earlier)]})
+
+        assert response.get_json()['results'][0] == {
+            'id': _change(assigned_chores[1]['id'])['id'], 'status': 'conflict', 'done': True, 'error': None
+        }
+        assert len(_logs(child_user)) == 1
+
+    def test_latest_change_per_cell(self, client, child_user, assigned_chores):
+        """Test only the last tap on a cell counts, whatever order the changes arrive in."""
+        login_child(client, child_user)
+        now = time.time() * 1000
+        changes = [_change(assigned_chores[1]['id'], False, now), _change(assigned_chores[1]['id'], True, now - 1000)]
+
+        response = client.post('/chores/sync', json={'changes': changes})
+
+        assert [r['done'] for r in response.get_json()['results']] == [False, False]
+        assert _logs(child_user) == []
+
+    def test_paid_week_rejected(self, client, child_user, assigned_chores, current_week):
+        """Test changes to a paid week are rejected."""
+        db.session.add(WeeklyPayment(week_id=current_week['id'], user_id=child_user['id'], amount=3.0, is_paid=True))
+        db.session.commit()
+        login_child(client, child_user)
+
+        response = client.post('/chores/sync', json={'changes': [_change(assigned_chores[1]['id'])]})
+
+        result = response.get_json()['results'][0]
+        assert result['status'] == 'rejected'
+        assert result['done'] is False
+        assert 'locked' in result['error']
+        assert _logs(child_user) == []
+
+    def test_invalid_changes_rejected(self, client, child_user, assigned_chores):
+        """Test bad or foreign changes are rejected without failing the batch."""
+        login_child(client, child_user)
+        changes = [
+            {**_change(assigned_chores[1]['id']), 'date': 'tuesday'},
+            {**_change(assigned_chores[1]['id']), 'done': 'yes'},
+            _change(999),
+            _change(assigned_chores[2]['id']),
+        ]
+
+        results = client.post('/chores/sync', json={'changes': changes}).get_json()['results']
+
+        assert [r['status'] for r in results] == ['rejected', 'rejected', 'rejected', 'applied']
+        assert results[2]['error'] == 'Invalid assignment'
+
+    def test_bad_requests(self, client, child_user):
+        """Test malformed and oversized batches are refused."""
+        login_child(client, child_user)
+
+        assert client.post('/chores/sync', json={'changes': 'all'}).status_code == 400
+        too_many = [_change(1)] * (ToggleSyncService.MAX_CHANGES + 1)
+        assert client.post('/chores/sync', json={'changes': too_many}).status_code == 413
+
+    def test_buttons_carry_state(self, client, child_user, assigned_chores):
+        """Test toggle buttons expose their state and the signed-in user for the offline queue."""
+        login_child(client, child_user)
+
+        html = client.get('/dashboard').data.decode()
+
+        assert 'data-done="false" data-label="AM"' in html
+        assert 'data-done="false" data-label=""' in html
+        assert f'data-user-id="{child_user["id"]}"' in html
+
+    def test_other_users_changes_skipped(self, client, child_user, assigned_chores, current_week):
+        """Test changes another child queued on the same device are skipped, not rejected."""
+        sibling = User(name='Sibling', is_admin=False)
+        sibling.set_pin('4321')
+        db.session.add(sibling)
+        db.session.flush()
+        theirs = WeeklyChoreAssignment(week_id=current_week['id'], chore_id=assigned_chores[1]['chore_id'],
+                                       user_id=sibling.id)
+        db.session.add(theirs)
+        db.session.commit()
+        login_child(client, child_user)
+        changes = [
+            {**_change(theirs.id), 'user_id': sibling.id},
+            {**_change(assigned_chores[1]['id']), 'user_id': sibling.id},
+            _change(theirs.id, slot=2),
+            {**_change(assigned_chores[2]['id']), 'user_id': child_user['id']},
+        ]
+
+        results = client.post('/chores/sync', json={'changes': changes}).get_json()['results']
+
+        assert [r['status'] for r in results] == ['skipped', 'skipped', 'skipped', 'applied']
+        assert ChoreLog.query.filter_by(user_id=sibling.id).count() == 0
+        assert len(_logs(child_user)) == 1
+
+    def test_sync_queries_independent_of_batch(self, app, client, child_user, assigned_chores, current_week):
+        """Test a full batch is applied in a handful of statements."""
+        login_child(client, child_user)
+        days = [current_week['start_date'] + timedelta(days=i) for i in range(7)]
+        changes = [_change(a['id'], day=day, slot=slot) for a in assigned_chores for day in days for slot in (1, 2)]
+
+        with query_budget(10, repeat_limit=2):
+            results = client.post('/chores/sync', json={'changes': changes}).get_json()['results']
+
+        assert {r['status'] for r in results} == {'applied'}
+        assert len(_logs(child_user)) == len(changes)
+
+    def test_week_rows(self, client, child_user, assigned_chores, current_week):
+        """Test a week's rows and totals can be fetched to swap in after a replay."""
+        login_child(client, child_user)
+        client.post('/chores/sync', json={'changes': [_change(assigned_chores[1]['id'])]})
+
+        html = client.get(f'/week/{current_week["id"]}/rows', headers={'HX-Request': 'true'}).data.decode()
+
+        assert html.count('<tr class="hover:bg-gray-50"') == len(assigned_chores)
+        assert 'id="weekly-summary" hx-swap-oob="innerHTML"' in html
+        assert 'id="chore-details" class="grid' in html
+        assert 'data-done="true"' in html
+        assert 'hx-trigger="toggles-replayed from:body"' in client.get('/dashboard').data.decode()
+
+
+class TestHistoryChart:
+    """Tests for the lazily loaded history chart."""
+
+    def test_dashboard_defers_history(self, client, child_user, assigned_chores, monkeypatch):
+        """Test the dashboard renders without computing the history."""
+        login_child(client, child_user)
+        monkeypatch.setattr('app.services.allowance_service.AllowanceService.get_12_week_history',
+                            lambda *args: pytest.fail('history computed for the dashboard'))
+
+        html = client.get('/dashboard').data.decode()
+
+        assert 'hx-get="/history-chart"' in html
+        assert 'performanceChart' not in html
+
+    def test_chart_partial(self, client, child_user, assigned_chores):
+        """Test the partial draws the chart from the history."""
+        login_child(client, child_user)
+
+        response = client.get('/history-chart')
+
+        assert response.status_code == 200
+        assert 'performanceChart' in response.data.decode()
+        assert response.cache_control.private
+        assert response.cache_control.no_cache
+
+    def test_not_modified(self, client, child_user, assigned_chores, monkeypatch):
+        """Test an unchanged history is answered with a 304, without recomputing it."""
+        login_child(client, child_user)
+        etag = client.get('/history-chart').headers['ETag']
+        monkeypatch.setattr('app.services.allowance_service.AllowanceService.get_12_week_history',
+                            lambda *args: pytest.fail('history recomputed'))
+
+        response = client.get('/history-chart', headers={'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+
+    def test_version_follows_changes(self, client, child_user, assigned_chores):
+        """Test ticking and unticking a chore changes the version, and undoing it restores it."""
+        login_child(client, child_user)
+        toggle = {'assignment_id': assigned_chores[1]['id'], 'date': date.today().isoformat(), 'slot': 1}
+        before = client.get('/history-chart').headers['ETag']
+
+        client.post('/chores/toggle', data=toggle)
+        ticked = client.get('/history-chart')
+        client.post('/chores/toggle', data=toggle)
+
+        assert ticked.headers['ETag'] != before
+        assert client.get('/history-chart').headers['ETag'] == before
+
+    def test_cached_between_requests(self, app, client, child_user, assigned_chores, monkeypatch):
+        """Test the history is reused from the worker's cache while its version is unchanged."""
+        login_child(client, child_user)
+        first = client.get('/history-chart').data
+        monkeypatch.setattr('app.services.allowance_service.AllowanceService.get_12_week_history',
+                            lambda *args: pytest.fail('history recomputed'))
+
+        assert client.get('/history-chart').data == first
+        assert len(app.extensions['history_cache']) == 1
+
+
+@pytest.fixture
+def previous_week(app, current_week):
+    """Create the week before the current one."""
+    with app.app_context():
+        week = WeekPeriod.get_or_create_week_for_date(current_week['start_date'] - timedelta(days=7))
+        return {'id': week.id, 'start_date': week.start_date}
+
+
+class TestWeekNavigation:
+    """Tests for moving between weeks on the dashboard."""
+
+    def test_links_to_adjacent_weeks(self, client, child_user, assigned_chores, current_week, previous_week):
+        """Test the week links are swapped in place by HTMX and prefetched."""
+        login_child(client, child_user)
+
+        html = client.get('/dashboard').data.decode()
+        assert f'hx-get="/week/{previous_week["id"]}"' in html
+        assert 'data-prefetch' in html
+
+        html = client.get(f'/week/{previous_week["id"]}').data.decode()
+        assert f'hx-get="/week/{current_week["id"]}"' in html
+
+    def test_fragment(self, client, child_user, assigned_chores, previous_week):
+        """Test HTMX requests get just the week, with an ETag for revalidating it."""
+        login_child(client, child_user)
+
+        response = client.get(f'/week/{previous_week["id"]}', headers={'HX-Request': 'true'})
+
+        html = response.data.decode()
+        assert html.startswith('<div id="week"')
+        assert '<html' not in html
+        assert response.cache_control.private
+        assert response.cache_control.no_cache
+        assert 'HX-Request' in response.vary
+
+        again = client.get(f'/week/{previous_week["id"]}',
+                           headers={'HX-Request': 'true', 'If-None-Match': response.headers['ETag']})
+        assert again.status_code == 304
+
+    def test_cached_between_requests(self, app, client, child_user, assigned_chores, monkeypatch):
+        """Test an unchanged week is served from the fragment cache without querying its chores."""
+        login_child(client, child_user)
+        first = client.get('/dashboard', headers={'HX-Request': 'true'}).data
+        monkeypatch.setattr('app.routes.dashboard._render_week_fragment',
+                            lambda *args: pytest.fail('week rendered again'))
+
+        assert client.get('/dashboard', headers={'HX-Request': 'true'}).data == first
+        assert client.get('/dashboard').status_code == 200
+        assert len(app.extensions['fragment_cache']) == 1
+
+    def test_version_follows_changes(self, client, child_user, assigned_chores):
+        """Test ticking a chore gives the week a new ETag and shows the tick."""
+        login_child(client, child_user)
+        before = client.get('/dashboard', headers={'HX-Request': 'true'})
+
+        client.post('/chores/toggle', data={
+            'assignment_id': assigned_chores[1]['id'], 'date': date.today().isoformat(), 'slot': 1
+        })
+        after = client.get('/dashboard', headers={'HX-Request': 'true'})
+
+        assert after.headers['ETag'] != before.headers['ETag']
+        assert after.data.decode().count('✓') == before.data.decode().count('✓') + 1
+
+    def test_preset_assignment_not_cached(self, app, client, child_user, sample_chores, current_week):
+        """Test the render that assigns this week's preset chores isn't cached under the old version."""
+        response = client.post('/login', data={
+            'login_type': 'child', 'user_id': child_user['id'], 'pin': child_user['pin']
+        })
+        assert response.status_code == 302
+
+        assert 'Make Bed' in client.get('/dashboard').data.decode()
+        assert len(app.extensions.get('fragment_cache', {})) == 0
+        assert 'Make Bed' in client.get('/dashboard').data.decode()
+        assert len(app.extensions['fragment_cache']) == 1
@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+
+class TestHealthRoutes:
+    """Tests for the liveness and readiness probes."""
+
+    def test_healthz(self, client):
+        """Test the liveness probe answers without logging in."""
+        response = client.get('/healthz')
+
+        assert response.status_code == 200
+        assert response.get_json() == {'status': 'ok'}
+        assert 'Set-Cookie' not in response.headers
+
+    def test_readyz(self, client):
+        """Test the readiness probe checks the database."""
+        response = client.get('/readyz')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['checks']['database'] == 'ok'
+        assert data['checks']['scheduler'] in ('running', 'stopped')
+
+    def test_readyz_database_down(self, app, client):
+        """Test the readiness probe fails when the database is unreachable."""
+        from app import db
+
+        with patch.object(type(db.engine), 'connect', side_effect=RuntimeError('down')):
+            response = client.get('/readyz')
+
+        assert response.status_code == 503
+        assert response.get_json()['checks']['database'] == 'unavailable'
+
+
+class TestMetricsRoute:
+    """Tests for the Prometheus metrics endpoint."""
+
+    def test_request_metrics_exported(self, client, child_user):
+        """Test request latency and SQL counts are recorded per endpoint."""
+        client.get('/login')
+
+        response = client.get('/metrics')
+
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain')
+        body = response.get_data(as_text=True)
+        assert 'chorechamp_request_duration_seconds_count{endpoint="auth.login",method="GET",status="200"}' in body
+        assert 'chorechamp_request_sql_statements_count{endpoint="auth.login"}' in body
+
+    def test_bcrypt_time_exported(self, client, child_user):
+        """Test PIN verification time is recorded."""
+        client.post('/login', data={'user_id': child_user['id'], 'pin': child_user['pin']})
+
+        body = client.get('/metrics').get_data(as_text=True)
+
+        assert 'chorechamp_bcrypt_seconds_count{operation="verify"}' in body
+
+    def test_metrics_can_be_disabled(self, app, client):
+        """Test /metrics is hidden when METRICS_ENABLED is off."""
+        app.config['METRICS_ENABLED'] = False
+
+        assert client.get('/metrics').status_code == 404
+
+    def test_token_required_when_set(self, app, client):
+        """Test /metrics needs the configured bearer token."""
+        app.config['METRICS_TOKEN'] = 's3cret'
+
+        assert client.get('/metrics').status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer s3cret'}).status_code == 200
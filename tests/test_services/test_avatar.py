@@ -0,0 +1,142 @@
+import io
+import os
+import xml.etree.ElementTree as ElementTree
+
+import pytest
+from PIL import Image
+
+from app import db
+from app.models.user import User
+from app.services.avatar_service import AvatarService, UnknownAvatarStyle
+from tests.conftest import login_admin
+
+
+@pytest.fixture
+def avatars(app, tmp_path):
+    """Cache avatars in a temporary directory."""
+    app.config['AVATAR_CACHE_DIR'] = str(tmp_path / 'avatars')
+    return AvatarService()
+
+
+class TestAvatarService:
+    """Tests for the local avatar renderer."""
+
+    def test_deterministic(self, avatars):
+        """Test a style and seed always draw the same avatar, and other seeds differ."""
+        first = avatars.to_svg(avatars.draw('bottts', 'happy star'), 128)
+
+        assert avatars.to_svg(avatars.draw('bottts', 'happy star'), 128) == first
+        assert avatars.to_svg(avatars.draw('bottts', 'cool dragon'), 128) != first
+
+    @pytest.mark.parametrize('style', AvatarService.styles())
+    def test_every_style_renders(self, avatars, style):
+        """Test each style renders a valid SVG and PNG."""
+        svg = ElementTree.fromstring(open(avatars.get_path(style, 'ninja cat', 64, 'svg'), 'rb').read())
+        png = Image.open(avatars.get_path(style, 'ninja cat', 64, 'png'))
+
+        assert svg.get('width') == '64'
+        assert len(svg) > 3
+        assert png.size == (64, 64)
+
+    def test_unknown_style(self, avatars):
+        """Test a style without a renderer is refused."""
+        with pytest.raises(UnknownAvatarStyle):
+            avatars.get_path('../../etc', 'x')
+
+    def test_cached_on_disk(self, avatars, monkeypatch):
+        """Test a rendered avatar is reused rather than drawn again."""
+        path = avatars.get_path('thumbs', 'rainbow fish', 96)
+        assert avatars.get_path('thumbs', 'rainbow fish', 128) != path
+        monkeypatch.setattr(avatars, 'draw', lambda *args: pytest.fail('drawn twice'))
+
+        assert avatars.get_path('thumbs', 'rainbow fish', 96) == path
+
+    def test_cache_pruned(self, app, tmp_path):
+        """Test the cache drops its oldest files when it grows past its limit."""
+        avatars = AvatarService(cache_dir=str(tmp_path), max_files=4)
+        paths = []
+        for i in range(6):
+            paths.append(avatars.get_path('pixel-art', f'seed {i}'))
+            os.utime(paths[-1], (i, i))
+
+        assert len(os.listdir(tmp_path)) <= 4
+        assert os.path.exists(paths[-1])
+        assert not os.path.exists(paths[0])
+
+    def test_cache_bounded_by_size(self, app, tmp_path):
+        """Test the cache drops its oldest files when it grows past its byte limit."""
+        avatars = AvatarService(cache_dir=str(tmp_path), max_bytes=1)
+        first = avatars.get_path('pixel-art', 'seed 0')
+        os.utime(first, (0, 0))
+        second = avatars.get_path('pixel-art', 'seed 1')
+
+        assert os.path.exists(second)
+        assert not os.path.exists(first)
+
+    def test_snap_size(self):
+        """Test requested sizes are rounded to the rendered sizes."""
+        assert AvatarService.snap_size(None) == AvatarService.DEFAULT_SIZE
+        assert AvatarService.snap_size(100) == 96
+        assert AvatarService.snap_size(10000) == 512
+
+
+class TestAvatarRoute:
+    """Tests for serving avatars."""
+
+    def test_serves_svg(self, client, admin_user, avatars):
+        """Test avatars are served with an ETag and a long lifetime."""
+        login_admin(client, admin_user)
+        response = client.get('/settings/avatars/micah.svg?seed=super+hero&size=64')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'image/svg+xml'
+        assert response.cache_control.max_age == 365 * 24 * 60 * 60
+        assert response.headers['ETag'] == f'"{AvatarService.etag("micah", "super hero", 64, "svg")}"'
+
+        again = client.get('/settings/avatars/micah.svg?seed=super+hero&size=64',
+                           headers={'If-None-Match': response.headers['ETag']})
+        assert again.status_code == 304
+
+    def test_serves_png(self, client, admin_user, avatars):
+        """Test PNGs are served at a rendered size."""
+        login_admin(client, admin_user)
+        response = client.get('/settings/avatars/fun-emoji.png?seed=x&size=50')
+
+        assert response.mimetype == 'image/png'
+        assert Image.open(io.BytesIO(response.data)).size == (48, 48)
+
+    def test_unknown_style_404(self, client, avatars):
+        """Test unknown styles and formats are not found."""
+        assert client.get('/settings/avatars/nope.svg?seed=x').status_code == 404
+        assert client.get('/settings/avatars/bottts.gif?seed=x').status_code == 404
+
+    def test_user_avatar_url(self, app, child_user, avatars):
+        """Test users' avatars point at the local renderer."""
+        user = db.session.get(User, child_user['id'])
+
+        with app.test_request_context():
+            assert user.avatar_url == '/settings/avatars/bottts.svg?seed=Test+Child&size=128&v=1'
+
+    def test_anonymous_user_avatar(self, client, child_user, avatars):
+        """Test users' avatars are served without login, for the login page."""
+        response = client.get('/settings/avatars/bottts.svg?seed=Test+Child&size=64')
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] == f'"{AvatarService.etag("bottts", "Test Child", 64, "svg")}"'
+
+    def test_anonymous_unknown_seed_placeholder(self, client, child_user, avatars):
+        """Test seeds no user has get a placeholder without login, and nothing new is cached."""
+        response = client.get('/settings/avatars/micah.svg?seed=Test+Child&size=64')
+        other = client.get('/settings/avatars/bottts.svg?seed=anything&size=64')
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] == f'"{AvatarService.etag("bottts", "", 64, "svg")}"'
+        assert other.headers['ETag'] == response.headers['ETag']
+        assert os.listdir(avatars.cache_dir) == [os.path.basename(avatars.get_path('bottts', '', 64))]
+
+    def test_login_roster_uses_local_avatars(self, client, child_user, avatars):
+        """Test the login page makes no third-party avatar requests."""
+        html = client.get('/login').data.decode()
+
+        assert '/settings/avatars/bottts.svg' in html
+        assert 'dicebear' not in html
@@ -0,0 +1,59 @@
+from datetime import date
+
+from app import db
+from app.models.chore import ChoreDefinition
+from app.models.chore_log import ChoreLog
+from app.models.user import User
+from app.models.week import WeeklyChoreAssignment, WeeklyPayment
+from app.services.seed_service import SeedService, UNPAID_WEEKS
+
+
+class TestSeedService:
+    """Tests for the synthetic dataset generator."""
+
+    def test_seed_scale_counts(self, app):
+        """Test the reported counts match what was inserted."""
+        counts = SeedService().seed_scale(households=2, children=2, chores=8, years=0.5,
+                                          today=date(2024, 6, 12), log=lambda message: None)
+
+        assert counts['users'] == User.query.count() == 6
+        assert counts['weeks'] == 26
+        assert counts['assignments'] == WeeklyChoreAssignment.query.count()
+        assert counts['chore_logs'] == ChoreLog.query.count()
+        assert counts['payments'] == WeeklyPayment.query.filter_by(is_paid=True).count() == 4 * (26 - UNPAID_WEEKS)
+
+    def test_history_is_realistic(self, app):
+        """Test the history covers twice-daily slots, specific days and ad-hoc chores."""
+        SeedService().seed_scale(households=1, children=2, chores=8, years=0.5,
+                                 today=date(2024, 6, 12), log=lambda message: None)
+
+        assert ChoreLog.query.filter_by(completion_slot=2).count() > 0
+        assert ChoreLog.query.filter(ChoreLog.completed_date > date(2024, 6, 12)).count() == 0
+        assert ChoreLog.query.filter(ChoreLog.assignment_id.is_(None)).count() == 0
+
+        water = ChoreDefinition.query.filter_by(frequency='specific_days').first()
+        days = {log.completed_date.weekday() for log in ChoreLog.query.filter_by(chore_id=water.id)}
+        assert days <= set(water.get_preferred_days())
+
+        ad_hoc = WeeklyChoreAssignment.query.filter(WeeklyChoreAssignment.custom_name.isnot(None)).all()
+        assert ad_hoc
+        assert all(a.chore_definition.frequency == 'ad_hoc' for a in ad_hoc)
+
+    def test_generated_child_can_log_in(self, app, client):
+        """Test generated children use the shared PIN and can load their dashboard."""
+        SeedService().seed_scale(households=1, children=1, chores=3, years=0.1, log=lambda message: None)
+        child = User.query.filter_by(is_admin=False).first()
+
+        client.post('/login', data={'login_type': 'child', 'user_id': child.id, 'pin': SeedService.PIN})
+
+        assert client.get('/dashboard').status_code == 200
+
+    def test_cli(self, app, runner):
+        """Test the seed-scale command."""
+        from run import seed_scale
+
+        result = runner.invoke(seed_scale, ['--households', '1', '--children', '1', '--chores', '2', '--years', '0.1'])
+
+        assert result.exit_code == 0
+        assert 'chore_logs' in result.output
+        assert db.session.query(User).count() == 2
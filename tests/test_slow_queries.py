@@ -0,0 +1,106 @@
+import glob
+import os
+
+import pytest
+
+from app.models.chore_log import ChoreLog
+from app.slow_queries import logger, read_slow_queries, worst_offenders
+from tests.conftest import login_admin
+
+
+@pytest.fixture
+def slow_log(app, tmp_path):
+    """Log every statement to a temporary slow-query log."""
+    path = str(tmp_path / 'slow_queries.log')
+    app.config['SLOW_QUERY_THRESHOLD_MS'] = 0
+    app.config['SLOW_QUERY_LOG_FILE'] = path
+    return path
+
+
+class TestSlowQueryLog:
+    """Tests for the slow-query log."""
+
+    def test_slow_statement_logged_with_plan(self, app, slow_log, child_user):
+        """Test a statement over the threshold is logged with parameters and its plan."""
+        ChoreLog.query.filter_by(user_id=child_user['id'], week_id=1).all()
+
+        record = next(r for r in read_slow_queries(slow_log) if 'FROM chore_logs' in r['statement'])
+        assert str(child_user['id']) in record['parameters']
+        assert 'ix_chore_logs_user_week' in record['plan']
+        assert record['duration_ms'] >= 0
+
+    def test_password_hashes_redacted(self, app, slow_log, child_user):
+        """Test PIN/password hashes never reach the log."""
+        insert = next(r for r in read_slow_queries(slow_log) if r['statement'].startswith('INSERT INTO users'))
+
+        assert '$2b$' not in insert['parameters']
+        assert '<hash>' in insert['parameters']
+
+    def test_request_endpoint_recorded(self, app, client, slow_log):
+        """Test statements run during a request record the endpoint."""
+        client.get('/login')
+
+        endpoints = {r['endpoint'] for r in read_slow_queries(slow_log)}
+        assert 'auth.login' in endpoints
+
+    def test_logged_per_process(self, app, slow_log, child_user, monkeypatch):
+        """Test each process writes its own file, and all of them are read back."""
+        ChoreLog.query.filter_by(user_id=child_user['id']).all()
+        monkeypatch.setattr(os, 'getpid', lambda: 99999)
+        ChoreLog.query.filter_by(week_id=1).all()
+
+        assert os.path.exists(f'{slow_log}.{os.getpid()}')
+        assert len(glob.glob(slow_log + '.*')) == 2
+        statements = [r['statement'] for r in read_slow_queries(slow_log)]
+        assert sum('FROM chore_logs' in statement for statement in statements) == 2
+
+    def test_old_logs_pruned(self, app, slow_log, child_user):
+        """Test the oldest logs are deleted once there are more than SLOW_QUERY_LOG_MAX_FILES."""
+        app.config['SLOW_QUERY_LOG_MAX_FILES'] = 2
+        for i in range(3):
+            with open(f'{slow_log}.{i}', 'w') as old_log:
+                old_log.write('{}\n')
+            os.utime(f'{slow_log}.{i}', (i, i))
+        # As in a newly started process
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+
+        ChoreLog.query.all()
+
+        assert sorted(os.listdir(os.path.dirname(slow_log))) == sorted(
+            os.path.basename(name) for name in (f'{slow_log}.2', f'{slow_log}.{os.getpid()}')
+        )
+
+    def test_disabled_below_threshold(self, app, slow_log):
+        """Test fast statements are not logged."""
+        app.config['SLOW_QUERY_THRESHOLD_MS'] = 60000
+
+        ChoreLog.query.all()
+
+        assert read_slow_queries(slow_log) == []
+
+    def test_worst_offenders_grouped(self):
+        """Test entries are grouped by statement and ordered by total time."""
+        records = [
+            {'statement': 'SELECT a', 'duration_ms': 150, 'endpoint': 'x', 'at': '2024-01-01T00:00:00'},
+            {'statement': 'SELECT b', 'duration_ms': 120, 'endpoint': 'y', 'at': '2024-01-01T00:00:00'},
+            {'statement': 'SELECT b', 'duration_ms': 110, 'endpoint': 'z', 'at': '2024-01-02T00:00:00', 'plan': 'SCAN'},
+        ]
+
+        offenders = worst_offenders(records)
+
+        assert [o['statement'] for o in offenders] == ['SELECT b', 'SELECT a']
+        assert offenders[0]['count'] == 2
+        assert offenders[0]['max_ms'] == 120
+        assert offenders[0]['endpoints'] == ['y', 'z']
+        assert offenders[0]['plan'] == 'SCAN'
+
+    def test_admin_page_lists_offenders(self, app, client, admin_user, slow_log):
+        """Test the admin page shows logged statements."""
+        login_admin(client, admin_user)
+
+        response = client.get('/admin/slow-queries')
+
+        assert response.status_code == 200
+        assert b'FROM users' in response.data
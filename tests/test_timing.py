@@ -0,0 +1,42 @@
+import json
+import logging
+
+from app.timing import format_server_timing
+
+
+class TestServerTiming:
+    """Tests for the Server-Timing breakdown."""
+
+    def test_page_reports_db_and_render(self, client, child_user):
+        """Test a rendered page reports SQL, template and total time."""
+        response = client.get('/login')
+
+        header = response.headers['Server-Timing']
+        assert header.startswith('db;dur=')
+        assert 'render;dur=' in header
+        assert 'total;dur=' in header
+        assert 'auth;' not in header
+
+    def test_pin_check_reports_auth(self, client, child_user):
+        """Test a PIN login reports time spent hashing."""
+        response = client.post('/login', data={'user_id': child_user['id'], 'pin': child_user['pin']})
+
+        assert 'auth;dur=' in response.headers['Server-Timing']
+
+    def test_structured_log(self, app, client, caplog):
+        """Test the breakdown is logged as JSON when enabled."""
+        app.config['SERVER_TIMING_LOG'] = True
+
+        with caplog.at_level(logging.INFO, logger=app.logger.name):
+            client.get('/healthz')
+
+        entry = json.loads(next(r.message for r in caplog.records if 'request_timing' in r.message))
+        assert entry['endpoint'] == 'health.healthz'
+        assert entry['total_ms'] >= 0
+
+    def test_format(self):
+        """Test phases are written in a fixed order with millisecond durations."""
+        header = format_server_timing({'total': 0.05, 'auth': 0.0125, 'db': 0.002})
+
+        assert header == ('db;dur=2.0;desc="SQL", auth;dur=12.5;desc="PIN/password hashing", '
+                          'total;dur=50.0;desc="Total"')